@@ -0,0 +1,214 @@
+"""Check the prerequisites of `just template configure` in one process.
+
+Usage: uv run --locked --no-dev template/scripts/doctor.py [--root DIR]
+
+Every check runs concurrently on a thread pool:
+
+  - the files configure needs exist, and the secrets among them parse
+    with the readers the render itself uses (plugin.age_key and friends),
+  - cluster.toml validates against the schema,
+  - the tools pinned in .mise/config.toml answer a version probe and
+    match their pin.
+
+Results are printed in a fixed order in the `just log` (gum) format with
+how long each check took, and the exit status is 1 when any check failed.
+Missing tools only fail the run when mise marks them required:template.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import tomllib
+
+import plugin
+import validate
+
+REPO_ROOT = Path(__file__).parents[2]
+# Version arguments per mise tool that the template recipes call.
+TOOL_PROBES: dict[str, list[str]] = {
+    "age": ["age", "--version"],
+    "github:postfinance/topf": ["topf", "--version"],
+    "gum": ["gum", "--version"],
+    "helmfile": ["helmfile", "--version"],
+    "just": ["just", "--version"],
+    "kubeconform": ["kubeconform", "-v"],
+    "kustomize": ["kustomize", "version"],
+    "sd": ["sd", "--version"],
+    "sops": ["sops", "--version"],
+    "talosctl": ["talosctl", "version", "--client", "--short"],
+    "uv": ["uv", "--version"],
+}
+PROBE_TIMEOUT = 5
+VERSION = re.compile(r"v?([0-9]+\.[0-9]+\.[0-9]+)")
+# charmbracelet/log level names, as gum prints them.
+LEVELS = {"info": "INFO", "warn": "WARN", "error": "ERRO"}
+
+
+class Result(NamedTuple):
+    level: str
+    msg: str
+    fields: dict[str, str]
+    seconds: float = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.level == "error"
+
+    def line(self, now: datetime) -> str:
+        fields = "".join(f" {key}={_quote(value)}" for key, value in self.fields.items())
+        return f"{now.isoformat(timespec='seconds')} {LEVELS[self.level]} {_duration(self.seconds):>8} {self.msg}{fields}"
+
+
+def _quote(value: str) -> str:
+    return f'"{value}"' if not value or any(c in value for c in ' ="') else value
+
+
+def _duration(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def _timed(check: Callable[[], Result]) -> Result:
+    start = time.perf_counter()
+    try:
+        result = check()
+    except Exception as e:
+        result = Result("error", "fail", {"check": getattr(check, "__name__", "check"), "error": str(e)})
+    return result._replace(seconds=time.perf_counter() - start)
+
+
+# A file configure reads, and the plugin reader it goes through, if any.
+def check_file(label: str, path: Path, parse: Callable[[str], Any] | None = None) -> Result:
+    if not path.exists():
+        return Result("error", "missing", {"file": label})
+    if parse is not None:
+        try:
+            parse(str(path))
+        except (KeyError, ValueError, OSError) as e:
+            return Result("error", "invalid", {"file": label, "error": str(e).strip("'\"")})
+    return Result("info", "ok", {"file": label})
+
+
+def check_schema(config: Path) -> tuple[Result, dict[str, Any] | None]:
+    try:
+        data = validate.load(str(config))
+    except validate.ConfigError as e:
+        first = str(e).splitlines()[0]
+        return Result("error", "fail", {"check": "schema", "error": first}), None
+    return Result("info", "ok", {"check": "schema"}), data
+
+
+def _timed_schema(config: Path) -> tuple[Result, dict[str, Any] | None]:
+    start = time.perf_counter()
+    result, data = check_schema(config)
+    return result._replace(seconds=time.perf_counter() - start), data
+
+
+def _parse_cloudflare_tunnel(path: str) -> None:
+    plugin.cloudflare_tunnel_id(path)
+    plugin.cloudflare_tunnel_secret(path)
+
+
+def _parse_age_key(path: str) -> None:
+    plugin.age_key("public", path)
+    plugin.age_key("private", path)
+
+
+# Pinned version and whether the template needs the tool, per mise tool.
+def mise_tools(config: Path) -> dict[str, tuple[str, bool]]:
+    try:
+        text = config.read_text()
+    except FileNotFoundError:
+        return {}
+    required = {
+        line.split("=", 1)[0].strip().strip('"')
+        for line in text.splitlines() if "required:template" in line
+    }
+    tools = tomllib.loads(text).get("tools", {})
+    return {name: (str(pin), name in required) for name, pin in tools.items()}
+
+
+def check_tool(name: str, pin: str, required: bool) -> Result:
+    argv = TOOL_PROBES[name]
+    label = argv[0]
+    if shutil.which(argv[0]) is None:
+        return Result("error" if required else "warn", "missing", {"tool": label})
+    try:
+        proc = subprocess.run(argv, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return Result("error" if required else "warn", "timed out", {"tool": label})
+    match = VERSION.search(proc.stdout + proc.stderr)
+    if proc.returncode != 0 or match is None:
+        return Result("warn", "no version", {"tool": label})
+    version = match[1]
+    if version != pin.removeprefix("v"):
+        return Result("warn", "version mismatch", {"tool": label, "version": version, "pinned": pin})
+    return Result("info", "ok", {"tool": label, "version": version})
+
+
+def run(root: Path) -> list[Result]:
+    config = root / "cluster.toml"
+    age_key = Path(os.environ.get("SOPS_AGE_KEY_FILE") or root / "age.key")
+    files: list[tuple[str, Path, Callable[[str], Any] | None]] = [
+        ("cluster.toml", config, None),
+        ("cluster.sample.toml", root / "cluster.sample.toml", None),
+        ("age.key", age_key, _parse_age_key),
+        ("deploy.key", root / "deploy.key", plugin.deploy_key),
+        ("flux-webhook-token.txt", root / "flux-webhook-token.txt", plugin.webhook_token),
+        ("template/", root / "template", None),
+        ("makejinja.toml", root / "makejinja.toml", None),
+    ]
+    tools = {name: pin for name, pin in mise_tools(root / ".mise" / "config.toml").items() if name in TOOL_PROBES}
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        file_checks = [pool.submit(_timed, lambda f=f: check_file(*f)) for f in files]
+        schema: Future[tuple[Result, dict[str, Any] | None]] | None = None
+        if config.is_file():
+            schema = pool.submit(lambda: _timed_schema(config))
+        tool_checks = [
+            pool.submit(_timed, lambda name=name, pin=pin: check_tool(name, *pin))
+            for name, pin in sorted(tools.items())
+        ]
+        results = [future.result() for future in file_checks]
+        if schema is not None:
+            result, data = schema.result()
+            results.append(result)
+            if result.failed:
+                script = Path(validate.__file__).relative_to(root, walk_up=True)
+                results.append(Result("info", f"diagnose with: uv run --locked --no-dev {script} cluster.toml", {}))
+            elif data is not None and data["ingress"]["mode"] == "cloudflare-tunnel":
+                # Only needed, and only checked, for the tunnel ingress mode.
+                results.insert(2, _timed(lambda: check_file(
+                    "cloudflare-tunnel.json", root / "cloudflare-tunnel.json", _parse_cloudflare_tunnel
+                )))
+        results += [future.result() for future in tool_checks]
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=REPO_ROOT, help="repository root (default: %(default)s)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(args.root)
+    for result in results:
+        print(result.line(datetime.now().astimezone()), file=sys.stderr)
+    failed = any(result.failed for result in results)
+    summary = Result("error" if failed else "info", "failed" if failed else "all good", {},
+                     time.perf_counter() - start)
+    print(summary.line(datetime.now().astimezone()), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
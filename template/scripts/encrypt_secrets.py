@@ -0,0 +1,101 @@
+"""Encrypt every plaintext *.sops.* file under the given directories.
+
+Usage: uv run --locked --no-dev template/scripts/encrypt_secrets.py DIR... [--jobs N]
+
+Encryption status is read from each file's sops metadata (the top-level
+`sops` key of YAML/JSON, `sops_mac` of dotenv, the `[sops]` section of INI)
+without running a process; only formats sops stores differently fall back
+to `sops filestatus`. Plaintext files are then encrypted in place with
+`sops encrypt`, at most --jobs (default: CPU count) at a time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+# sops always writes its metadata block in block style at column 0.
+METADATA = {
+    ".yaml": re.compile(rb"^sops:[ \t]*$", re.MULTILINE),
+    ".yml": re.compile(rb"^sops:[ \t]*$", re.MULTILINE),
+    ".env": re.compile(rb"^sops_mac=", re.MULTILINE),
+    ".ini": re.compile(rb"^\[sops\][ \t]*$", re.MULTILINE),
+}
+
+
+class StatusError(Exception):
+    pass
+
+
+def encrypted(path: Path) -> bool:
+    content = path.read_bytes()
+    if pattern := METADATA.get(path.suffix):
+        return pattern.search(content) is not None
+    if path.suffix == ".json":
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            raise StatusError("could not read encryption status") from None
+        return isinstance(data, dict) and "sops" in data
+    proc = subprocess.run(["sops", "filestatus", str(path)], capture_output=True)
+    try:
+        status = json.loads(proc.stdout)["encrypted"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        raise StatusError("could not read encryption status") from None
+    if not isinstance(status, bool):
+        raise StatusError("could not determine encryption status")
+    return status
+
+
+def find(directories: list[Path]) -> list[Path]:
+    files: list[Path] = []
+    for directory in directories:
+        if not directory.is_dir():
+            raise FileNotFoundError(f"{directory}: directory not found")
+        files += (path for path in directory.rglob("*.sops.*") if path.is_file())
+    return sorted(files)
+
+
+def encrypt(path: Path) -> str | None:
+    proc = subprocess.run(["sops", "encrypt", "--in-place", str(path)], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return proc.stderr.strip() or f"sops exited with status {proc.returncode}"
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directories", nargs="+", type=Path)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    try:
+        files = find(args.directories)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    plaintext: list[Path] = []
+    for path in files:
+        try:
+            if not encrypted(path):
+                plaintext.append(path)
+        except StatusError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            return 1
+
+    rc = 0
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for path, error in zip(plaintext, pool.map(encrypt, plaintext)):
+            if error:
+                print(f"{path}: could not encrypt: {error}", file=sys.stderr)
+                rc = 1
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+"""Analyze the dependency graph of the rendered Flux Kustomizations and HelmReleases.
+
+Usage: uv run --locked --no-dev template/scripts/flux_graph.py <kubernetes-dir> [--report] [--json FILE] [--strict]
+
+Every Kustomization (kustomize.toolkit.fluxcd.io) and HelmRelease
+(helm.toolkit.fluxcd.io) under <kubernetes-dir> becomes a node, keyed
+kind/namespace/name with namespaces resolved the way Flux and kustomize
+would (targetNamespace, then a kustomization.yaml namespace, then
+metadata.namespace, then the namespace of the Kustomization applying it).
+`dependsOn` entries are edges; so is the implicit edge from every object to
+the Kustomization that applies it, since nothing reconciles before it is
+applied. Encrypted *.sops.* files are never read.
+
+Errors (exit 1): dependency cycles and dangling dependsOn references.
+Warnings, only looked for with --report or --strict (exit 1 with --strict):
+
+  - redundant edges: a dependsOn already implied by another dependency,
+  - weak edges: a dependsOn on a Kustomization that neither waits nor has
+    health checks, so the dependent only waits for apply, not readiness.
+
+--report also prints every level of the graph (level N only starts once
+something on level N-1 is ready) with its width, the critical path and the
+dependsOn edges whose removal would shorten it, i.e. the ones that
+serialize a cold start and are worth questioning first.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import argparse
+import json
+import sys
+
+import yaml
+
+KUSTOMIZE_CONFIG = "kustomization.yaml"
+KUSTOMIZATION = "Kustomization"
+HELM_RELEASE = "HelmRelease"
+GROUPS = {
+    KUSTOMIZATION: "kustomize.toolkit.fluxcd.io",
+    HELM_RELEASE: "helm.toolkit.fluxcd.io",
+}
+SOPS_PATTERN = "*.sops.*"
+
+
+class Node(NamedTuple):
+    kind: str
+    namespace: str
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.kind}/{self.namespace}/{self.name}"
+
+
+class Edge(NamedTuple):
+    dependent: Node
+    dependency: Node
+    # False for the implicit edge to the applying Kustomization.
+    explicit: bool = True
+
+
+class Graph:
+    def __init__(self):
+        self.nodes: dict[Node, dict[str, Any]] = {}
+        self.edges: list[Edge] = []
+        self.dangling: list[Edge] = []
+        # Edges by dependent and by dependency, so walks cost O(edges).
+        self._out: dict[Node, list[Edge]] = {}
+        self._in: dict[Node, list[Edge]] = {}
+
+    def deps(self, node: Node, skip: Edge | None = None) -> list[Node]:
+        return [edge.dependency for edge in self._out.get(node, []) if edge != skip]
+
+    def add_edge(self, edge: Edge) -> None:
+        if edge.dependency in self.nodes:
+            self.edges.append(edge)
+            self._out.setdefault(edge.dependent, []).append(edge)
+            self._in.setdefault(edge.dependency, []).append(edge)
+        else:
+            self.dangling.append(edge)
+
+    # Strongly connected components with more than one node (or a
+    # self-loop), each as a list of nodes in cycle order.
+    def cycles(self) -> list[list[Node]]:
+        adjacency = {node: self.deps(node) for node in self.nodes}
+        index: dict[Node, int] = {}
+        low: dict[Node, int] = {}
+        stack: list[Node] = []
+        on_stack: set[Node] = set()
+        found: list[list[Node]] = []
+
+        # Iterative Tarjan, so deep chains cannot hit the recursion limit.
+        for root in self.nodes:
+            if root in index:
+                continue
+            work: list[tuple[Node, Iterator[Node]]] = [(root, iter(adjacency[root]))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(adjacency[child])))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] != index[node]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in adjacency[node]:
+                    found.append(sorted(component))
+        return sorted(found)
+
+    # Level of every node: 0 without dependencies, else one more than its
+    # deepest dependency, ignoring skip. Only meaningful on an acyclic graph.
+    def levels(self, skip: Edge | None = None) -> dict[Node, int]:
+        levels: dict[Node, int] = {}
+        for root in self.nodes:
+            work = [root]
+            while work:
+                node = work[-1]
+                if node in levels:
+                    work.pop()
+                    continue
+                deps = self.deps(node, skip)
+                pending = [dep for dep in deps if dep not in levels]
+                if pending:
+                    work += pending
+                    continue
+                work.pop()
+                levels[node] = max((levels[dep] + 1 for dep in deps), default=0)
+        return levels
+
+    # The longest chain, from its root dependency up to the last dependent.
+    def critical_path(self, levels: dict[Node, int]) -> list[Node]:
+        if not levels:
+            return []
+        node = max(sorted(levels), key=lambda n: levels[n])
+        path = [node]
+        while levels[node]:
+            node = next(dep for dep in sorted(self.deps(node)) if levels[dep] == levels[node] - 1)
+            path.append(node)
+        return path[::-1]
+
+    # Explicit edges already implied by another path between their ends.
+    # Ancestor sets are bitmasks built in one pass in level order; an edge
+    # is redundant when one of its siblings reaches its dependency too.
+    def redundant(self, levels: dict[Node, int]) -> list[Edge]:
+        bit = {node: 1 << i for i, node in enumerate(self.nodes)}
+        ancestors: dict[Node, int] = {}
+        found: set[Edge] = set()
+        for node in sorted(self.nodes, key=levels.__getitem__):
+            edges = self._out.get(node, [])
+            reach = [bit[edge.dependency] | ancestors[edge.dependency] for edge in edges]
+            ancestors[node] = 0
+            for i, edge in enumerate(edges):
+                ancestors[node] |= reach[i]
+                if edge.explicit and any(other & bit[edge.dependency] for j, other in enumerate(reach) if j != i):
+                    found.add(edge)
+        return [edge for edge in self.edges if edge in found]
+
+    # Explicit edges whose dependency cannot tell the dependent it is ready.
+    def weak(self) -> list[Edge]:
+        return [
+            edge for edge in self.edges
+            if edge.explicit and edge.dependency.kind == KUSTOMIZATION
+            and not self.nodes[edge.dependency].get("wait")
+            and not self.nodes[edge.dependency].get("healthChecks")
+            and not self.nodes[edge.dependency].get("healthCheckExprs")
+        ]
+
+    # Explicit edges whose removal lowers the depth, with the new depth.
+    # Those are the edges on every longest chain: counting the longest
+    # chains below and above each node finds them in one pass each way,
+    # and only they are re-levelled to get the new depth.
+    def critical(self, levels: dict[Node, int]) -> list[tuple[Edge, int]]:
+        depth = max(levels.values(), default=-1) + 1
+        order = sorted(self.nodes, key=levels.__getitem__)
+        below: dict[Node, int] = {}
+        for node in order:
+            below[node] = sum(
+                below[edge.dependency] for edge in self._out.get(node, [])
+                if levels[edge.dependency] == levels[node] - 1
+            ) or 1
+        height: dict[Node, int] = {}
+        above: dict[Node, int] = {}
+        for node in reversed(order):
+            dependents = self._in.get(node, [])
+            height[node] = max((height[edge.dependent] + 1 for edge in dependents), default=0)
+            above[node] = sum(
+                above[edge.dependent] for edge in dependents
+                if height[edge.dependent] == height[node] - 1
+            ) or 1
+        chains = sum(below[node] for node in self.nodes if levels[node] == depth - 1)
+        found = []
+        for edge in self.edges:
+            if (
+                edge.explicit
+                and levels[edge.dependency] + 1 + height[edge.dependent] == depth - 1
+                and below[edge.dependency] * above[edge.dependent] == chains
+            ):
+                found.append((edge, max(self.levels(skip=edge).values(), default=-1) + 1))
+        return sorted(found)
+
+
+def _documents(path: Path) -> Iterator[dict[str, Any]]:
+    try:
+        for doc in yaml.safe_load_all(path.read_text()):
+            if isinstance(doc, dict):
+                yield doc
+    except yaml.YAMLError as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+def _is_flux(doc: dict[str, Any]) -> bool:
+    group = str(doc.get("apiVersion", "")).rpartition("/")[0]
+    return GROUPS.get(doc.get("kind", "")) == group
+
+
+# The deepest directory in dirs containing path, if any.
+def _innermost(path: Path, dirs: dict[Path, Any]) -> Path | None:
+    return next((parent for parent in path.parents if parent in dirs), None)
+
+
+def load(kubernetes_dir: Path) -> Graph:
+    kubernetes_dir = kubernetes_dir.resolve()
+    # Flux paths are relative to the repository root, the parent of the
+    # rendered kubernetes/ directory.
+    repo_root = kubernetes_dir.parent
+    files = sorted(
+        path for path in kubernetes_dir.rglob("*.yaml")
+        if path.is_file() and not path.match(SOPS_PATTERN)
+    )
+    namespaces: dict[Path, str] = {}
+    objects: list[tuple[Path, dict[str, Any]]] = []
+    for path in files:
+        for doc in _documents(path):
+            if path.name == KUSTOMIZE_CONFIG and doc.get("namespace"):
+                namespaces[path.parent] = doc["namespace"]
+            elif _is_flux(doc):
+                objects.append((path, doc))
+
+    # Directory applied by each Kustomization -> its index in objects.
+    applies: dict[Path, int] = {}
+    for i, (_, doc) in enumerate(objects):
+        if doc["kind"] == KUSTOMIZATION and doc.get("spec", {}).get("path"):
+            applies[(repo_root / doc["spec"]["path"]).resolve()] = i
+    applier: dict[int, int] = {}
+    for i, (path, _) in enumerate(objects):
+        directory = _innermost(path, applies)
+        if directory is not None and applies[directory] != i:
+            applier[i] = applies[directory]
+
+    resolved: dict[int, Node] = {}
+
+    def node(i: int, seen: frozenset[int] = frozenset()) -> Node:
+        if i in resolved:
+            return resolved[i]
+        path, doc = objects[i]
+        parent = applier.get(i) if applier.get(i) not in seen else None
+        parent_doc = objects[parent][1] if parent is not None else {}
+        root = next((d for d, j in applies.items() if j == parent), None)
+        # kustomize only applies namespaces from kustomization.yaml files
+        # inside the tree the Kustomization builds.
+        scoped = {d: ns for d, ns in namespaces.items() if root is None or d.is_relative_to(root)}
+        kustomize_dir = _innermost(path, scoped)
+        namespace = (
+            parent_doc.get("spec", {}).get("targetNamespace")
+            or (scoped[kustomize_dir] if kustomize_dir else None)
+            or doc.get("metadata", {}).get("namespace")
+            or (node(parent, seen | {i}).namespace if parent is not None else "default")
+        )
+        resolved[i] = Node(doc["kind"], namespace, doc["metadata"]["name"])
+        return resolved[i]
+
+    graph = Graph()
+    for i, (_, doc) in enumerate(objects):
+        graph.nodes[node(i)] = doc.get("spec", {})
+    for i, (_, doc) in enumerate(objects):
+        dependent = node(i)
+        for dep in doc.get("spec", {}).get("dependsOn") or []:
+            graph.add_edge(Edge(dependent, Node(dependent.kind, dep.get("namespace") or dependent.namespace, dep["name"])))
+        if i in applier:
+            graph.add_edge(Edge(dependent, node(applier[i]), explicit=False))
+    return graph
+
+
+# The gate only needs errors and the levels; details adds the warnings and
+# the critical edges for --report and --strict.
+def analyze(graph: Graph, details: bool = False) -> dict[str, Any]:
+    cycles = graph.cycles()
+    report: dict[str, Any] = {
+        "nodes": len(graph.nodes),
+        "edges": sum(edge.explicit for edge in graph.edges),
+        "errors": [
+            f"{edge.dependent} depends on {edge.dependency}, which is not rendered"
+            for edge in graph.dangling
+        ] + [
+            "dependency cycle: " + " -> ".join(str(node) for node in [*cycle, cycle[0]])
+            for cycle in cycles
+        ],
+        "warnings": [],
+    }
+    if cycles:
+        return report
+    levels = graph.levels()
+    report["depth"] = max(levels.values(), default=-1) + 1
+    report["levels"] = [
+        sorted(str(node) for node, level in levels.items() if level == depth)
+        for depth in range(report["depth"])
+    ]
+    report["critical_path"] = [str(node) for node in graph.critical_path(levels)]
+    if not details:
+        return report
+    report["warnings"] += [
+        f"{edge.dependent} -> {edge.dependency} is redundant: already implied by its other dependencies"
+        for edge in graph.redundant(levels)
+    ]
+    report["warnings"] += [
+        f"{edge.dependent} -> {edge.dependency} is weak: {edge.dependency.name} neither waits nor has health checks"
+        for edge in graph.weak()
+    ]
+    report["critical_edges"] = [
+        {"dependent": str(edge.dependent), "dependency": str(edge.dependency), "depth_without": depth}
+        for edge, depth in graph.critical(levels)
+    ]
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    for depth, members in enumerate(report["levels"]):
+        print(f"=== Level {depth}: {len(members)} ===")
+        for member in members:
+            print(f"  {member}")
+    print("=== Critical path ===")
+    print("  " + " -> ".join(report["critical_path"]))
+    if report.get("critical_edges"):
+        print("=== Edges serializing the cold start ===")
+        for edge in report["critical_edges"]:
+            print(f"  {edge['dependent']} -> {edge['dependency']}: depth {report['depth']} -> {edge['depth_without']} without it")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kubernetes_dir", type=Path)
+    parser.add_argument("--report", action="store_true", help="print every level and the critical path")
+    parser.add_argument("--json", type=Path, help="also write the analysis to FILE")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args()
+
+    if not args.kubernetes_dir.is_dir():
+        print(f"{args.kubernetes_dir}: directory not found", file=sys.stderr)
+        return 1
+    try:
+        report = analyze(load(args.kubernetes_dir), details=args.report or args.strict)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    if args.report and "levels" in report:
+        print_report(report)
+    if "depth" in report:
+        widest = max((len(members) for members in report["levels"]), default=0)
+        print(
+            f"{report['nodes']} objects, {report['edges']} dependsOn edges, "
+            f"depth {report['depth']}, widest level {widest}",
+            file=sys.stderr,
+        )
+    for warning in report["warnings"]:
+        print(f"warning: {warning}", file=sys.stderr)
+    for error in report["errors"]:
+        print(f"error: {error}", file=sys.stderr)
+    if report["errors"] or (args.strict and report["warnings"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Build a container image inventory from the rendered manifests.
+
+Usage: uv run --locked --no-dev template/scripts/images.py <repo-root> [--manifests FILE...] [--cache-charts FILE] [--output FILE] [--json FILE]
+
+Walks the rendered kubernetes/ and bootstrap/helmfile/ trees offline and
+collects every image reference it can resolve:
+
+  - `image:` and `imageRepository:` strings anywhere (pod specs,
+    HelmRelease values, Envoy Gateway's EnvoyProxy),
+  - `image:` maps in HelmRelease values ({registry, repository, tag, digest}),
+  - OCIRepository sources, recorded separately as chart artifacts.
+
+Chart defaults are invisible offline, so --manifests adds YAML streams such
+as `helmfile template` output ('-' reads stdin); its references pin
+repositories the rendered values leave without a tag. Without --manifests,
+the chart stream cached by `just template images` is used when present.
+--cache-charts FILE stores such a stream ('-' reads stdin) in that cache,
+stamped with the chart artifacts it was rendered from; a cache stamped for
+other chart versions is stale and ignored. Chart artifacts without any
+chart stream leave the chart default images out, which is reported.
+
+References are normalized (docker.io/library/ for bare names) and
+deduplicated; a digest wins over a tag for the same repository and tag.
+Repositories that stay without a tag or digest are reported as unpinned
+and left out.
+
+The image list (default: talos/images.txt) feeds the Talos image cache and
+the pre-pull recipe in talos/mod.just; --json writes the full inventory.
+"""
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+
+import yaml
+
+SOPS_PATTERN = "*.sops.*"
+CHART_CACHE = Path(__file__).parents[1] / ".cache" / "charts.yaml"
+DEFAULT_REGISTRY = "docker.io"
+DIGEST = re.compile(r"^sha256:[0-9a-f]{64}$")
+CHART_STAMP = "# chart artifacts: "
+# Keys holding an image reference or map, compared lowercased by suffix.
+IMAGE_KEYS = ("image", "imagerepository")
+HEADER = "# Generated by template/scripts/images.py from the rendered manifests; do not edit.\n"
+
+
+class Image(NamedTuple):
+    repository: str
+    tag: str | None = None
+    digest: str | None = None
+
+    @property
+    def pinned(self) -> bool:
+        return self.tag is not None or self.digest is not None
+
+    def __str__(self) -> str:
+        ref = self.repository
+        if self.tag:
+            ref += f":{self.tag}"
+        if self.digest:
+            ref += f"@{self.digest}"
+        return ref
+
+
+# Fully qualified repository: docker.io for registry-less names and
+# library/ for official Docker Hub images, as containerd resolves them.
+def normalize(repository: str) -> str:
+    first, _, rest = repository.partition("/")
+    if not rest or ("." not in first and ":" not in first and first != "localhost"):
+        repository = f"{DEFAULT_REGISTRY}/{repository}"
+    registry, _, path = repository.partition("/")
+    if registry == DEFAULT_REGISTRY and "/" not in path:
+        repository = f"{registry}/library/{path}"
+    return repository
+
+
+def parse(ref: str) -> Image | None:
+    ref = ref.strip()
+    if not ref or any(c in ref for c in " {}$"):
+        return None
+    name, _, digest = ref.partition("@")
+    # A colon after the last slash separates the tag; one before it is a
+    # registry port.
+    repository, tag = name, None
+    if ":" in name.rsplit("/", 1)[-1]:
+        repository, tag = name.rsplit(":", 1)
+    if digest and not DIGEST.match(digest):
+        return None
+    return Image(normalize(repository), tag or None, digest or None)
+
+
+# An image map as charts commonly spell it.
+def _from_map(value: dict[str, Any]) -> Image | None:
+    repository = value.get("repository") or value.get("name")
+    if not isinstance(repository, str):
+        return None
+    registry = value.get("registry")
+    if isinstance(registry, str) and registry and not repository.startswith(f"{registry}/"):
+        repository = f"{registry}/{repository}"
+    tag, digest = value.get("tag"), value.get("digest")
+    if isinstance(tag, str) and "@" in tag:
+        tag, digest = tag.split("@", 1)
+    image = parse(repository)
+    if image is None:
+        return None
+    return Image(
+        image.repository,
+        str(tag) if tag not in (None, "") else image.tag,
+        digest if isinstance(digest, str) and DIGEST.match(digest) else image.digest,
+    )
+
+
+def find_images(value: Any, key: str = "") -> Iterator[Image]:
+    if isinstance(value, dict):
+        if key.lower().endswith(IMAGE_KEYS) and (image := _from_map(value)):
+            yield image
+            return
+        for child_key, child in value.items():
+            yield from find_images(child, str(child_key))
+    elif isinstance(value, list):
+        for child in value:
+            yield from find_images(child, key)
+    elif isinstance(value, str) and key.lower().endswith(IMAGE_KEYS) and (image := parse(value)):
+        yield image
+
+
+def _artifact(doc: dict[str, Any]) -> Image | None:
+    spec = doc.get("spec", {})
+    url = spec.get("url", "")
+    if not isinstance(url, str) or not url.startswith("oci://"):
+        return None
+    ref = spec.get("ref", {}) or {}
+    return Image(url.removeprefix("oci://"), ref.get("tag") or ref.get("semver"), ref.get("digest"))
+
+
+def documents(paths: Iterable[Path]) -> Iterator[dict[str, Any]]:
+    for path in paths:
+        text = sys.stdin.read() if str(path) == "-" else path.read_text()
+        try:
+            for doc in yaml.safe_load_all(text):
+                if isinstance(doc, dict):
+                    yield doc
+        except yaml.YAMLError:
+            # Go templates such as values.yaml.gotmpl are not YAML.
+            continue
+
+
+def rendered_files(root: Path) -> list[Path]:
+    files: list[Path] = []
+    for directory in (root / "kubernetes", root / "bootstrap" / "helmfile"):
+        files += (
+            path for path in directory.rglob("*.yaml")
+            if path.is_file() and not path.match(SOPS_PATTERN)
+        )
+    return sorted(files)
+
+
+class Inventory:
+    def __init__(self):
+        self.images: set[Image] = set()
+        self.artifacts: set[Image] = set()
+
+    def add(self, docs: Iterable[dict[str, Any]]) -> None:
+        for doc in docs:
+            if doc.get("kind") == "OCIRepository":
+                if artifact := _artifact(doc):
+                    self.artifacts.add(artifact)
+                continue
+            self.images.update(find_images(doc))
+
+    # Pinned references, one per repository and tag: a digest replaces the
+    # bare tag, and repositories pinned anywhere drop their unpinned refs.
+    def resolved(self) -> list[Image]:
+        digests = {(image.repository, image.tag) for image in self.images if image.digest}
+        return sorted(
+            (
+                image for image in self.images
+                if image.pinned and (image.digest or (image.repository, image.tag) not in digests)
+            ),
+            key=str,
+        )
+
+    def unpinned(self) -> list[str]:
+        pinned = {image.repository for image in self.images if image.pinned}
+        return sorted({image.repository for image in self.images if image.repository not in pinned})
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "images": [str(image) for image in self.resolved()],
+            "unpinned": self.unpinned(),
+            "artifacts": sorted(str(artifact) for artifact in self.artifacts),
+        }
+
+
+# The chart versions a cached chart stream was rendered from.
+def chart_stamp(artifacts: Iterable[Image]) -> str:
+    return hashlib.sha256("\n".join(sorted(map(str, artifacts))).encode()).hexdigest()
+
+
+def cached_stamp() -> str | None:
+    if not CHART_CACHE.is_file():
+        return None
+    with CHART_CACHE.open() as f:
+        first = f.readline()
+    return first.removeprefix(CHART_STAMP).strip() if first.startswith(CHART_STAMP) else ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--manifests", type=Path, nargs="*", help="extra YAML streams, - for stdin")
+    parser.add_argument("--cache-charts", type=Path, metavar="FILE", help="store a chart stream as the cache, - for stdin")
+    parser.add_argument("--output", type=Path, help="image list (default: <root>/talos/images.txt)")
+    parser.add_argument("--json", type=Path, help="also write the full inventory to FILE")
+    args = parser.parse_args()
+
+    if not (args.root / "kubernetes").is_dir():
+        print(f"{args.root / 'kubernetes'}: directory not found", file=sys.stderr)
+        return 1
+    inventory = Inventory()
+    inventory.add(documents(rendered_files(args.root)))
+    stamp = chart_stamp(inventory.artifacts)
+    if args.cache_charts is not None:
+        stream = sys.stdin.read() if str(args.cache_charts) == "-" else args.cache_charts.read_text()
+        CHART_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        CHART_CACHE.write_text(f"{CHART_STAMP}{stamp}\n{stream}")
+    manifests = args.manifests
+    if manifests is None:
+        manifests = []
+        if (cached := cached_stamp()) == stamp:
+            manifests = [CHART_CACHE]
+        elif cached is not None:
+            print(
+                f"{CHART_CACHE}: rendered from other chart versions, ignored; run `just template images`",
+                file=sys.stderr,
+            )
+    if inventory.artifacts and not manifests:
+        print(
+            f"{len(inventory.artifacts)} chart artifacts but no chart stream: "
+            "chart default images are missing; run `just template images` or pass --manifests",
+            file=sys.stderr,
+        )
+    inventory.add(documents(manifests))
+    report = inventory.report()
+
+    output = args.output or args.root / "talos" / "images.txt"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    content = HEADER + "".join(f"{image}\n" for image in report["images"])
+    # Leave the file alone when nothing changed, like the render does.
+    if not output.is_file() or output.read_text() != content:
+        output.write_text(content)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    print(
+        f"{len(report['images'])} images, {len(report['artifacts'])} chart artifacts, "
+        f"{len(report['unpinned'])} unpinned repositories written to {output}",
+        file=sys.stderr,
+    )
+    for repository in report["unpinned"]:
+        print(f"  unpinned: {repository} (tag comes from the chart; see --manifests)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
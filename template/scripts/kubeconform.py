@@ -0,0 +1,270 @@
+"""Validate rendered Kubernetes manifests with kustomize and kubeconform.
+
+Usage: uv run --locked --no-dev template/scripts/kubeconform.py <kubernetes-dir> [--jobs N] [--offline] [--fail-on-gaps] [--schemas DIR] [--manifest [FILE]]
+
+Every standalone manifest in <kubernetes-dir>/flux and every directory
+holding a kustomization.yaml under flux/ and apps/ is built and validated
+concurrently, at most --jobs (default: CPU count) at a time. Output is
+printed in the same order as a serial run, every failure is collected
+rather than stopping at the first, and per-directory timings go to stderr.
+Exits 1 when any build or validation failed.
+
+Schemas in the local store (see schemas.py) are tried before the remote
+schema locations; with --offline the remote locations are dropped.
+Resource types no location has a schema for are not validated, but they
+are listed as gaps at the end rather than skipped silently: the ones
+kubeconform reports skipped and, offline, the ones the store cannot
+resolve. --fail-on-gaps makes any gap fail the run.
+
+With --manifest, only manifests and kustomizations touched since the last
+successful run (per the render manifest, see render_manifest.py) are
+validated; a change no job covers, such as a shared component, still
+validates everything, and so does a change to the stage key: the schema
+store index, the schema locations and flags, the kustomize and kubeconform
+versions, or a file under <kubernetes-dir> that no template renders. A
+successful run marks the stage done.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from render_manifest import MANIFEST_FILE, REPO_ROOT, Manifest
+from schemas import STORE_DIR, SchemaStore
+
+MANIFEST_STAGE = "validate-kubernetes"
+KUSTOMIZE_ARGS = ["--load-restrictor=LoadRestrictionsNone"]
+KUSTOMIZE_CONFIG = "kustomization.yaml"
+SKIP_KINDS = ["Gateway", "HTTPRoute", "Secret"]
+REMOTE_SCHEMA_LOCATIONS = [
+    "default",
+    "https://k8s-schemas.home-operations.com/{{.Group}}/{{.ResourceKind}}_{{.ResourceAPIVersion}}.json",
+]
+
+DOCUMENT_SEPARATOR = re.compile(rb"^---[ \t]*$", re.MULTILINE)
+API_VERSION = re.compile(rb"""^apiVersion:[ \t]*['"]?([^\s'"]+)""", re.MULTILINE)
+KIND = re.compile(rb"""^kind:[ \t]*['"]?([^\s'"]+)""", re.MULTILINE)
+# kubeconform -verbose: "<file> - <Kind> <name> skipped".
+SKIPPED = re.compile(rb"^.* - (\S+) \S+ skipped$", re.MULTILINE)
+
+
+class Job(NamedTuple):
+    # Section header printed before this job's output, if any.
+    header: str | None
+    # None for a header-only entry.
+    path: Path | None = None
+    kustomize: bool = False
+
+
+class Result(NamedTuple):
+    job: Job
+    ok: bool
+    stdout: bytes
+    stderr: bytes
+    seconds: float
+    # group/kind/version keys the schema store could not resolve.
+    gaps: frozenset[str] = frozenset()
+    # group/kind/version keys kubeconform skipped for want of a schema.
+    skipped: frozenset[str] = frozenset()
+
+
+def kubeconform_args(locations: list[str]) -> list[str]:
+    args = ["-strict", "-ignore-missing-schemas", "-skip", ",".join(SKIP_KINDS)]
+    for location in locations:
+        args += ["-schema-location", location]
+    return [*args, "-verbose"]
+
+
+# (group, kind, version) of every document in a YAML stream. kustomize
+# output keeps apiVersion and kind at column 0, so no YAML parser is needed.
+def resource_types(manifests: bytes) -> set[tuple[str, str, str]]:
+    types = set()
+    for doc in DOCUMENT_SEPARATOR.split(manifests):
+        api_version = API_VERSION.search(doc)
+        kind = KIND.search(doc)
+        if api_version and kind:
+            group, _, version = api_version[1].decode().rpartition("/")
+            types.add((group, kind[1].decode(), version))
+    return types
+
+
+# Link the schemas of every resource type in manifests into the store's
+# view and return the types it has no schema for.
+def resolve(store: SchemaStore | None, manifests: bytes) -> frozenset[str]:
+    if store is None:
+        return frozenset()
+    return frozenset(
+        SchemaStore.key(group, kind, version)
+        for group, kind, version in resource_types(manifests)
+        if kind not in SKIP_KINDS and not store.resolve(group, kind, version)
+    )
+
+
+# Resource types in manifests that kubeconform skipped for want of a
+# schema; kinds skipped on purpose (SKIP_KINDS) are not gaps.
+def skipped(manifests: bytes, output: bytes) -> frozenset[str]:
+    kinds = {kind.decode() for kind in SKIPPED.findall(output)} - set(SKIP_KINDS)
+    return frozenset(
+        SchemaStore.key(group, kind, version)
+        for group, kind, version in resource_types(manifests)
+        if kind in kinds
+    )
+
+
+# Jobs in the order the shell script used to run them, headers included.
+def jobs(kubernetes_dir: Path) -> list[Job]:
+    flux = kubernetes_dir / "flux"
+    apps = kubernetes_dir / "apps"
+    found = [Job(f"=== Validating standalone manifests in {flux} ===")]
+    found += [Job(None, path) for path in sorted(flux.glob("*.yaml"))]
+    for root in (flux, apps):
+        found.append(Job(f"=== Validating kustomizations in {root} ==="))
+        for config in sorted(root.rglob(KUSTOMIZE_CONFIG)):
+            directory = config.parent
+            found.append(Job(
+                f"=== Validating kustomizations in {directory}/ ===",
+                directory,
+                kustomize=True,
+            ))
+    return found
+
+
+# The jobs covering any of the dirty paths (relative to kubernetes_dir),
+# headers included; every job when some path is covered by none.
+def select(found: list[Job], dirty: list[Path]) -> list[Job]:
+    def covers(job: Job, path: Path) -> bool:
+        return job.path is not None and (path.is_relative_to(job.path) if job.kustomize else path == job.path)
+
+    if any(not any(covers(job, path) for job in found) for path in dirty):
+        return found
+    selected = [job for job in found if job.path is None or any(covers(job, path) for path in dirty)]
+    # Drop section headers left without jobs.
+    return [
+        job for i, job in enumerate(selected)
+        if job.path is not None or (i + 1 < len(selected) and selected[i + 1].path is not None)
+    ]
+
+
+def run(job: Job, args: list[str], store: SchemaStore | None = None) -> Result:
+    start = time.perf_counter()
+    if job.path is None:
+        return Result(job, True, b"", b"", 0.0)
+    if job.kustomize:
+        build = subprocess.run(
+            ["kustomize", "build", str(job.path), *KUSTOMIZE_ARGS],
+            capture_output=True,
+        )
+        if build.returncode != 0:
+            return Result(job, False, b"", build.stderr, time.perf_counter() - start)
+        manifests = build.stdout
+        gaps = resolve(store, manifests)
+        proc = subprocess.run(["kubeconform", *args], input=manifests, capture_output=True)
+        stderr = build.stderr + proc.stderr
+    else:
+        manifests = job.path.read_bytes()
+        gaps = resolve(store, manifests)
+        proc = subprocess.run(["kubeconform", *args, str(job.path)], capture_output=True)
+        stderr = proc.stderr
+    seconds = time.perf_counter() - start
+    return Result(job, proc.returncode == 0, proc.stdout, stderr, seconds, gaps, skipped(manifests, proc.stdout))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kubernetes_dir", nargs="?", default="")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--offline", action="store_true", help="never fetch schemas over the network")
+    parser.add_argument("--fail-on-gaps", action="store_true", help="fail when a resource type has no schema")
+    parser.add_argument("--schemas", type=Path, default=STORE_DIR, help="schema store directory")
+    parser.add_argument(
+        "--manifest", type=Path, nargs="?", const=MANIFEST_FILE,
+        help="only validate what changed since the last successful run",
+    )
+    args = parser.parse_args()
+    if not args.kubernetes_dir:
+        print("Kubernetes location not specified")
+        return 1
+
+    store = SchemaStore(args.schemas)
+    locations = [] if args.offline else list(REMOTE_SCHEMA_LOCATIONS)
+    if store.index:
+        locations.insert(0, store.location)
+    elif args.offline:
+        print(f"schema store {args.schemas} is empty; see schemas.py", file=sys.stderr)
+        return 1
+    # The store links schemas into its view on demand, so it is consulted
+    # whenever it has content. Online, the remote locations may still have
+    # what it lacks, so only kubeconform's own skips count as gaps there.
+    lookup_store = store if store.index else None
+    command = kubeconform_args(locations)
+
+    kubernetes_dir = Path(args.kubernetes_dir)
+    found = jobs(kubernetes_dir)
+    manifest = None
+    if args.manifest and kubernetes_dir.resolve().is_relative_to(REPO_ROOT):
+        manifest = Manifest(args.manifest)
+        prefix = kubernetes_dir.resolve().relative_to(REPO_ROOT)
+        key = manifest.key(
+            MANIFEST_STAGE, [f"{prefix.as_posix()}/"],
+            [*command, f"--fail-on-gaps={args.fail_on_gaps}", json.dumps(store.index, sort_keys=True)],
+        )
+        pending = manifest.pending(MANIFEST_STAGE, [f"{prefix.as_posix()}/"], key)
+        if pending is not None:
+            dirty = [kubernetes_dir / Path(path).relative_to(prefix) for path in pending]
+            selected = select(found, dirty)
+            skipped = sum(job.path is not None for job in found) - sum(job.path is not None for job in selected)
+            if skipped:
+                print(f"=== {skipped} unchanged since the last validation, skipped ===", file=sys.stderr)
+            found = selected
+
+    results: list[Result] = []
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        # Each worker thread only waits on its kustomize/kubeconform child
+        # processes, so the pool bounds the number of concurrent builds.
+        futures = [
+            pool.submit(run, job, command, lookup_store)
+            for job in found
+        ]
+        for future in futures:
+            result = future.result()
+            if result.job.header:
+                print(result.job.header, flush=True)
+            sys.stdout.buffer.write(result.stdout)
+            sys.stdout.flush()
+            sys.stderr.buffer.write(result.stderr)
+            sys.stderr.flush()
+            results.append(result)
+
+    timed = sorted((r for r in results if r.job.path is not None), key=lambda r: r.seconds, reverse=True)
+    if timed:
+        print("=== Timings ===", file=sys.stderr)
+        for result in timed:
+            print(f"{result.seconds:8.2f}s  {result.job.path}", file=sys.stderr)
+    gaps = sorted(set().union(*(r.skipped | (r.gaps if args.offline else frozenset()) for r in results)))
+    if gaps:
+        print(f"=== {len(gaps)} resource types without a schema, not validated ===", file=sys.stderr)
+        for gap in gaps:
+            print(f"  {gap}", file=sys.stderr)
+    failed = [r.job.path for r in results if not r.ok]
+    if failed:
+        print(f"=== {len(failed)} failed ===", file=sys.stderr)
+        for path in failed:
+            print(f"  {path}", file=sys.stderr)
+        return 1
+    if gaps and args.fail_on_gaps:
+        return 1
+    if manifest is not None:
+        manifest.clear(MANIFEST_STAGE, key)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
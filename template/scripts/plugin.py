@@ -1,14 +1,77 @@
 from pathlib import Path
 from typing import Any
 
+import atexit
 import base64
+import copy
+import functools
+import inspect
+import itertools
+import jinja2
 import json
 import makejinja
+import math
+import os
 import re
+import render_cache
+import render_profile
+import threading
 import validate
+import yaml
+import zlib
+
+
+# Memoizes functions that read a file_path, keyed by their arguments and the
+# file's (mtime, size): templates calling the same function, and functions
+# sharing a reader, read and parse each file once per render, while an edit
+# between calls invalidates the entry. Errors are never cached.
+class FileCache:
+    def __init__(self):
+        self._entries: dict[tuple[Any, ...], tuple[tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __call__(self, func):
+        sig = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                st = os.stat(bound.arguments['file_path'])
+            except OSError:
+                return func(*args, **kwargs)
+            key = (func.__name__, *bound.arguments.values())
+            stamp = (st.st_mtime_ns, st.st_size)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+            value = func(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = (stamp, value)
+            return value
+
+        return wrapper
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+file_cache = FileCache()
 
 
 # Return the stripped contents of file_path, rejecting a missing or empty file
+@file_cache
 def _read_stripped(file_path: str) -> str:
     try:
         content = Path(file_path).read_text().strip()
@@ -19,15 +82,22 @@ def _read_stripped(file_path: str) -> str:
     return content
 
 
-# Return the parsed contents of a JSON file
-def _read_json(file_path: str) -> dict[str, Any]:
+# Return the parsed contents of a JSON file, shared by every caller
+@file_cache
+def _load_json(file_path: str) -> dict[str, Any]:
     try:
         return json.loads(_read_stripped(file_path))
     except json.JSONDecodeError:
         raise ValueError(f"Could not decode JSON file: {file_path}") from None
 
 
+# Return a private copy of a JSON file's contents that callers may modify
+def _read_json(file_path: str) -> dict[str, Any]:
+    return copy.deepcopy(_load_json(file_path))
+
+
 # Return the age public or private key from age.key
+@file_cache
 def age_key(key_type: str, file_path: str = 'age.key') -> str:
     file_content = _read_stripped(file_path)
     if key_type == 'public':
@@ -47,6 +117,7 @@ def age_key(key_type: str, file_path: str = 'age.key') -> str:
 
 
 # Return cloudflare tunnel fields from cloudflare-tunnel.json
+@file_cache
 def cloudflare_tunnel_id(file_path: str = 'cloudflare-tunnel.json') -> str:
     data = _read_json(file_path)
     tunnel_id = data.get("TunnelID")
@@ -58,6 +129,7 @@ def cloudflare_tunnel_id(file_path: str = 'cloudflare-tunnel.json') -> str:
 
 
 # Return cloudflare tunnel fields from cloudflare-tunnel.json in TUNNEL_TOKEN format
+@file_cache
 def cloudflare_tunnel_secret(file_path: str = 'cloudflare-tunnel.json') -> str:
     data = _read_json(file_path)
     for field in ("AccountTag", "TunnelID", "TunnelSecret"):
@@ -75,11 +147,13 @@ def cloudflare_tunnel_secret(file_path: str = 'cloudflare-tunnel.json') -> str:
 
 
 # Return the Flux deploy key from deploy.key
+@file_cache
 def deploy_key(file_path: str = 'deploy.key') -> str:
     return _read_stripped(file_path)
 
 
 # Return the Flux webhook token from flux-webhook-token.txt
+@file_cache
 def webhook_token(file_path: str = 'flux-webhook-token.txt') -> str:
     return _read_stripped(file_path)
 
@@ -108,6 +182,135 @@ KNOWN_HOSTS = {
 }
 
 
+# Minimal helmfile `needs` for the enabled bootstrap releases and the waves
+# helmfile installs them in. A disabled release is bypassed (its dependents
+# wait on its own prerequisites instead), then every need already implied
+# through another one is dropped, so each release lists only what it
+# directly waits on.
+def bootstrap_plan(prerequisites: dict[str, list[str]], enabled: set[str]) -> dict[str, Any]:
+    def effective(name: str) -> set[str]:
+        needs = set()
+        for need in prerequisites[name]:
+            needs |= {need} if need in enabled else effective(need)
+        return needs
+
+    def ancestors(name: str) -> set[str]:
+        found = set()
+        for need in needs[name]:
+            found |= {need} | ancestors(need)
+        return found
+
+    needs = {name: effective(name) for name in prerequisites if name in enabled}
+    minimal = {
+        name: sorted(n for n in direct if not any(n in ancestors(other) for other in direct - {n}))
+        for name, direct in needs.items()
+    }
+    def wave(name: str) -> int:
+        return max((wave(n) + 1 for n in minimal[name]), default=0)
+
+    releases = [
+        {
+            'name': name,
+            'namespace': validate.BOOTSTRAP_RELEASES[name][0],
+            'needs': [f'{validate.BOOTSTRAP_RELEASES[n][0]}/{n}' for n in minimal[name]],
+            'wave': wave(name),
+        }
+        for name in needs
+    ]
+    return {
+        'releases': releases,
+        'waves': [
+            [release['name'] for release in releases if release['wave'] == i]
+            for i in range(max((release['wave'] for release in releases), default=-1) + 1)
+        ],
+    }
+
+
+# Batches for a rolling Talos upgrade: controllers one at a time so etcd
+# keeps quorum, then workers worker_batch at a time. With spread_zones,
+# workers are interleaved across zones before batching so each batch takes
+# as few nodes as possible from any one zone.
+def upgrade_plan(nodes: list[dict[str, Any]], upgrade: dict[str, Any]) -> list[dict[str, Any]]:
+    def entry(node: dict[str, Any]) -> dict[str, Any]:
+        return {'name': node['name'], 'address': node['address'], 'zone': node['zone']}
+
+    batches = [
+        {'role': 'controller', 'nodes': [entry(node)]}
+        for node in nodes if node['controller']
+    ]
+    workers = [node for node in nodes if not node['controller']]
+    size = upgrade['worker_batch']
+    if isinstance(size, str):
+        size = max(1, len(workers) * int(size.removesuffix('%')) // 100)
+    if upgrade['spread_zones']:
+        zones: dict[str | None, list[dict[str, Any]]] = {}
+        for node in workers:
+            zones.setdefault(node['zone'], []).append(node)
+        workers = [
+            node
+            for row in itertools.zip_longest(*zones.values())
+            for node in row if node is not None
+        ]
+    batches += [
+        {'role': 'worker', 'nodes': [entry(node) for node in workers[i:i + size]]}
+        for i in range(0, len(workers), size)
+    ]
+    return batches
+
+
+# Where Flux Kustomizations live, one ks.yaml per app directory: the
+# template's own apps and whatever else the repository already holds.
+# Relative to the repository root, wherever makejinja runs from.
+REPO_ROOT = Path(__file__).parents[2]
+APP_DIRS = ['template/config/kubernetes/apps', 'kubernetes/apps']
+SHARD_KEY = 'sharding.fluxcd.io/key'
+
+
+# The Kustomization names each ks.yaml declares; the shard patches match
+# on metadata.name, which need not be the directory name. Template
+# directives are YAML comments, so ks.yaml.j2 parses as it stands.
+def flux_apps(dirs: list[str] = APP_DIRS) -> list[str]:
+    apps = set()
+    for root in (REPO_ROOT / d for d in dirs):
+        for path in [*root.glob('*/*/ks.yaml'), *root.glob('*/*/ks.yaml.j2')]:
+            # flux-system installs the controllers, so it stays unsharded.
+            if path.parts[-3] == 'flux-system':
+                continue
+            try:
+                docs = list(yaml.safe_load_all(path.read_text()))
+            except yaml.YAMLError as e:
+                raise RuntimeError(f'{path}: {e}') from None
+            apps.update(
+                doc['metadata']['name'] for doc in docs
+                if isinstance(doc, dict) and doc.get('kind') == 'Kustomization'
+                and isinstance(doc.get('metadata'), dict) and doc['metadata'].get('name')
+            )
+    return sorted(apps)
+
+
+# Flux controller sizing from the number of apps and nodes, unless set in
+# [flux]: a worker per four apps (10 to 50, at most 10 per node), 1Gi per
+# 20 workers, and one more shard per 100 apps. Apps are assigned to the
+# main controllers or a shard by a stable hash of their name, so adding an
+# app never moves the others.
+def flux_plan(flux: dict[str, Any], apps: list[str], node_count: int) -> dict[str, Any]:
+    concurrency = flux['concurrency'] or max(10, min(len(apps) // 4, 10 * node_count, 50))
+    shards = flux['shards'] if flux['shards'] is not None else len(apps) // 100
+    names = [f'shard{i}' for i in range(1, shards + 1)]
+    assignments: dict[str, list[str]] = {name: [] for name in names}
+    for app in apps:
+        bucket = zlib.crc32(app.encode()) % (shards + 1)
+        if bucket:
+            assignments[names[bucket - 1]].append(app)
+    return {
+        'concurrency': concurrency,
+        'memory': flux['memory'] or f'{math.ceil(concurrency / 20)}Gi',
+        'shards': names,
+        'shard_key': SHARD_KEY,
+        'assignments': assignments,
+    }
+
+
 # makejinja adds import_paths (this directory) to sys.path, and both
 # makejinja and pydantic come from the uv project environment, so the
 # validator runs in-process.
@@ -119,11 +322,25 @@ def validate_config() -> dict[str, Any]:
 
 
 class Plugin(makejinja.plugin.Plugin):
-    def __init__(self, data: dict[str, Any]):
+    def __init__(self, env: jinja2.Environment, data: dict[str, Any], config: makejinja.config.Config):
+        self._env = env
         self._data = data
+        self._config = config
+        # RENDER_PROFILE=1 times data(), each template and each function call.
+        self._profile = render_profile.RenderProfile() if render_profile.enabled() else None
+        if self._profile is not None:
+            self._profile.attach(env)
+            atexit.register(self._profile.save)
 
 
     def data(self) -> makejinja.plugin.Data:
+        if self._profile is not None:
+            with self._profile.phase('data'):
+                return self._load_data()
+        return self._load_data()
+
+
+    def _load_data(self) -> makejinja.plugin.Data:
         data = validate_config()
         if (
             data['ingress']['mode'] == 'cloudflare-tunnel'
@@ -137,14 +354,44 @@ class Plugin(makejinja.plugin.Plugin):
         repository['known_hosts'] = '\n'.join(
             [*KNOWN_HOSTS.values(), repository['known_hosts']]
         ).strip()
+        enabled = {name for name in validate.BOOTSTRAP_RELEASES if name != 'spegel' or data['spegel']['enabled']}
+        data['bootstrap'] |= bootstrap_plan(
+            validate.Bootstrap.model_validate(data['bootstrap']).prerequisites(), enabled
+        )
+        data['upgrade']['batches'] = upgrade_plan(data['nodes'], data['upgrade'])
+        data['flux'] |= flux_plan(data['flux'], flux_apps(), len(data['nodes']))
         return data
 
 
     def functions(self) -> makejinja.plugin.Functions:
-        return [
+        functions = [
             age_key,
             cloudflare_tunnel_id,
             cloudflare_tunnel_secret,
             deploy_key,
             webhook_token
         ]
+        if self._profile is not None:
+            return [self._profile.wrap(func) for func in functions]
+        return functions
+
+
+    # Skip templates whose inputs are unchanged since the last render; see
+    # render_cache.py for what goes into the key.
+    def path_filters(self) -> makejinja.plugin.PathFilters:
+        if not render_cache.enabled():
+            return []
+        cache = render_cache.RenderCache(
+            self._env,
+            inputs=self._config.inputs,
+            output=self._config.output,
+            jinja_suffix=self._config.jinja_suffix,
+            functions=self.functions(),
+            salt_files=[
+                Path(__file__),
+                Path(render_cache.__file__),
+                Path(validate.__file__),
+                Path('makejinja.toml'),
+            ],
+        )
+        return [cache.stale]
@@ -0,0 +1,223 @@
+"""Content-hashed render cache for the makejinja plugin.
+
+makejinja runs with force = true, so every template is re-rendered on each
+`just template render`. The cache keys each template on a digest of:
+
+  - its source and the source of every template it includes,
+  - the data values it references (e.g. `nodes`, `network`),
+  - the files read by the plugin functions it calls (age.key, deploy.key...),
+  - makejinja.toml and the plugin sources, which change what rendering means.
+
+A template whose key matches the previous run and whose output still exists
+is skipped through a makejinja path filter, so its output keeps its content
+and mtime (and .sops.* outputs stay encrypted).
+
+Set RENDER_CACHE=0 to force a full render; the cache lives in
+template/.cache/render.json and is safe to delete.
+"""
+
+from collections.abc import Callable, Iterable
+from inspect import getsourcefile, signature
+from pathlib import Path
+from typing import Any
+
+import atexit
+import hashlib
+import json
+import os
+
+import jinja2
+import jinja2.nodes
+from jinja2 import meta
+
+CACHE_FILE = Path(__file__).parents[1] / ".cache" / "render.json"
+CACHE_VERSION = 1
+
+
+# Hash a file's bytes, tolerating a missing file so templates that never
+# read it (e.g. cloudflare-tunnel.json outside tunnel mode) still cache.
+def _file_digest(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+
+class Template(jinja2.Template):
+    """Reports every successful top-level render back to the cache."""
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        rendered = super().render(*args, **kwargs)
+        cache = getattr(self.environment, "render_cache", None)
+        if cache is not None and self.name is not None:
+            cache.rendered(self.name, rendered)
+        return rendered
+
+
+class RenderCache:
+    def __init__(
+        self,
+        env: jinja2.Environment,
+        inputs: Iterable[Path],
+        output: Path,
+        jinja_suffix: str,
+        functions: Iterable[Callable[..., Any]] = (),
+        salt_files: Iterable[Path] = (),
+        cache_file: Path = CACHE_FILE,
+    ):
+        self._env = env
+        self._inputs = [path.resolve() for path in inputs]
+        self._output = output
+        self._suffix = jinja_suffix
+        self._cache_file = cache_file
+        # Plugin functions read their file_path default; a template calling
+        # age_key() depends on age.key even though it never names the file.
+        self._function_files: dict[str, Path] = {}
+        sources = set(salt_files)
+        for func in functions:
+            param = signature(func).parameters.get("file_path")
+            if param is not None and isinstance(param.default, str):
+                self._function_files[func.__name__] = Path(param.default)
+            if source := getsourcefile(func):
+                sources.add(Path(source))
+        salt = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for path in sorted(sources):
+            salt.update(f"{path.name}:{_file_digest(path)}".encode())
+        self._salt = salt.digest()
+        self._files: dict[Path, str] = {}
+        self._values: dict[str, str] = {}
+        self._previous = self._load()
+        self._pending: dict[str, tuple[str, Path]] = {}
+        self._entries: dict[str, dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        # Keep a subclass already installed, such as the render profiler's.
+        if not issubclass(env.template_class, Template):
+            env.template_class = Template
+        env.render_cache = self
+        atexit.register(self.save)
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            cached = json.loads(self._cache_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if cached.get("version") != CACHE_VERSION:
+            return {}
+        return cached.get("templates", {})
+
+    def _file(self, path: Path) -> str:
+        if path not in self._files:
+            self._files[path] = _file_digest(path)
+        return self._files[path]
+
+    def _value(self, name: str) -> str:
+        if name not in self._values:
+            encoded = json.dumps(self._env.globals[name], sort_keys=True, default=str)
+            self._values[name] = hashlib.sha256(encoded.encode()).hexdigest()
+        return self._values[name]
+
+    # Return the cache key for a template, or None when it cannot be keyed
+    # (a dynamic include, a reference to the process environment, or a
+    # syntax error that the real render should report).
+    def key(self, name: str) -> str | None:
+        try:
+            return self._key(name)
+        except jinja2.TemplateError:
+            return None
+
+    def _key(self, name: str) -> str | None:
+        digest = hashlib.sha256(self._salt)
+        names: set[str] = set()
+        seen: set[str] = set()
+        queue = [name]
+        while queue:
+            current = queue.pop(0)
+            if current in seen:
+                continue
+            seen.add(current)
+            source, _, _ = self._env.loader.get_source(self._env, current)
+            digest.update(f"{current}\0{source}\0".encode())
+            ast = self._env.parse(source)
+            # meta.find_undeclared_variables() hides names already present
+            # in env.globals, which is exactly where makejinja puts the data;
+            # collect every loaded name instead (loop variables hash as "").
+            names |= {node.name for node in ast.find_all(jinja2.nodes.Name) if node.ctx == "load"}
+            for ref in meta.find_referenced_templates(ast):
+                if ref is None:
+                    return None
+                queue.append(ref)
+        if "env" in names:
+            return None
+        for ref in sorted(names):
+            if ref in self._function_files:
+                value = self._file(self._function_files[ref])
+            elif ref in self._env.globals and not callable(self._env.globals[ref]):
+                value = self._value(ref)
+            else:
+                value = ""
+            digest.update(f"{ref}\0{value}\0".encode())
+        return digest.hexdigest()
+
+    # makejinja path filter: return False to skip a template whose output is
+    # already up to date.
+    def stale(self, input_path: Path) -> bool:
+        if input_path.suffix != self._suffix or not input_path.is_file():
+            return True
+        resolved = input_path.resolve()
+        root = next((p for p in self._inputs if resolved.is_relative_to(p)), None)
+        if root is None:
+            return True
+        relative = resolved.relative_to(root)
+        name = relative.as_posix()
+        key = self.key(name)
+        if key is None:
+            return True
+        output = self._output / relative.with_suffix("")
+        previous = self._previous.get(name)
+        if (
+            previous is not None
+            and previous["key"] == key
+            and (output.exists() or previous["empty"])
+        ):
+            self._entries[name] = previous
+            self.hits += 1
+            return False
+        self._pending[name] = (key, output)
+        self.misses += 1
+        return True
+
+    # Called by Template.render once a template rendered without error.
+    def rendered(self, name: str, content: str) -> None:
+        if name not in self._pending:
+            return
+        key, output = self._pending.pop(name)
+        # makejinja skips writing empty renders but leaves a previous output
+        # in place; drop it so a template that now renders empty removes
+        # its file.
+        if content.strip() == "":
+            output.unlink(missing_ok=True)
+        self._entries[name] = {
+            "key": key,
+            "output": str(output),
+            # makejinja writes nothing for templates that render empty.
+            "empty": content.strip() == "",
+        }
+
+    # Persist entries for templates seen in this run; templates that failed
+    # to render keep no entry and are retried next time.
+    def save(self) -> None:
+        if not self._entries:
+            return
+        self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._cache_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(
+            {"version": CACHE_VERSION, "templates": self._entries},
+            indent=2,
+            sort_keys=True,
+        ))
+        os.replace(tmp, self._cache_file)
+
+
+def enabled() -> bool:
+    return os.environ.get("RENDER_CACHE", "1") not in ("0", "false", "no", "off")
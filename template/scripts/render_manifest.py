@@ -0,0 +1,343 @@
+"""Render into a staging mirror and write only the outputs that changed.
+
+Usage: uv run --locked --no-dev template/scripts/render_manifest.py render
+       uv run --locked --no-dev template/scripts/render_manifest.py dirty STAGE [PREFIX...]
+       uv run --locked --no-dev template/scripts/render_manifest.py clear STAGE [PREFIX...]
+
+`render` runs makejinja with its output redirected to template/.cache/staging
+(a mirror of the last render, so the render cache keeps working) and then
+syncs the mirror into the repository. Outputs whose bytes are unchanged are
+left alone, as are encrypted *.sops.* files whose decrypted content matches
+the new render; everything else is copied over and outputs no template
+produces any more are removed. Staged *.sops.* plaintext is deleted right
+after the sync, so secrets are rendered on every run and only their digests
+are kept. The result is recorded in template/.cache/render-manifest.json:
+
+  {"added": [...], "changed": [...], "removed": [...], "dirty": {...}, ...}
+
+Paths are relative to the repository root. `dirty` accumulates the paths
+changed since each later stage last succeeded, so a stage that failed is
+retried on the next run even when nothing new changed: `dirty STAGE` exits
+0 when the stage has work under the given prefixes (or has never run) and
+1 otherwise, and `clear STAGE` with the same prefixes marks it done. A
+stage also starts over when its key changes: the versions of the tools it
+runs, the size and mtime of the files under its prefixes that no template
+renders (hand-written manifests, the Talos secrets bundle), and whatever
+the caller adds, such as kubeconform's schema store and flags. With
+RENDER_CACHE=0 every template is rendered and every stage starts over.
+
+Only outputs recorded in the manifest are ever removed. The first render
+without one (a new checkout, or the first after upgrading) lists the files
+next to rendered outputs that no template produces instead; delete those
+that came from an older template by hand, once. The outputs of renamed
+templates listed in RETIRED_OUTPUTS are removed either way.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tomllib
+
+import yaml
+
+from encrypt_secrets import StatusError, encrypted
+
+REPO_ROOT = Path(__file__).parents[2]
+STAGING_DIR = Path(__file__).parents[1] / ".cache" / "staging"
+MANIFEST_FILE = Path(__file__).parents[1] / ".cache" / "render-manifest.json"
+MANIFEST_VERSION = 1
+STAGES = ["validate-kubernetes", "validate-talos"]
+# Version probes of the tools each stage runs, part of its key.
+STAGE_TOOLS = {
+    "validate-kubernetes": [["kustomize", "version"], ["kubeconform", "-v"]],
+    "validate-talos": [["topf", "--version"]],
+}
+SOPS_PATTERN = "*.sops.*"
+# Outputs of templates that were renamed, removed on every render whether
+# or not a manifest recorded them. topf applies every patch in talos/all/,
+# so a stale fixed-value patch would be applied beside its replacement.
+RETIRED_OUTPUTS = [
+    "talos/all/30-kubelet.yaml",  # now 30-kubelet.yaml.tpl
+    "talos/all/40-sysctls.yaml",  # now 40-sysctls.yaml.tpl
+]
+
+
+def _digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _version(command: list[str]) -> str:
+    try:
+        proc = subprocess.run(command, capture_output=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return f"{command[0]}: unavailable"
+    return f"{command[0]}: {(proc.stdout + proc.stderr).decode(errors='replace').strip()}"
+
+
+class Manifest:
+    def __init__(self, path: Path = MANIFEST_FILE):
+        self.path = path
+        try:
+            data = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != MANIFEST_VERSION:
+            data = {}
+        # Whether an earlier render recorded its outputs here.
+        self.recorded = "outputs" in data
+        self.added: list[str] = data.get("added", [])
+        self.changed: list[str] = data.get("changed", [])
+        self.removed: list[str] = data.get("removed", [])
+        # Per output: digests of the rendered plaintext and of the file last
+        # seen on disk, so an encrypted output is only decrypted once.
+        self.outputs: dict[str, dict[str, str]] = data.get("outputs", {})
+        # Per stage: paths changed since it last succeeded; None until it has.
+        self.dirty: dict[str, list[str] | None] = {
+            stage: data.get("dirty", {}).get(stage) for stage in STAGES
+        }
+        # Per stage: the key it last succeeded with, see key().
+        self.keys: dict[str, str | None] = {
+            stage: data.get("keys", {}).get(stage) for stage in STAGES
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "version": MANIFEST_VERSION,
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "dirty": self.dirty,
+            "keys": self.keys,
+            "outputs": self.outputs,
+        }, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+    # What a stage depends on besides the rendered outputs: its tool
+    # versions, the files under prefixes that no template renders (by size
+    # and mtime, as those are never recorded), and extra.
+    def key(self, stage: str, prefixes: Iterable[str] = (), extra: Iterable[str] = (), root: Path = REPO_ROOT) -> str:
+        parts = [_version(command) for command in STAGE_TOOLS[stage]]
+        parts += extra
+        for prefix in prefixes:
+            for path in sorted((root / prefix).rglob("*")):
+                name = path.relative_to(root).as_posix()
+                if path.is_file() and name not in self.outputs:
+                    stat = path.stat()
+                    parts.append(f"{name} {stat.st_size} {stat.st_mtime_ns}")
+        return _digest("\n".join(parts).encode())
+
+    # Paths under any of prefixes that stage has not handled yet; None when
+    # the stage has never succeeded or its key changed, meaning everything.
+    def pending(self, stage: str, prefixes: Iterable[str] = (), key: str | None = None) -> list[str] | None:
+        dirty = self.dirty.get(stage)
+        if dirty is None or self.keys.get(stage) != key:
+            return None
+        prefixes = list(prefixes)
+        if not prefixes:
+            return dirty
+        return [path for path in dirty if any(path.startswith(prefix) for prefix in prefixes)]
+
+    def clear(self, stage: str, key: str | None = None) -> None:
+        self.dirty[stage] = []
+        self.keys[stage] = key
+        self.save()
+
+
+# Output paths (relative to the output root) of every template, mirroring
+# how makejinja maps inputs to outputs: earlier inputs win and the jinja
+# suffix is dropped.
+def expected_outputs(inputs: list[Path], exclude_patterns: list[str], jinja_suffix: str) -> set[Path]:
+    outputs: set[Path] = set()
+    for root in inputs:
+        for path in root.rglob("*"):
+            if not path.is_file() or any(path.match(pattern) for pattern in exclude_patterns):
+                continue
+            relative = path.relative_to(root)
+            outputs.add(relative.with_suffix("") if relative.suffix == jinja_suffix else relative)
+    return outputs
+
+
+def _decrypt(path: Path) -> bytes | None:
+    proc = subprocess.run(["sops", "decrypt", str(path)], capture_output=True)
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def _same_secret(rendered: bytes, decrypted: bytes, suffix: str) -> bool:
+    if rendered == decrypted:
+        return True
+    # sops re-serializes YAML, so compare the documents rather than bytes.
+    if suffix in (".yaml", ".yml"):
+        try:
+            return list(yaml.safe_load_all(rendered)) == list(yaml.safe_load_all(decrypted))
+        except yaml.YAMLError:
+            return False
+    return False
+
+
+def sync(staging: Path, root: Path, manifest: Manifest, expected: set[Path]) -> None:
+    added: list[str] = []
+    changed: list[str] = []
+    outputs: dict[str, dict[str, str]] = {}
+    for source in sorted(staging.rglob("*")):
+        if not source.is_file():
+            continue
+        relative = source.relative_to(staging)
+        if relative not in expected:
+            # The template is gone; drop its stale staged output.
+            source.unlink()
+            continue
+        name = relative.as_posix()
+        target = root / relative
+        content = source.read_bytes()
+        state = {"source": _digest(content)}
+        try:
+            current = target.read_bytes()
+        except FileNotFoundError:
+            current = None
+        if current is None:
+            added.append(name)
+        elif current != content and not _equivalent(target, content, current, manifest.outputs.get(name, {})):
+            changed.append(name)
+        else:
+            outputs[name] = state | {"output": _digest(current)}
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+        outputs[name] = state | {"output": state["source"]}
+
+    # Keep no plaintext secrets around; their digests are enough to tell
+    # an unchanged secret from a changed one.
+    for source in staging.rglob(SOPS_PATTERN):
+        source.unlink()
+
+    removed = sorted(set(manifest.outputs) - set(outputs))
+    for name in removed:
+        target = root / name
+        target.unlink(missing_ok=True)
+        # Prune directories emptied by the removal, as makejinja does.
+        for parent in target.parents:
+            if parent == root or not parent.is_dir() or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+    manifest.added, manifest.changed, manifest.removed = added, changed, removed
+    manifest.outputs = outputs
+    touched = [*added, *changed, *removed]
+    for stage, dirty in manifest.dirty.items():
+        if dirty is not None:
+            manifest.dirty[stage] = sorted(set(dirty) | set(touched))
+    manifest.save()
+
+
+# Record the retired outputs still on disk so sync removes them like any
+# other output that is no longer rendered.
+def retire(root: Path, manifest: Manifest, expected: set[Path]) -> None:
+    for name in RETIRED_OUTPUTS:
+        if Path(name) not in expected and (root / name).is_file():
+            manifest.outputs.setdefault(name, {})
+
+
+# Files beside rendered outputs that no template produces. Without a
+# manifest nothing says which of them an older template rendered, so they
+# are reported rather than removed.
+def untracked(root: Path, expected: set[Path]) -> list[str]:
+    directories = {root / path.parent for path in expected if path.parent != Path(".")}
+    return sorted(
+        path.relative_to(root).as_posix()
+        for directory in directories if directory.is_dir()
+        for path in directory.iterdir()
+        if path.is_file() and path.relative_to(root) not in expected
+    )
+
+
+# Whether an encrypted output on disk already holds the rendered content.
+def _equivalent(target: Path, content: bytes, current: bytes, state: dict[str, str]) -> bool:
+    if not fnmatch.fnmatch(target.name, SOPS_PATTERN):
+        return False
+    if state == {"source": _digest(content), "output": _digest(current)}:
+        return True
+    try:
+        if not encrypted(target):
+            return False
+    except StatusError:
+        return False
+    decrypted = _decrypt(target)
+    return decrypted is not None and _same_secret(content, decrypted, target.suffix)
+
+
+def render(root: Path = REPO_ROOT, staging: Path = STAGING_DIR, manifest_file: Path = MANIFEST_FILE) -> int:
+    # Imported here so `dirty` and `clear` stay cheap.
+    import makejinja.cli
+    import render_cache
+
+    settings = tomllib.loads((root / "makejinja.toml").read_text())["makejinja"]
+    inputs = [root / path for path in settings["inputs"]]
+    output = root / settings.get("output", ".")
+    expected = expected_outputs(inputs, settings.get("exclude_patterns", []), settings.get("jinja_suffix", ".j2"))
+
+    # Without the render cache every template is rendered, so start from an
+    # empty mirror; with it, skipped templates keep their staged output.
+    if not render_cache.enabled():
+        shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        makejinja.cli.makejinja_cli.main(["--output", str(staging)], prog_name="makejinja", standalone_mode=False)
+    finally:
+        os.chdir(cwd)
+
+    manifest = Manifest(manifest_file)
+    if not render_cache.enabled():
+        # A full render asks for a full pipeline too.
+        manifest.dirty = dict.fromkeys(STAGES)
+    retire(output, manifest, expected)
+    if not manifest.recorded:
+        for name in untracked(output, expected):
+            if name in manifest.outputs:
+                continue
+            print(f"render: {name} is not rendered by any template; delete it if an older template did", file=sys.stderr)
+    sync(staging, output, manifest, expected)
+    print(
+        f"render: {len(manifest.added)} added, {len(manifest.changed)} changed, "
+        f"{len(manifest.removed)} removed, {len(manifest.outputs) - len(manifest.added) - len(manifest.changed)} unchanged",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("render")
+    dirty = commands.add_parser("dirty")
+    dirty.add_argument("stage", choices=STAGES)
+    dirty.add_argument("prefixes", nargs="*")
+    clear = commands.add_parser("clear")
+    clear.add_argument("stage", choices=STAGES)
+    clear.add_argument("prefixes", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "render":
+        return render()
+    manifest = Manifest()
+    key = manifest.key(args.stage, args.prefixes)
+    if args.command == "clear":
+        manifest.clear(args.stage, key)
+        return 0
+    pending = manifest.pending(args.stage, args.prefixes, key)
+    return 0 if pending is None or pending else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
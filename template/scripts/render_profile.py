@@ -0,0 +1,218 @@
+"""Opt-in render profiling for the makejinja plugin.
+
+Usage: RENDER_PROFILE=1 just template render
+       uv run --locked --no-dev template/scripts/render_profile.py stage NAME -- COMMAND...
+       uv run --locked --no-dev template/scripts/render_profile.py summary [--top N]
+
+With RENDER_PROFILE set, the plugin times Plugin.data(), every template's
+compile and top-level render (wall time, output bytes, plugin function
+calls) and every plugin function call, then writes template/.cache/profile/render.json and
+prints the slowest templates to stderr when makejinja exits.
+
+`stage` runs one pipeline step and appends its wall time and exit status
+to template/.cache/profile/pipeline.jsonl; `summary` prints the pipeline
+stages followed by the render report. `just template profile` runs the
+configure pipeline this way.
+"""
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import time
+
+from render_cache import Template
+
+PROFILE_DIR = Path(__file__).parents[1] / ".cache" / "profile"
+RENDER_REPORT = PROFILE_DIR / "render.json"
+PIPELINE_LOG = PROFILE_DIR / "pipeline.jsonl"
+
+
+class ProfiledTemplate(Template):
+    """Times each top-level render against the environment's profile."""
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        if self.name is None:
+            return super().render(*args, **kwargs)
+        return self.environment.render_profile.measure(self.name, super().render, *args, **kwargs)
+
+
+class RenderProfile:
+    def __init__(self, report_file: Path = RENDER_REPORT):
+        self._report_file = report_file
+        self._current: str | None = None
+        self.phases: dict[str, float] = {}
+        self.templates: dict[str, dict[str, Any]] = {}
+        self.functions: dict[str, dict[str, Any]] = {}
+        self._started = time.perf_counter()
+
+    # Install the profiling Template class on env. It extends render_cache's
+    # class, which the cache keeps, so the two can be enabled together.
+    def attach(self, env: Any) -> None:
+        env.template_class = ProfiledTemplate
+        env.render_profile = self
+        # Loaders compile templates before render() runs, so compile time is
+        # taken from the environment itself.
+        compile_source = env.compile
+
+        def compile(source: Any, name: str | None = None, *args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return compile_source(source, name, *args, **kwargs)
+            finally:
+                if name is not None:
+                    self._entry(name)["compile_seconds"] += time.perf_counter() - start
+
+        env.compile = compile
+
+    def _entry(self, name: str) -> dict[str, Any]:
+        return self.templates.setdefault(
+            name, {"seconds": 0.0, "compile_seconds": 0.0, "bytes": 0, "calls": Counter()}
+        )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    # Called by ProfiledTemplate.render around each top-level render.
+    def measure(self, name: str, render: Callable[..., str], *args: Any, **kwargs: Any) -> str:
+        previous, self._current = self._current, name
+        entry = self._entry(name)
+        start = time.perf_counter()
+        try:
+            rendered = render(*args, **kwargs)
+        finally:
+            entry["seconds"] += time.perf_counter() - start
+            self._current = previous
+        entry["bytes"] += len(rendered.encode())
+        return rendered
+
+    # Wrap a plugin function so each call is counted against the template
+    # rendering it and timed on its own.
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self.functions.setdefault(func.__name__, {"calls": 0, "seconds": 0.0})
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats["calls"] += 1
+                stats["seconds"] += time.perf_counter() - start
+                if self._current is not None:
+                    self._entry(self._current)["calls"][func.__name__] += 1
+
+        return wrapper
+
+    def report(self) -> dict[str, Any]:
+        templates = sorted(
+            self.templates.items(),
+            key=lambda item: item[1]["seconds"] + item[1]["compile_seconds"],
+            reverse=True,
+        )
+        return {
+            "total_seconds": time.perf_counter() - self._started,
+            "phases": self.phases,
+            "templates": [
+                {**entry, "name": name, "calls": dict(entry["calls"])}
+                for name, entry in templates
+            ],
+            "functions": dict(sorted(self.functions.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+        }
+
+    def save(self) -> None:
+        if not self.templates and not self.phases:
+            return
+        report = self.report()
+        self._report_file.parent.mkdir(parents=True, exist_ok=True)
+        self._report_file.write_text(json.dumps(report, indent=2) + "\n")
+        print_render_report(report, top=10)
+        print(f"render profile written to {self._report_file}", file=sys.stderr)
+
+
+def print_render_report(report: dict[str, Any], top: int) -> None:
+    rendered = sum(entry["seconds"] for entry in report["templates"])
+    compiled = sum(entry["compile_seconds"] for entry in report["templates"])
+    print(
+        f"=== Render: {report['total_seconds'] * 1000:.0f}ms total, {len(report['templates'])} templates: "
+        f"{compiled * 1000:.0f}ms compiling, {rendered * 1000:.0f}ms rendering ===",
+        file=sys.stderr,
+    )
+    for name, seconds in report["phases"].items():
+        print(f"{seconds * 1000:9.1f}ms  [{name}]", file=sys.stderr)
+    print(f"{'render':>11}  {'compile':>9}  {'bytes':>9}  template", file=sys.stderr)
+    for entry in report["templates"][:top]:
+        calls = ", ".join(f"{func}x{count}" for func, count in sorted(entry["calls"].items()))
+        print(
+            f"{entry['seconds'] * 1000:9.1f}ms  {entry['compile_seconds'] * 1000:7.1f}ms  "
+            f"{entry['bytes']:>9}  {entry['name']}" + (f"  ({calls})" if calls else ""),
+            file=sys.stderr,
+        )
+    for name, stats in report["functions"].items():
+        print(f"{stats['seconds'] * 1000:9.1f}ms  {stats['calls']:>8} calls  {name}()", file=sys.stderr)
+
+
+def enabled() -> bool:
+    return os.environ.get("RENDER_PROFILE", "0") not in ("", "0", "false", "no", "off")
+
+
+def stage(name: str, command: list[str], log: Path = PIPELINE_LOG) -> int:
+    start = time.perf_counter()
+    rc = subprocess.run(command).returncode
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with log.open("a") as f:
+        f.write(json.dumps({"stage": name, "seconds": time.perf_counter() - start, "rc": rc}) + "\n")
+    return rc
+
+
+def summary(top: int, log: Path = PIPELINE_LOG, report_file: Path = RENDER_REPORT) -> int:
+    try:
+        stages = [json.loads(line) for line in log.read_text().splitlines() if line]
+    except FileNotFoundError:
+        stages = []
+    if stages:
+        total = sum(entry["seconds"] for entry in stages)
+        print(f"=== Pipeline: {total:.2f}s ===", file=sys.stderr)
+        for entry in stages:
+            share = entry["seconds"] / total * 100 if total else 0
+            status = "" if entry["rc"] == 0 else f"  (exit {entry['rc']})"
+            print(f"{entry['seconds']:8.2f}s  {share:5.1f}%  {entry['stage']}{status}", file=sys.stderr)
+    try:
+        print_render_report(json.loads(report_file.read_text()), top)
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    stage_parser = commands.add_parser("stage")
+    stage_parser.add_argument("name")
+    stage_parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    commands.add_parser("summary").add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "stage":
+        command = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        if not command:
+            parser.error("stage needs a command after --")
+        return stage(args.name, command)
+    return summary(args.top)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
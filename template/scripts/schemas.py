@@ -0,0 +1,242 @@
+"""Offline, content-addressed JSON schema store for kubeconform.
+
+Usage: uv run --locked --no-dev template/scripts/schemas.py <command> [--store DIR]
+
+  build [FILE...]   add schemas converted from the CustomResourceDefinitions
+                    in FILE (YAML, '-' or no FILE reads stdin), e.g. the
+                    output of `helmfile --file bootstrap/helmfile/crds.yaml
+                    template`
+  import TARBALL    add every <group>/<kind>_<version>.json (CRDs catalog
+                    layout) and *-standalone*/<kind>[-<group>]-<version>.json
+                    (kubernetes-json-schema layout) schema in TARBALL
+  export TARBALL    write the store as a tarball for air-gapped machines
+  list              print the indexed group/kind/version keys
+
+Schemas are stored once under blobs/<sha256>.json and indexed by
+group/kind/version in index.json. kubeconform reads them through view/,
+a directory of hard links laid out as {{.Group}}/{{.ResourceKind}}_{{.ResourceAPIVersion}}.json
+that is filled on demand by SchemaStore.resolve().
+"""
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import threading
+
+import yaml
+
+STORE_DIR = Path(__file__).parents[1] / ".cache" / "schemas"
+VIEW_LOCATION = "{{.Group}}/{{.ResourceKind}}_{{.ResourceAPIVersion}}.json"
+
+CATALOG_NAME = re.compile(r"(?:^|/)(?P<group>[a-z0-9.-]+)/(?P<kind>[a-z0-9]+)_(?P<version>v[a-z0-9]+)\.json$")
+STANDALONE_NAME = re.compile(
+    r"-standalone[^/]*/(?P<kind>[a-z0-9]+)(?:-(?P<group>[a-z0-9.]+))?-(?P<version>v[a-z0-9]+)\.json$"
+)
+# Each part becomes a path under view/: a DNS subdomain (empty for the core
+# group), so never "..", "/" or a leading dot.
+GROUP = re.compile(r"(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)*)?")
+KIND = re.compile(r"[A-Za-z0-9]+")
+VERSION = re.compile(r"v[a-z0-9]+")
+DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def valid(group: str, kind: str, version: str) -> bool:
+    return bool(GROUP.fullmatch(group) and KIND.fullmatch(kind) and VERSION.fullmatch(version))
+
+
+# Convert a CRD openAPIV3Schema into the strict JSON schema kubeconform
+# expects, mirroring openapi2jsonschema: int-or-string becomes a oneOf and
+# objects with known properties reject unknown fields.
+def _strict(schema: Any) -> Any:
+    if isinstance(schema, list):
+        return [_strict(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    schema = {key: _strict(value) for key, value in schema.items()}
+    if schema.pop("x-kubernetes-int-or-string", False):
+        schema.pop("type", None)
+        schema["oneOf"] = [{"type": "string"}, {"type": "integer"}]
+    if (
+        "properties" in schema
+        and "additionalProperties" not in schema
+        and not schema.get("x-kubernetes-preserve-unknown-fields")
+    ):
+        schema["additionalProperties"] = False
+    return schema
+
+
+def crd_schemas(documents: Iterable[Any]) -> Iterator[tuple[str, str, str, dict[str, Any]]]:
+    for doc in documents:
+        if not isinstance(doc, dict) or doc.get("kind") != "CustomResourceDefinition":
+            continue
+        spec = doc.get("spec", {})
+        kind = spec.get("names", {}).get("kind", "").lower()
+        for version in spec.get("versions", []):
+            schema = version.get("schema", {}).get("openAPIV3Schema")
+            if kind and schema:
+                yield spec["group"], kind, version["name"], _strict(schema)
+
+
+class SchemaStore:
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = root
+        self.blobs = root / "blobs"
+        self.view = root / "view"
+        self._index_file = root / "index.json"
+        try:
+            self.index: dict[str, str] = json.loads(self._index_file.read_text())
+        except FileNotFoundError:
+            self.index = {}
+        # resolve() is called from kubeconform.py's worker threads.
+        self._lock = threading.Lock()
+        self._resolved: dict[str, bool] = {}
+
+    @staticmethod
+    def key(group: str, kind: str, version: str) -> str:
+        return f"{group}/{kind.lower()}/{version}"
+
+    @property
+    def location(self) -> str:
+        return f"{self.view}/{VIEW_LOCATION}"
+
+    def add(self, group: str, kind: str, version: str, content: bytes) -> str:
+        if not valid(group, kind, version):
+            raise ValueError(f"invalid resource type {group!r}/{kind!r}/{version!r}")
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self.blobs / f"{digest}.json"
+        if not blob.exists():
+            self.blobs.mkdir(parents=True, exist_ok=True)
+            blob.write_bytes(content)
+        self.index[self.key(group, kind, version)] = digest
+        return digest
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_file.write_text(json.dumps(self.index, indent=2, sort_keys=True) + "\n")
+
+    def build(self, documents: Iterable[Any]) -> int:
+        count = 0
+        for group, kind, version, schema in crd_schemas(documents):
+            self.add(group, kind, version, json.dumps(schema, sort_keys=True).encode())
+            count += 1
+        return count
+
+    def import_tarball(self, tarball: Path) -> int:
+        count = 0
+        with tarfile.open(tarball) as tar:
+            if "index.json" in tar.getnames():
+                # A tarball written by export(); blobs are re-hashed on add.
+                index = json.load(tar.extractfile("index.json"))
+                for key, digest in index.items():
+                    parts = key.split("/")
+                    if len(parts) != 3 or not DIGEST.fullmatch(str(digest)):
+                        raise ValueError(f"invalid index entry {key!r}: {digest!r}")
+                    group, kind, version = parts
+                    self.add(group, kind, version, tar.extractfile(f"blobs/{digest}.json").read())
+                return len(index)
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if match := STANDALONE_NAME.search(member.name):
+                    group = match["group"] or ""
+                elif match := CATALOG_NAME.search(member.name):
+                    group = match["group"]
+                else:
+                    continue
+                content = tar.extractfile(member).read()
+                self.add(group, match["kind"], match["version"], content)
+                count += 1
+        return count
+
+    def export(self, tarball: Path) -> None:
+        with tarfile.open(tarball, "w:gz") as tar:
+            index = json.dumps(self.index, indent=2, sort_keys=True).encode()
+            info = tarfile.TarInfo("index.json")
+            info.size = len(index)
+            tar.addfile(info, io.BytesIO(index))
+            for digest in sorted(set(self.index.values())):
+                tar.add(self.blobs / f"{digest}.json", f"blobs/{digest}.json")
+
+    # Return the blob digest for a resource type, falling back to the short
+    # group name used by kubernetes-json-schema for built-in API groups
+    # (apps, networking.k8s.io -> networking, rbac.authorization.k8s.io -> rbac).
+    def lookup(self, group: str, kind: str, version: str) -> str | None:
+        digest = self.index.get(self.key(group, kind, version))
+        if digest is None and "." in group:
+            digest = self.index.get(self.key(group.split(".", 1)[0], kind, version))
+        return digest
+
+    # Make the schema for a resource type available to kubeconform under
+    # view/, returning False when the store has no schema for it.
+    def resolve(self, group: str, kind: str, version: str) -> bool:
+        if not valid(group, kind, version):
+            return False
+        key = self.key(group, kind, version)
+        with self._lock:
+            if key not in self._resolved:
+                self._resolved[key] = self._link(group, kind.lower(), version)
+            return self._resolved[key]
+
+    def _link(self, group: str, kind: str, version: str) -> bool:
+        digest = self.lookup(group, kind, version)
+        if digest is None:
+            return False
+        target = self.view / group / f"{kind}_{version}.json"
+        source = self.blobs / f"{digest}.json"
+        if target.exists() and not target.samefile(source):
+            target.unlink()
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except FileExistsError:
+                pass
+        return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", type=Path, default=STORE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build").add_argument("files", nargs="*", default=["-"])
+    commands.add_parser("import").add_argument("tarball", type=Path)
+    commands.add_parser("export").add_argument("tarball", type=Path)
+    commands.add_parser("list")
+    args = parser.parse_args()
+
+    store = SchemaStore(args.store)
+    if args.command == "build":
+        count = 0
+        for name in args.files:
+            stream = sys.stdin if name == "-" else open(name)
+            with stream:
+                count += store.build(yaml.safe_load_all(stream))
+        store.save()
+        print(f"added {count} schemas from CustomResourceDefinitions", file=sys.stderr)
+    elif args.command == "import":
+        try:
+            count = store.import_tarball(args.tarball)
+        except ValueError as e:
+            print(f"{args.tarball}: {e}", file=sys.stderr)
+            return 1
+        store.save()
+        print(f"imported {count} schemas from {args.tarball}", file=sys.stderr)
+    elif args.command == "export":
+        store.export(args.tarball)
+    else:
+        for key in sorted(store.index):
+            print(key)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
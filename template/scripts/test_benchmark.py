@@ -0,0 +1,37 @@
+"""Unit tests for the synthetic-fleet benchmark helpers.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_benchmark.py -q
+"""
+
+from pathlib import Path
+
+import sys
+import tomllib
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark import INGRESS_MODES, compare, synthetic, to_toml  # noqa: E402
+from validate import Config  # noqa: E402
+
+
+@pytest.mark.parametrize("ingress", INGRESS_MODES)
+@pytest.mark.parametrize("bgp", [False, True])
+@pytest.mark.parametrize("nodes", [1, 300])
+def test_synthetic_fleets_are_valid_and_round_trip(nodes: int, bgp: bool, ingress: str):
+    config = synthetic(nodes, bgp, ingress)
+    assert tomllib.loads(to_toml(config)) == config
+    model = Config.model_validate(config)
+    assert len(model.nodes) == nodes
+    assert model.cilium_bgp_enabled is bgp
+    assert model.ingress.mode == ingress
+
+
+def test_compare_flags_regressions_over_threshold():
+    case = {"nodes": 10, "bgp": False, "ingress": "none"}
+    baseline = {"results": [case | {"seconds": {"load": 0.010, "render": 1.0}}]}
+    current = {"results": [case | {"seconds": {"load": 0.012, "render": 1.05}}]}
+    assert compare(baseline, current, threshold=10) == ["10 nodes l2 none load +20.0%"]
+    assert compare(baseline, current, threshold=25) == []
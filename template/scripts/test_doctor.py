@@ -0,0 +1,135 @@
+"""Unit tests for the template doctor.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_doctor.py -q
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import json
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import doctor  # noqa: E402
+import plugin  # noqa: E402
+from doctor import Result  # noqa: E402
+
+REPO_ROOT = Path(__file__).parents[2]
+VALID = REPO_ROOT / ".github/template-tests/valid"
+AGE_KEY = "# public key: age1abc\nAGE-SECRET-KEY-1ABC\n"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch: pytest.MonkeyPatch):
+    plugin.file_cache.clear()
+    monkeypatch.delenv("SOPS_AGE_KEY_FILE", raising=False)
+
+
+def _root(tmp_path: Path, fixture: str = "private.toml") -> Path:
+    shutil.copy(VALID / fixture, tmp_path / "cluster.toml")
+    shutil.copy(VALID / fixture, tmp_path / "cluster.sample.toml")
+    (tmp_path / "age.key").write_text(AGE_KEY)
+    (tmp_path / "deploy.key").write_text("key\n")
+    (tmp_path / "flux-webhook-token.txt").write_text("token\n")
+    (tmp_path / "cloudflare-tunnel.json").write_text(
+        json.dumps({"AccountTag": "a", "TunnelID": "t", "TunnelSecret": "s"})
+    )
+    (tmp_path / "template").mkdir()
+    (tmp_path / "makejinja.toml").write_text("")
+    return tmp_path
+
+
+def _labels(results: list[Result]) -> list[str]:
+    return [next(iter(result.fields.values()), result.msg) for result in results]
+
+
+def test_all_good_in_fixed_order(tmp_path: Path):
+    results = doctor.run(_root(tmp_path))
+    assert _labels(results) == [
+        "cluster.toml", "cluster.sample.toml", "cloudflare-tunnel.json", "age.key", "deploy.key",
+        "flux-webhook-token.txt", "template/", "makejinja.toml", "schema",
+    ]
+    assert all(result.level == "info" and result.msg == "ok" for result in results)
+    assert all(result.seconds > 0 for result in results)
+
+
+def test_tunnel_file_only_for_tunnel_ingress(tmp_path: Path):
+    root = _root(tmp_path, "direct.toml")
+    (root / "cloudflare-tunnel.json").unlink()
+    results = doctor.run(root)
+    assert "cloudflare-tunnel.json" not in _labels(results)
+    assert not any(result.failed for result in results)
+
+
+def test_secrets_are_parsed(tmp_path: Path):
+    root = _root(tmp_path)
+    (root / "age.key").write_text("# public key: age1abc\n")
+    (root / "cloudflare-tunnel.json").write_text(json.dumps({"TunnelID": "t"}))
+    (root / "deploy.key").unlink()
+    failed = {result.fields["file"]: result for result in doctor.run(root) if result.failed}
+    assert failed["age.key"].msg == "invalid"
+    assert "private key" in failed["age.key"].fields["error"]
+    assert failed["cloudflare-tunnel.json"].fields["error"] == "Missing 'AccountTag' key in " + str(
+        root / "cloudflare-tunnel.json"
+    )
+    assert failed["deploy.key"].msg == "missing"
+
+
+def test_schema_failure_points_at_validate(tmp_path: Path):
+    root = _root(tmp_path)
+    (root / "cluster.toml").write_text("[network]\nnode_cidr = 'nope'\n")
+    results = doctor.run(root)
+    schema = next(result for result in results if result.fields.get("check") == "schema")
+    assert schema.failed
+    assert results[results.index(schema) + 1].msg.startswith("diagnose with: uv run")
+    assert "cloudflare-tunnel.json" not in _labels(results)
+
+
+def test_tool_probes_against_mise_pins(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    root = _root(tmp_path)
+    (root / ".mise").mkdir()
+    (root / ".mise/config.toml").write_text(
+        '[tools]\n'
+        '"aqua:astral-sh/uv" = "0.1.0"\n'
+        'uv = "0.9.0" # required:template\n'
+        'sd = "1.0.0" # required:template\n'
+        'sops = "3.10.0"\n'
+        'gum = "0.17.0"\n'
+    )
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, output in {"uv": "uv 0.9.0 (abc)", "sops": "sops 3.9.4 (latest)"}.items():
+        (bin_dir / name).write_text(f"#!/bin/sh\necho '{output}'\n")
+        (bin_dir / name).chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+
+    tools = {result.fields["tool"]: result for result in doctor.run(root) if "tool" in result.fields}
+    assert list(tools) == ["gum", "sd", "sops", "uv"]
+    assert tools["uv"] == Result("info", "ok", {"tool": "uv", "version": "0.9.0"}, tools["uv"].seconds)
+    assert (tools["sops"].level, tools["sops"].msg) == ("warn", "version mismatch")
+    assert (tools["sd"].level, tools["sd"].msg) == ("error", "missing")
+    assert (tools["gum"].level, tools["gum"].msg) == ("warn", "missing")
+
+
+def test_hung_probe_times_out(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("sd", "sops"):
+        (bin_dir / name).write_text("#!/bin/sh\nwhile :; do :; done\n")
+        (bin_dir / name).chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    monkeypatch.setattr(doctor, "PROBE_TIMEOUT", 0.1)
+    assert doctor.check_tool("sops", "3.10.0", False) == Result("warn", "timed out", {"tool": "sops"})
+    assert doctor.check_tool("sd", "1.0.0", True) == Result("error", "timed out", {"tool": "sd"})
+
+
+def test_line_matches_log_format_with_timing():
+    now = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    line = Result("error", "invalid", {"file": "age.key", "error": "no key"}, 0.0123).line(now)
+    assert line == '2026-01-02T03:04:05+00:00 ERRO   12.3ms invalid file=age.key error="no key"'
+    assert Result("info", "all good", {}, 2.5).line(now).endswith(" INFO    2.50s all good")
@@ -0,0 +1,54 @@
+"""Unit tests for the batched SOPS status detection.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_encrypt_secrets.py -q
+"""
+
+from pathlib import Path
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from encrypt_secrets import encrypted, find  # noqa: E402
+
+PLAINTEXT = """---
+apiVersion: v1
+kind: Secret
+stringData:
+  sops: not-metadata
+"""
+
+ENCRYPTED = """apiVersion: v1
+kind: Secret
+stringData:
+  token: ENC[AES256_GCM,data:abc,type:str]
+sops:
+  age:
+    - recipient: age1example
+  mac: ENC[AES256_GCM,data:def,type:str]
+  version: 3.13.3
+"""
+
+
+def test_yaml_status_read_from_metadata_block(tmp_path: Path):
+    (tmp_path / "plain.sops.yaml").write_text(PLAINTEXT)
+    (tmp_path / "enc.sops.yaml").write_text(ENCRYPTED)
+    assert encrypted(tmp_path / "plain.sops.yaml") is False
+    assert encrypted(tmp_path / "enc.sops.yaml") is True
+
+
+def test_json_and_dotenv_status(tmp_path: Path):
+    (tmp_path / "a.sops.json").write_text('{"data": "x", "sops": {"mac": "y"}}')
+    (tmp_path / "b.sops.json").write_text('{"data": "x"}')
+    (tmp_path / "c.sops.env").write_text("TOKEN=ENC[...]\nsops_mac=ENC[...]\n")
+    assert encrypted(tmp_path / "a.sops.json") is True
+    assert encrypted(tmp_path / "b.sops.json") is False
+    assert encrypted(tmp_path / "c.sops.env") is True
+
+
+def test_find_matches_sops_files_only(tmp_path: Path):
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app/secret.sops.yaml").write_text(PLAINTEXT)
+    (tmp_path / "app/helmrelease.yaml").write_text("")
+    assert find([tmp_path]) == [tmp_path / "app/secret.sops.yaml"]
@@ -0,0 +1,172 @@
+"""Unit tests for the Flux dependency-graph analyzer.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_flux_graph.py -q
+"""
+
+from pathlib import Path
+
+import random
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import flux_graph  # noqa: E402
+from flux_graph import Node  # noqa: E402
+
+ROOT_KS = """\
+apiVersion: kustomize.toolkit.fluxcd.io/v1
+kind: Kustomization
+metadata:
+  name: cluster-apps
+  namespace: flux-system
+spec:
+  path: ./kubernetes/apps
+"""
+
+
+def ks(name: str, path: str, depends: list[str] | None = None, wait: bool = False, target: str | None = None) -> str:
+    spec = [f"  path: ./kubernetes/apps/{path}", f"  wait: {str(wait).lower()}"]
+    if target:
+        spec.append(f"  targetNamespace: {target}")
+    if depends:
+        spec.append("  dependsOn:")
+        spec += [f"    - name: {dep}" for dep in depends]
+    return "\n".join([
+        "apiVersion: kustomize.toolkit.fluxcd.io/v1",
+        "kind: Kustomization",
+        "metadata:",
+        f"  name: {name}",
+        "spec:",
+        *spec,
+    ]) + "\n"
+
+
+def helm_release(name: str) -> str:
+    return textwrap.dedent(f"""\
+        apiVersion: helm.toolkit.fluxcd.io/v2
+        kind: HelmRelease
+        metadata:
+          name: {name}
+        """)
+
+
+@pytest.fixture
+def kubernetes(tmp_path: Path):
+    root = tmp_path / "kubernetes"
+
+    def write(files: dict[str, str]) -> Path:
+        for name, content in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(content)
+        return root
+
+    write({
+        "flux/cluster/ks.yaml": ROOT_KS,
+        "apps/kube-system/kustomization.yaml": "namespace: kube-system\n",
+        "apps/kube-system/cilium/ks.yaml": ks("cilium", "kube-system/cilium/app", wait=True, target="kube-system"),
+        "apps/kube-system/cilium/app/helmrelease.yaml": helm_release("cilium"),
+        "apps/kube-system/coredns/ks.yaml": ks("coredns", "kube-system/coredns/app", ["cilium"], target="kube-system"),
+        "apps/kube-system/coredns/app/helmrelease.yaml": helm_release("coredns"),
+        # Never decrypted, even when it does not parse.
+        "apps/kube-system/coredns/app/secret.sops.yaml": "sops: [",
+    })
+    return write
+
+
+def test_namespaces_and_implicit_edges(kubernetes):
+    graph = flux_graph.load(kubernetes({}))
+    cilium = Node("Kustomization", "kube-system", "cilium")
+    assert set(graph.nodes) == {
+        Node("Kustomization", "flux-system", "cluster-apps"),
+        cilium,
+        Node("Kustomization", "kube-system", "coredns"),
+        Node("HelmRelease", "kube-system", "cilium"),
+        Node("HelmRelease", "kube-system", "coredns"),
+    }
+    assert graph.deps(Node("Kustomization", "kube-system", "coredns")) == [
+        cilium, Node("Kustomization", "flux-system", "cluster-apps"),
+    ]
+    assert graph.deps(Node("HelmRelease", "kube-system", "cilium")) == [cilium]
+
+
+def test_levels_and_critical_path(kubernetes):
+    report = flux_graph.analyze(flux_graph.load(kubernetes({})), details=True)
+    assert report["errors"] == report["warnings"] == []
+    assert report["depth"] == 4
+    assert [len(level) for level in report["levels"]] == [1, 1, 2, 1]
+    assert report["critical_path"] == [
+        "Kustomization/flux-system/cluster-apps",
+        "Kustomization/kube-system/cilium",
+        "Kustomization/kube-system/coredns",
+        "HelmRelease/kube-system/coredns",
+    ]
+    assert report["critical_edges"] == [{
+        "dependent": "Kustomization/kube-system/coredns",
+        "dependency": "Kustomization/kube-system/cilium",
+        "depth_without": 3,
+    }]
+
+
+def test_cycles_and_dangling_references(kubernetes):
+    root = kubernetes({
+        "apps/kube-system/cilium/ks.yaml": ks("cilium", "kube-system/cilium/app", ["coredns"], target="kube-system"),
+        "apps/kube-system/spegel/ks.yaml": ks("spegel", "kube-system/spegel/app", ["missing"]),
+    })
+    report = flux_graph.analyze(flux_graph.load(root))
+    assert report["errors"] == [
+        "Kustomization/kube-system/spegel depends on Kustomization/kube-system/missing, which is not rendered",
+        "dependency cycle: Kustomization/kube-system/cilium -> Kustomization/kube-system/coredns"
+        " -> Kustomization/kube-system/cilium",
+    ]
+    assert "depth" not in report
+
+
+def test_redundant_and_weak_edges(kubernetes):
+    root = kubernetes({
+        "apps/kube-system/spegel/ks.yaml": ks("spegel", "kube-system/spegel/app", ["coredns", "cilium"]),
+    })
+    report = flux_graph.analyze(flux_graph.load(root), details=True)
+    assert report["warnings"] == [
+        "Kustomization/kube-system/spegel -> Kustomization/kube-system/cilium is redundant: "
+        "already implied by its other dependencies",
+        "Kustomization/kube-system/spegel -> Kustomization/kube-system/coredns is weak: "
+        "coredns neither waits nor has health checks",
+    ]
+
+
+def test_gate_skips_warnings_and_critical_edges(kubernetes):
+    root = kubernetes({
+        "apps/kube-system/spegel/ks.yaml": ks("spegel", "kube-system/spegel/app", ["coredns", "cilium"]),
+    })
+    report = flux_graph.analyze(flux_graph.load(root))
+    assert report["warnings"] == [] and "critical_edges" not in report
+    assert report["depth"] == 4
+
+
+def test_single_pass_analysis_matches_edge_removal():
+    rng = random.Random(1)
+    graph = flux_graph.Graph()
+    nodes = [Node("Kustomization", "default", f"ks-{i}") for i in range(60)]
+    graph.nodes = dict.fromkeys(nodes, {})
+    for i, node in enumerate(nodes[1:], 1):
+        for dep in rng.sample(nodes[:i], min(i, rng.randint(1, 3))):
+            graph.add_edge(flux_graph.Edge(node, dep, explicit=rng.random() < 0.8))
+
+    def reaches(edge: flux_graph.Edge) -> bool:
+        seen, work = set(), [edge.dependent]
+        while work:
+            for dep in graph.deps(work.pop(), skip=edge):
+                if dep not in seen:
+                    seen.add(dep)
+                    work.append(dep)
+        return edge.dependency in seen
+
+    levels = graph.levels()
+    depth = max(levels.values()) + 1
+    assert graph.redundant(levels) == [edge for edge in graph.edges if edge.explicit and reaches(edge)]
+    shorter = [(edge, max(graph.levels(skip=edge).values()) + 1) for edge in graph.edges if edge.explicit]
+    assert graph.critical(levels) == sorted((edge, d) for edge, d in shorter if d < depth)
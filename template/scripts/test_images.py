@@ -0,0 +1,112 @@
+"""Unit tests for the image inventory.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_images.py -q
+"""
+
+from pathlib import Path
+
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import images  # noqa: E402
+from images import Image  # noqa: E402
+
+DIGEST = "sha256:" + "a" * 64
+
+
+@pytest.mark.parametrize("ref, expected", [
+    ("nginx", Image("docker.io/library/nginx")),
+    ("nginx:1.27", Image("docker.io/library/nginx", "1.27")),
+    ("bitnami/redis:7", Image("docker.io/bitnami/redis", "7")),
+    ("localhost:5000/app:v1", Image("localhost:5000/app", "v1")),
+    (f"ghcr.io/org/app:v1@{DIGEST}", Image("ghcr.io/org/app", "v1", DIGEST)),
+    (f"quay.io/cilium/cilium@{DIGEST}", Image("quay.io/cilium/cilium", None, DIGEST)),
+    ("{{ .Values.image }}", None),
+])
+def test_parse_normalizes_references(ref: str, expected: Image | None):
+    assert images.parse(ref) == expected
+
+
+def test_inventory_dedupes_and_prefers_digests():
+    inventory = images.Inventory()
+    inventory.add([
+        {
+            "kind": "HelmRelease",
+            "spec": {"values": {
+                "image": {"repository": "mirror.gcr.io/coredns/coredns"},
+                "operator": {"image": {"registry": "quay.io", "repository": "cilium/operator", "tag": "v1.2"}},
+                "sidecars": [{"image": "busybox:1.36"}],
+            }},
+        },
+        {"kind": "Deployment", "spec": {"template": {"spec": {"containers": [
+            {"image": f"quay.io/cilium/operator:v1.2@{DIGEST}"},
+            {"image": "busybox:1.36", "imagePullPolicy": "IfNotPresent"},
+        ]}}}},
+        {"kind": "OCIRepository", "spec": {"url": "oci://quay.io/cilium/charts/cilium", "ref": {"tag": "1.20.1"}}},
+    ])
+    report = inventory.report()
+    assert report["images"] == ["docker.io/library/busybox:1.36", f"quay.io/cilium/operator:v1.2@{DIGEST}"]
+    assert report["unpinned"] == ["mirror.gcr.io/coredns/coredns"]
+    assert report["artifacts"] == ["quay.io/cilium/charts/cilium:1.20.1"]
+
+    # The chart's own manifests pin what the values left open.
+    inventory.add([{"kind": "Deployment", "spec": {"containers": [{"image": "mirror.gcr.io/coredns/coredns:1.12.4"}]}}])
+    assert inventory.report()["unpinned"] == []
+
+
+def test_main_skips_secrets_and_keeps_unchanged_list(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    app = tmp_path / "kubernetes/apps/default/echo/app"
+    app.mkdir(parents=True)
+    (app / "helmrelease.yaml").write_text("kind: HelmRelease\nspec:\n  values:\n    image: ghcr.io/echo:1\n")
+    (app / "secret.sops.yaml").write_text("image: {{ not yaml")
+    monkeypatch.setattr(sys, "argv", ["images.py", str(tmp_path), "--manifests"])
+    assert images.main() == 0
+    output = tmp_path / "talos/images.txt"
+    assert output.read_text() == images.HEADER + "ghcr.io/echo:1\n"
+    mtime = output.stat().st_mtime_ns
+    assert images.main() == 0
+    assert output.stat().st_mtime_ns == mtime
+
+
+def test_image_repository_keys_are_found():
+    values = {"container": {"imageRepository": "mirror.gcr.io/envoyproxy/envoy"}}
+    assert list(images.find_images(values)) == [Image("mirror.gcr.io/envoyproxy/envoy")]
+
+
+def test_chart_cache_is_stamped_with_chart_versions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+):
+    monkeypatch.setattr(images, "CHART_CACHE", tmp_path / ".cache/charts.yaml")
+    app = tmp_path / "kubernetes/apps/default/echo/app"
+    app.mkdir(parents=True)
+    (app / "ocirepository.yaml").write_text(
+        "kind: OCIRepository\nspec:\n  url: oci://ghcr.io/charts/echo\n  ref:\n    tag: 1.0.0\n"
+    )
+    output = tmp_path / "talos/images.txt"
+    monkeypatch.setattr(sys, "argv", ["images.py", str(tmp_path)])
+    assert images.main() == 0
+    assert "1 chart artifacts but no chart stream" in capsys.readouterr().err
+    assert output.read_text() == images.HEADER
+
+    stream = tmp_path / "stream.yaml"
+    stream.write_text("kind: Deployment\nspec:\n  containers:\n    - image: ghcr.io/echo:1\n")
+    monkeypatch.setattr(sys, "argv", ["images.py", str(tmp_path), "--cache-charts", str(stream)])
+    assert images.main() == 0
+    monkeypatch.setattr(sys, "argv", ["images.py", str(tmp_path)])
+    assert images.main() == 0
+    assert "no chart stream" not in capsys.readouterr().err
+    assert output.read_text() == images.HEADER + "ghcr.io/echo:1\n"
+
+    # A chart upgrade makes the cached stream stale.
+    (app / "ocirepository.yaml").write_text(
+        "kind: OCIRepository\nspec:\n  url: oci://ghcr.io/charts/echo\n  ref:\n    tag: 2.0.0\n"
+    )
+    assert images.main() == 0
+    err = capsys.readouterr().err
+    assert "rendered from other chart versions, ignored" in err
+    assert "1 chart artifacts but no chart stream" in err
+    assert output.read_text() == images.HEADER
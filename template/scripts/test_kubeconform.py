@@ -0,0 +1,83 @@
+"""Unit tests for the parallel kubeconform driver.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_kubeconform.py -q
+"""
+
+from pathlib import Path
+
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import kubeconform  # noqa: E402
+
+
+@pytest.fixture
+def tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    for directory in ("flux/cluster", "apps/network", "apps/network/echo/app", "apps/broken"):
+        (tmp_path / directory).mkdir(parents=True)
+    for directory in ("apps/network", "apps/network/echo/app", "apps/broken"):
+        (tmp_path / directory / "kustomization.yaml").write_text("")
+    # Stand-ins for the real binaries: kustomize fails for apps/broken.
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "kustomize").write_text(
+        '#!/bin/sh\ncase "$2" in *broken*) echo "broken build" >&2; exit 1;; esac\necho "kind: ConfigMap"\n'
+    )
+    (bin_dir / "kubeconform").write_text("#!/bin/sh\ncat >/dev/null\necho valid\n")
+    for tool in bin_dir.iterdir():
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{Path('/usr/bin')}:{Path('/bin')}")
+    return tmp_path
+
+
+def test_jobs_keep_serial_order_and_headers(tree: Path):
+    headers = [job.header for job in kubeconform.jobs(tree)]
+    assert headers == [
+        f"=== Validating standalone manifests in {tree}/flux ===",
+        f"=== Validating kustomizations in {tree}/flux ===",
+        f"=== Validating kustomizations in {tree}/apps ===",
+        f"=== Validating kustomizations in {tree}/apps/broken/ ===",
+        f"=== Validating kustomizations in {tree}/apps/network/echo/app/ ===",
+        f"=== Validating kustomizations in {tree}/apps/network/ ===",
+    ]
+
+
+def test_failures_are_collected(tree: Path, monkeypatch: pytest.MonkeyPatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["kubeconform.py", str(tree), "--jobs", "4"])
+    assert kubeconform.main() == 1
+    out, err = capsys.readouterr()
+    assert out.count("valid") == 2
+    assert "broken build" in err
+    assert f"=== 1 failed ===\n  {tree}/apps/broken" in err
+
+
+def test_select_keeps_jobs_covering_dirty_paths(tree: Path):
+    found = kubeconform.jobs(tree)
+    selected = kubeconform.select(found, [tree / "apps/network/echo/app/helmrelease.yaml"])
+    assert [job.header for job in selected] == [
+        f"=== Validating kustomizations in {tree}/apps ===",
+        f"=== Validating kustomizations in {tree}/apps/network/echo/app/ ===",
+        f"=== Validating kustomizations in {tree}/apps/network/ ===",
+    ]
+    # Nothing builds components/ on its own, so a change there checks all.
+    assert kubeconform.select(found, [tree / "components/sops/secret.sops.yaml"]) == found
+
+
+def test_schema_gaps_are_reported_online(tree: Path, monkeypatch: pytest.MonkeyPatch, capsys):
+    (tree / "apps/broken/kustomization.yaml").unlink()
+    bin_dir = tree / "bin"
+    (bin_dir / "kustomize").write_text(
+        '#!/bin/sh\nprintf "apiVersion: example.io/v1\\nkind: Widget\\n---\\napiVersion: v1\\nkind: Secret\\n"\n'
+    )
+    (bin_dir / "kubeconform").write_text(
+        "#!/bin/sh\ncat >/dev/null\necho 'stdin - Widget w skipped'\necho 'stdin - Secret s skipped'\n"
+    )
+    monkeypatch.setattr(sys, "argv", ["kubeconform.py", str(tree), "--schemas", str(tree / "store")])
+    assert kubeconform.main() == 0
+    assert "=== 1 resource types without a schema, not validated ===\n  example.io/widget/v1\n" in capsys.readouterr().err
+    monkeypatch.setattr(sys, "argv", [*sys.argv, "--fail-on-gaps"])
+    assert kubeconform.main() == 1
@@ -0,0 +1,168 @@
+"""Unit tests for the makejinja plugin's secret-file readers.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_plugin.py -q
+"""
+
+from pathlib import Path
+
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import plugin  # noqa: E402
+import validate  # noqa: E402
+
+TUNNEL = {"AccountTag": "a", "TunnelID": "t", "TunnelSecret": "s"}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    plugin.file_cache.clear()
+
+
+def test_each_file_is_read_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    tunnel = tmp_path / "cloudflare-tunnel.json"
+    tunnel.write_text(json.dumps(TUNNEL))
+    reads: list[Path] = []
+    read_text = Path.read_text
+    monkeypatch.setattr(Path, "read_text", lambda self, *a, **kw: reads.append(self) or read_text(self, *a, **kw))
+
+    for _ in range(3):
+        assert plugin.cloudflare_tunnel_id(str(tunnel)) == "t"
+        token = plugin.cloudflare_tunnel_secret(str(tunnel))
+    assert json.loads(base64.b64decode(token)) == {"a": "a", "t": "t", "s": "s"}
+    assert reads == [tunnel]
+    # Later calls are answered by the functions themselves; the first
+    # cloudflare_tunnel_secret call reuses the parsed JSON.
+    assert plugin.file_cache.hits == 5
+
+
+def test_cached_json_is_not_shared(tmp_path: Path):
+    tunnel = tmp_path / "cloudflare-tunnel.json"
+    tunnel.write_text(json.dumps(TUNNEL))
+    plugin._read_json(str(tunnel))["TunnelID"] = "changed"
+    assert plugin._read_json(str(tunnel)) == TUNNEL
+
+
+def test_edit_invalidates_entry(tmp_path: Path):
+    token = tmp_path / "flux-webhook-token.txt"
+    token.write_text("first\n")
+    assert plugin.webhook_token(str(token)) == "first"
+    token.write_text("second\n")
+    os.utime(token, ns=(0, 0))
+    assert plugin.webhook_token(str(token)) == "second"
+    assert plugin.file_cache.hits == 0
+
+
+def test_errors_are_not_cached(tmp_path: Path):
+    key = tmp_path / "deploy.key"
+    key.write_text("")
+    with pytest.raises(ValueError, match="is empty"):
+        plugin.deploy_key(str(key))
+    key.write_text("ssh-key")
+    assert plugin.deploy_key(str(key)) == "ssh-key"
+    with pytest.raises(FileNotFoundError, match="File not found"):
+        plugin.deploy_key(str(tmp_path / "missing.key"))
+
+
+def test_bootstrap_plan_waves_and_minimal_needs():
+    prerequisites = validate.Bootstrap().prerequisites()
+    plan = plugin.bootstrap_plan(prerequisites, set(validate.BOOTSTRAP_RELEASES))
+    assert plan['waves'] == [['cilium'], ['coredns', 'spegel'], ['cert-manager', 'flux-operator'], ['flux-instance']]
+    needs = {release['name']: release['needs'] for release in plan['releases']}
+    assert needs['cert-manager'] == ['kube-system/coredns']
+
+    # A disabled release is bypassed and implied needs are dropped.
+    prerequisites['cert-manager'] = ['spegel', 'cilium', 'coredns']
+    plan = plugin.bootstrap_plan(prerequisites, set(validate.BOOTSTRAP_RELEASES) - {'spegel'})
+    needs = {release['name']: release['needs'] for release in plan['releases']}
+    assert 'spegel' not in needs
+    assert needs['cert-manager'] == ['kube-system/coredns']
+
+
+def _nodes(controllers: int, zones: list[str | None]) -> list[dict]:
+    return [
+        {'name': f'cp-{i}', 'address': f'10.0.0.{i}', 'controller': True, 'zone': None}
+        for i in range(controllers)
+    ] + [
+        {'name': f'w-{i}', 'address': f'10.0.1.{i}', 'controller': False, 'zone': zone}
+        for i, zone in enumerate(zones)
+    ]
+
+
+def test_upgrade_plan_keeps_controllers_serial():
+    plan = plugin.upgrade_plan(_nodes(3, [None] * 5), {'worker_batch': 2, 'spread_zones': True})
+    assert [(batch['role'], [n['name'] for n in batch['nodes']]) for batch in plan] == [
+        ('controller', ['cp-0']),
+        ('controller', ['cp-1']),
+        ('controller', ['cp-2']),
+        ('worker', ['w-0', 'w-1']),
+        ('worker', ['w-2', 'w-3']),
+        ('worker', ['w-4']),
+    ]
+
+
+def test_upgrade_plan_percentage_spread_across_zones():
+    zones = ['a', 'a', 'a', 'a', 'b', 'b', 'b', 'b']
+    plan = plugin.upgrade_plan(_nodes(1, zones), {'worker_batch': '25%', 'spread_zones': True})
+    workers = [[n['zone'] for n in batch['nodes']] for batch in plan if batch['role'] == 'worker']
+    assert workers == [['a', 'b']] * 4
+    plan = plugin.upgrade_plan(_nodes(1, zones), {'worker_batch': '25%', 'spread_zones': False})
+    workers = [[n['zone'] for n in batch['nodes']] for batch in plan if batch['role'] == 'worker']
+    assert workers == [['a', 'a'], ['a', 'a'], ['b', 'b'], ['b', 'b']]
+    # Rounded down, but never below one node.
+    plan = plugin.upgrade_plan(_nodes(1, ['a', 'b']), {'worker_batch': '10%', 'spread_zones': True})
+    assert [len(batch['nodes']) for batch in plan] == [1, 1, 1]
+
+
+def test_flux_plan_scales_with_apps_and_nodes():
+    defaults = validate.Flux().model_dump()
+    plan = plugin.flux_plan(defaults, [f'app-{i}' for i in range(14)], 1)
+    assert (plan['concurrency'], plan['memory'], plan['shards'], plan['assignments']) == (10, '1Gi', [], {})
+
+    apps = [f'app-{i}' for i in range(250)]
+    plan = plugin.flux_plan(defaults, apps, 3)
+    assert (plan['concurrency'], plan['memory'], plan['shards']) == (30, '2Gi', ['shard1', 'shard2'])
+    sharded = plan['assignments']['shard1'] + plan['assignments']['shard2']
+    assert 0 < len(sharded) < len(apps) and len(set(sharded)) == len(sharded)
+    # Adding an app leaves the others where they were.
+    grown = plugin.flux_plan(defaults, ['new', *apps], 3)['assignments']
+    assert {shard: [app for app in names if app != 'new'] for shard, names in grown.items()} == plan['assignments']
+
+    plan = plugin.flux_plan(defaults | {'concurrency': 40, 'memory': '768Mi', 'shards': 0}, apps, 3)
+    assert (plan['concurrency'], plan['memory'], plan['shards']) == (40, '768Mi', [])
+
+
+def _kustomizations(*names: str) -> str:
+    return ''.join(
+        f'---\napiVersion: kustomize.toolkit.fluxcd.io/v1\nkind: Kustomization\nmetadata:\n  name: {name}\n'
+        for name in names
+    )
+
+
+def test_flux_apps_skips_flux_system(tmp_path: Path):
+    for path in ['kube-system/coredns/ks.yaml.j2', 'flux-system/flux-instance/ks.yaml.j2']:
+        (tmp_path / 'template' / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / 'template' / path).write_text('#% if true %#\n' + _kustomizations(Path(path).parent.name) + '#% endif %#\n')
+    (tmp_path / 'template/default/echo/app').mkdir(parents=True)
+    (tmp_path / 'template/default/echo/app/helmrelease.yaml').write_text(_kustomizations('echo'))
+    (tmp_path / 'rendered/media/plex').mkdir(parents=True)
+    (tmp_path / 'rendered/media/plex/ks.yaml').write_text(_kustomizations('plex'))
+    assert plugin.flux_apps([str(tmp_path / 'template'), str(tmp_path / 'rendered')]) == ['coredns', 'plex']
+
+
+def test_flux_apps_reads_kustomization_names(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / 'media/plex').mkdir(parents=True)
+    (tmp_path / 'media/plex/ks.yaml').write_text(
+        _kustomizations('plex', 'plex-config') + '---\napiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: other\n'
+    )
+    # Relative directories resolve from the repository root, not the cwd.
+    monkeypatch.chdir(tmp_path)
+    assert plugin.flux_apps([str(tmp_path)]) == ['plex', 'plex-config']
+    assert 'cert-manager' in plugin.flux_apps(['template/config/kubernetes/apps'])
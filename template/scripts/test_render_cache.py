@@ -0,0 +1,97 @@
+"""Unit tests for the makejinja render cache.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_render_cache.py -q
+"""
+
+from pathlib import Path
+
+import sys
+
+import jinja2
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from render_cache import RenderCache  # noqa: E402
+
+DELIMITERS = {
+    "block_start_string": "#%",
+    "block_end_string": "%#",
+    "variable_start_string": "#{",
+    "variable_end_string": "}#",
+    "comment_start_string": "#|",
+    "comment_end_string": "#|",
+}
+
+
+def secret(file_path: str = "secret.txt") -> str:
+    return Path(file_path).read_text()
+
+
+@pytest.fixture
+def tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in").mkdir()
+    (tmp_path / "out").mkdir()
+    (tmp_path / "in/nodes.yaml.j2").write_text(
+        "#% for item in nodes %#\n- #{ item }#\n#% endfor %#\n"
+    )
+    (tmp_path / "in/domain.yaml.j2").write_text("domain: #{ domain }#\n")
+    (tmp_path / "in/partial.yaml.j2").write_text("#% include 'header.j2' %#\nbody\n")
+    (tmp_path / "in/header.j2").write_text("# header v1\n")
+    (tmp_path / "in/secret.yaml.j2").write_text("key: #{ secret() }#\n")
+    (tmp_path / "secret.txt").write_text("s1")
+    return tmp_path
+
+
+def render(tree: Path, data: dict) -> set[str]:
+    """Run one render pass the way makejinja does; return rendered names."""
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(tree / "in"), **DELIMITERS)
+    env.globals.update(data, secret=secret)
+    cache = RenderCache(
+        env,
+        inputs=[tree / "in"],
+        output=tree / "out",
+        jinja_suffix=".j2",
+        functions=[secret],
+        cache_file=tree / "cache.json",
+    )
+    rendered = set()
+    for path in sorted((tree / "in").glob("*.yaml.j2")):
+        if cache.stale(path):
+            name = path.name
+            (tree / "out" / name.removesuffix(".j2")).write_text(env.get_template(name).render())
+            rendered.add(name)
+    cache.save()
+    return rendered
+
+
+DATA = {"nodes": ["k8s-0", "k8s-1"], "domain": "example.com"}
+ALL = {"nodes.yaml.j2", "domain.yaml.j2", "partial.yaml.j2", "secret.yaml.j2"}
+
+
+def test_unchanged_inputs_are_skipped(tree: Path):
+    assert render(tree, DATA) == ALL
+    mtime = (tree / "out/nodes.yaml").stat().st_mtime_ns
+    assert render(tree, DATA) == set()
+    assert (tree / "out/nodes.yaml").stat().st_mtime_ns == mtime
+
+
+def test_only_templates_referencing_changed_data_rerender(tree: Path):
+    render(tree, DATA)
+    assert render(tree, DATA | {"nodes": ["k8s-0"]}) == {"nodes.yaml.j2"}
+
+
+def test_included_partial_and_secret_file_are_keyed(tree: Path):
+    render(tree, DATA)
+    (tree / "in/header.j2").write_text("# header v2\n")
+    assert render(tree, DATA) == {"partial.yaml.j2"}
+    (tree / "secret.txt").write_text("s2")
+    assert render(tree, DATA) == {"secret.yaml.j2"}
+
+
+def test_missing_output_is_rerendered(tree: Path):
+    render(tree, DATA)
+    (tree / "out/domain.yaml").unlink()
+    assert render(tree, DATA) == {"domain.yaml.j2"}
@@ -0,0 +1,171 @@
+"""Unit tests for the write-only-if-changed render sync.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_render_manifest.py -q
+"""
+
+from pathlib import Path
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import render_manifest  # noqa: E402
+from render_manifest import Manifest  # noqa: E402
+
+
+@pytest.fixture
+def dirs(tmp_path: Path) -> tuple[Path, Path, Path]:
+    staging, root = tmp_path / "staging", tmp_path / "root"
+    staging.mkdir()
+    root.mkdir()
+    return staging, root, tmp_path / "render-manifest.json"
+
+
+def stage(staging: Path, files: dict[str, str]) -> set[Path]:
+    for name, content in files.items():
+        (staging / name).parent.mkdir(parents=True, exist_ok=True)
+        (staging / name).write_text(content)
+    return {Path(name) for name in files}
+
+
+def sync(staging: Path, root: Path, manifest_file: Path, expected: set[Path]) -> Manifest:
+    manifest = Manifest(manifest_file)
+    render_manifest.sync(staging, root, manifest, expected)
+    return Manifest(manifest_file)
+
+
+def test_unchanged_outputs_are_left_alone(dirs):
+    staging, root, manifest_file = dirs
+    expected = stage(staging, {"talos/talconfig.yaml": "a\n", "kubernetes/flux/cluster/ks.yaml": "b\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.added == ["kubernetes/flux/cluster/ks.yaml", "talos/talconfig.yaml"]
+    os.utime(root / "talos/talconfig.yaml", ns=(0, 0))
+
+    stage(staging, {"kubernetes/flux/cluster/ks.yaml": "c\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert (manifest.added, manifest.changed, manifest.removed) == ([], ["kubernetes/flux/cluster/ks.yaml"], [])
+    assert (root / "talos/talconfig.yaml").stat().st_mtime_ns == 0
+    assert (root / "kubernetes/flux/cluster/ks.yaml").read_text() == "c\n"
+
+
+def test_outputs_no_longer_rendered_are_removed(dirs):
+    staging, root, manifest_file = dirs
+    expected = stage(staging, {"kubernetes/apps/network/tunnel/app/hr.yaml": "a\n", "talos/talconfig.yaml": "b\n"})
+    sync(staging, root, manifest_file, expected)
+
+    # The template is still there but renders empty now.
+    (staging / "kubernetes/apps/network/tunnel/app/hr.yaml").unlink()
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.removed == ["kubernetes/apps/network/tunnel/app/hr.yaml"]
+    assert not (root / "kubernetes").exists()
+
+    # The template is gone entirely: its staged output goes too.
+    stage(staging, {"kubernetes/stale.yaml": "c\n"})
+    manifest = sync(staging, root, manifest_file, {Path("talos/talconfig.yaml")})
+    assert not (staging / "kubernetes/stale.yaml").exists()
+    assert manifest.added == []
+
+
+def test_dirty_paths_accumulate_until_cleared(dirs):
+    staging, root, manifest_file = dirs
+    expected = stage(staging, {"talos/talconfig.yaml": "a\n", "kubernetes/ks.yaml": "b\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    # Never succeeded: everything is pending.
+    assert manifest.pending("validate-talos", ["talos/"]) is None
+
+    manifest.clear("validate-talos")
+    assert Manifest(manifest_file).pending("validate-talos", ["talos/"]) == []
+
+    stage(staging, {"kubernetes/ks.yaml": "c\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.pending("validate-talos", ["talos/"]) == []
+    assert manifest.pending("validate-talos") == ["kubernetes/ks.yaml"]
+    # A failed stage keeps its work for the next run.
+    stage(staging, {"talos/talconfig.yaml": "d\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.pending("validate-talos", ["talos/"]) == ["talos/talconfig.yaml"]
+    assert manifest.pending("validate-kubernetes") is None
+
+
+def test_stage_key_covers_tools_and_unrendered_files(dirs, monkeypatch: pytest.MonkeyPatch):
+    staging, root, manifest_file = dirs
+    expected = stage(staging, {"talos/talconfig.yaml": "a\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    bin_dir = root.parent / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "topf").write_text("#!/bin/sh\necho topf v0.1.0\n")
+    (bin_dir / "topf").chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    (root / "talos/secrets.sops.yaml").write_text("sops: {}\n")
+    key = manifest.key("validate-talos", ["talos/"], root=root)
+    manifest.clear("validate-talos", key)
+    manifest = Manifest(manifest_file)
+    assert manifest.pending("validate-talos", ["talos/"], key) == []
+
+    # Rendered outputs are tracked by digest, not by the key.
+    os.utime(root / "talos/talconfig.yaml", ns=(0, 0))
+    assert manifest.key("validate-talos", ["talos/"], root=root) == key
+    (root / "talos/secrets.sops.yaml").write_text("sops: {mac: x}\n")
+    changed = manifest.key("validate-talos", ["talos/"], root=root)
+    assert changed != key
+    assert manifest.pending("validate-talos", ["talos/"], changed) is None
+    manifest.clear("validate-talos", changed)
+    (bin_dir / "topf").write_text("#!/bin/sh\necho topf v0.2.0\n")
+    assert manifest.key("validate-talos", ["talos/"], root=root) != changed
+    # Extra inputs, such as kubeconform's flags, count too.
+    assert manifest.key("validate-talos", ["talos/"], ["--offline"], root=root) != manifest.key("validate-talos", ["talos/"], root=root)
+
+
+def test_encrypted_outputs_match_their_plaintext(dirs, monkeypatch: pytest.MonkeyPatch):
+    staging, root, manifest_file = dirs
+    name = "kubernetes/components/sops/cluster-secrets.sops.yaml"
+    expected = stage(staging, {name: "stringData:\n  key: value\n"})
+    sync(staging, root, manifest_file, expected)
+    # encrypt-secrets rewrites the output in place after the render.
+    (root / name).write_text("stringData:\n  key: ENC[AES256_GCM,data:...]\nsops:\n  version: 3.9.0\n")
+    decrypted = []
+    monkeypatch.setattr(render_manifest, "_decrypt", lambda path: decrypted.append(path) or b'stringData: {"key": "value"}\n')
+    # No plaintext is left behind; secrets are rendered on every run.
+    assert not (staging / name).exists()
+
+    stage(staging, {name: "stringData:\n  key: value\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.changed == []
+    assert "ENC[" in (root / name).read_text()
+    # The digests recorded for the encrypted file skip sops afterwards.
+    stage(staging, {name: "stringData:\n  key: value\n"})
+    sync(staging, root, manifest_file, expected)
+    assert decrypted == [root / name]
+
+    stage(staging, {name: "stringData:\n  key: rotated\n"})
+    manifest = sync(staging, root, manifest_file, expected)
+    assert manifest.changed == [name]
+    assert (root / name).read_text() == "stringData:\n  key: rotated\n"
+
+
+def test_first_render_reports_untracked_files(dirs):
+    staging, root, manifest_file = dirs
+    expected = {Path("talos/all/30-kubelet.yaml.tpl"), Path("talos/topf.yaml")}
+    for name in ("talos/all/30-kubelet.yaml", "talos/secrets.sops.yaml", "talos/topf.yaml", "README.md"):
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text("")
+    assert not Manifest(manifest_file).recorded
+    assert render_manifest.untracked(root, expected) == ["talos/all/30-kubelet.yaml", "talos/secrets.sops.yaml"]
+    sync(staging, root, manifest_file, stage(staging, {"talos/topf.yaml": "a\n"}))
+    assert Manifest(manifest_file).recorded
+
+
+def test_retired_outputs_are_removed_without_a_record(dirs):
+    staging, root, manifest_file = dirs
+    (root / "talos/all").mkdir(parents=True)
+    (root / "talos/all/30-kubelet.yaml").write_text("machine: {}\n")
+    expected = stage(staging, {"talos/all/30-kubelet.yaml.tpl": "machine: {}\n"})
+    manifest = Manifest(manifest_file)
+    render_manifest.retire(root, manifest, expected)
+    render_manifest.sync(staging, root, manifest, expected)
+    assert manifest.removed == ["talos/all/30-kubelet.yaml"]
+    assert sorted(path.name for path in (root / "talos/all").iterdir()) == ["30-kubelet.yaml.tpl"]
@@ -0,0 +1,72 @@
+"""Unit tests for the opt-in render profiler.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_render_profile.py -q
+"""
+
+from pathlib import Path
+
+import json
+import sys
+
+import jinja2
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from render_cache import RenderCache  # noqa: E402
+from render_profile import ProfiledTemplate, RenderProfile, stage, summary  # noqa: E402
+
+
+def test_templates_and_function_calls_are_attributed(tmp_path: Path):
+    env = jinja2.Environment(loader=jinja2.DictLoader({
+        "a.j2": "{{ key() }}{{ key() }}",
+        "b.j2": "{% include 'part.j2' %}",
+        "part.j2": "{% for i in range(100) %}{{ i }}{% endfor %}",
+    }))
+    profile = RenderProfile(tmp_path / "render.json")
+    profile.attach(env)
+    env.globals["key"] = profile.wrap(lambda: "k")
+    with profile.phase("data"):
+        pass
+
+    assert env.get_template("a.j2").render() == "kk"
+    env.get_template("b.j2").render()
+    report = profile.report()
+
+    templates = {entry["name"]: entry for entry in report["templates"]}
+    assert set(templates) >= {"a.j2", "b.j2"}
+    assert templates["a.j2"]["calls"] == {"<lambda>": 2}
+    assert templates["a.j2"]["bytes"] == 2
+    assert templates["b.j2"]["bytes"] == len("".join(map(str, range(100))))
+    assert templates["a.j2"]["compile_seconds"] > 0
+    assert report["functions"]["<lambda>"]["calls"] == 2
+    assert "data" in report["phases"]
+
+    profile.save()
+    assert json.loads((tmp_path / "render.json").read_text())["templates"]
+
+
+def test_profile_and_cache_compose(tmp_path: Path, capsys):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in/a.j2").write_text("a")
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(tmp_path / "in"))
+    profile = RenderProfile(tmp_path / "render.json")
+    profile.attach(env)
+    cache = RenderCache(env, [tmp_path / "in"], tmp_path / "out", ".j2", cache_file=tmp_path / "cache.json")
+    assert env.template_class is ProfiledTemplate
+    assert cache.stale(tmp_path / "in/a.j2")
+    env.get_template("a.j2").render()
+    assert profile.report()["templates"][0]["bytes"] == 1
+    assert "a.j2" in cache._entries
+    # Nothing is written until save() is called.
+    assert not (tmp_path / "render.json").exists() and not capsys.readouterr().err
+
+
+def test_pipeline_stages_are_logged_and_summarized(tmp_path: Path, capsys):
+    log = tmp_path / "pipeline.jsonl"
+    assert stage("ok", [sys.executable, "-c", "pass"], log) == 0
+    assert stage("fail", [sys.executable, "-c", "raise SystemExit(3)"], log) == 3
+    assert [json.loads(line)["rc"] for line in log.read_text().splitlines()] == [0, 3]
+    summary(5, log, tmp_path / "absent.json")
+    err = capsys.readouterr().err
+    assert "=== Pipeline:" in err and "fail  (exit 3)" in err
@@ -0,0 +1,133 @@
+"""Unit tests for the offline kubeconform schema store.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_schemas.py -q
+"""
+
+from pathlib import Path
+
+import io
+import json
+import sys
+import tarfile
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kubeconform import resource_types  # noqa: E402
+from schemas import SchemaStore  # noqa: E402
+
+CRD = """
+apiVersion: apiextensions.k8s.io/v1
+kind: CustomResourceDefinition
+metadata:
+  name: certificates.cert-manager.io
+spec:
+  group: cert-manager.io
+  names:
+    kind: Certificate
+  versions:
+    - name: v1
+      schema:
+        openAPIV3Schema:
+          type: object
+          properties:
+            spec:
+              type: object
+              properties:
+                port:
+                  x-kubernetes-int-or-string: true
+                  type: string
+                values:
+                  type: object
+                  x-kubernetes-preserve-unknown-fields: true
+                  properties:
+                    a:
+                      type: string
+"""
+
+
+def test_build_converts_crds_to_strict_schemas(tmp_path: Path):
+    store = SchemaStore(tmp_path)
+    assert store.build(yaml.safe_load_all(CRD)) == 1
+    assert store.resolve("cert-manager.io", "Certificate", "v1")
+    schema = json.loads((tmp_path / "view/cert-manager.io/certificate_v1.json").read_text())
+    spec = schema["properties"]["spec"]
+    assert schema["additionalProperties"] is False
+    assert spec["properties"]["port"] == {"oneOf": [{"type": "string"}, {"type": "integer"}]}
+    assert "additionalProperties" not in spec["properties"]["values"]
+
+
+def test_identical_schemas_share_one_blob(tmp_path: Path):
+    store = SchemaStore(tmp_path)
+    store.add("example.io", "Foo", "v1", b"{}")
+    store.add("example.io", "Bar", "v1", b"{}")
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+
+def test_import_tarball_and_builtin_group_fallback(tmp_path: Path):
+    tarball = tmp_path / "schemas.tar.gz"
+    with tarfile.open(tarball, "w:gz") as tar:
+        for name in (
+            "v1.36.0-standalone-strict/configmap-v1.json",
+            "v1.36.0-standalone-strict/deployment-apps-v1.json",
+            "v1.36.0-standalone-strict/networkpolicy-networking-v1.json",
+            "cert-manager.io/certificate_v1.json",
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = 2
+            tar.addfile(info, io.BytesIO(b"{}"))
+    store = SchemaStore(tmp_path / "store")
+    assert store.import_tarball(tarball) == 4
+    assert store.resolve("", "ConfigMap", "v1")
+    assert store.resolve("apps", "Deployment", "v1")
+    assert store.resolve("networking.k8s.io", "NetworkPolicy", "v1")
+    assert store.resolve("cert-manager.io", "Certificate", "v1")
+    assert not store.resolve("cert-manager.io", "Issuer", "v1")
+
+
+def test_export_round_trips(tmp_path: Path):
+    store = SchemaStore(tmp_path / "a")
+    store.build(yaml.safe_load_all(CRD))
+    store.export(tmp_path / "store.tar.gz")
+    copy = SchemaStore(tmp_path / "b")
+    assert copy.import_tarball(tmp_path / "store.tar.gz") == 1
+    assert copy.index == store.index
+
+
+def test_resource_types_reads_kustomize_output():
+    manifests = b"""---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: a
+---
+apiVersion: "helm.toolkit.fluxcd.io/v2"
+kind: HelmRelease
+spec:
+  values:
+    kind: NotAResource
+"""
+    assert resource_types(manifests) == {
+        ("", "ConfigMap", "v1"),
+        ("helm.toolkit.fluxcd.io", "HelmRelease", "v2"),
+    }
+
+
+def test_import_rejects_paths_outside_the_view(tmp_path: Path):
+    tarball = tmp_path / "store.tar.gz"
+    with tarfile.open(tarball, "w:gz") as tar:
+        digest = "0" * 64
+        for name, content in (("index.json", json.dumps({"../../etc/x/v1": digest}).encode()), (f"blobs/{digest}.json", b"{}")):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    store = SchemaStore(tmp_path / "store")
+    with pytest.raises(ValueError, match="invalid index entry"):
+        store.import_tarball(tarball)
+    with pytest.raises(ValueError, match="invalid resource type"):
+        store.add("..", "Foo", "v1", b"{}")
+    assert not store.resolve("../example.io", "Foo", "v1")
+    assert not (tmp_path / "store/view").exists()
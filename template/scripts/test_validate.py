@@ -6,7 +6,9 @@ Run from the repo root:
 
 from pathlib import Path
 
+import copy
 import sys
+import time
 import tomllib
 
 import pytest
@@ -14,6 +16,7 @@ import pytest
 sys.path.insert(0, str(Path(__file__).parent))
 
 from pydantic import ValidationError  # noqa: E402
+import validate  # noqa: E402
 from validate import Config, ConfigError, format_errors, load  # noqa: E402
 
 REPO_ROOT = Path(__file__).parents[2]
@@ -161,3 +164,411 @@ def test_gateways_may_leave_node_cidr_only_with_bgp():
     without_bgp = config_from("private.toml", **{"gateways.external": "192.168.50.1"})
     with pytest.raises(ConfigError, match="required unless BGP is enabled"):
         _load_raw(without_bgp)
+
+
+def test_all_conflicts_reported_together():
+    raw = config_from("private.toml")
+    raw["nodes"][0]["address"] = raw["gateways"]["internal"]
+    raw["nodes"][1]["address"] = "192.168.99.9"
+    raw["nodes"][1]["name"] = raw["nodes"][0]["name"]
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    lines = str(e.value).splitlines()
+    assert len(lines) == 3
+    assert any("gateways.internal and nodes[0].address" in line for line in lines)
+    assert any("nodes[1].address 192.168.99.9 is not inside node_cidr" in line for line in lines)
+    assert any("duplicate node name" in line for line in lines)
+
+
+def test_gateway_on_reserved_pool_address_rejected():
+    raw = config_from("private.toml", **{"gateways.dns": "10.10.10.255"})
+    with pytest.raises(ConfigError, match="broadcast address of node_cidr 10.10.10.0/24"):
+        _load_raw(raw)
+
+
+def test_full_loadbalancer_pool_accepted():
+    # A /29 leaves six pool addresses: the router, API VIP, two nodes and
+    # two gateway VIPs (no ingress) use every one of them without sharing any.
+    raw = config_from("private.toml", **{
+        "network.node_cidr": "10.10.10.0/29",
+        "network.default_gateway": "10.10.10.1",
+        "kubernetes.api.addr": "10.10.10.2",
+        "gateways.internal": "10.10.10.5",
+        "gateways.dns": "10.10.10.6",
+        "gateways.external": None,
+        "ingress.mode": "none",
+    })
+    raw["nodes"][0]["address"] = "10.10.10.3"
+    raw["nodes"][1]["address"] = "10.10.10.4"
+    _load_raw(raw)
+    raw["gateways"]["external"] = "10.10.10.4"
+    with pytest.raises(ConfigError, match=r"address 10\.10\.10\.4 is used by both"):
+        _load_raw(raw)
+
+
+def _fleet(size: int) -> dict:
+    raw = config_from("private.toml", **{"network.node_cidr": "10.0.0.0/16", "network.default_gateway": "10.0.0.1"})
+    raw["kubernetes"]["api"]["addr"] = "10.0.255.250"
+    raw["gateways"] |= {"internal": "10.0.255.251", "dns": "10.0.255.252", "external": "10.0.255.253"}
+    template = raw["nodes"][1]
+    raw["nodes"] = [
+        dict(template, name=f"node-{i}", address=f"10.0.{i // 250}.{i % 250 + 2}",
+             mac_addr=":".join(f"{b:02x}" for b in i.to_bytes(6)))
+        for i in range(size)
+    ]
+    raw["nodes"][0]["controller"] = True
+    return raw
+
+
+def _best_of(runs: int, raw: dict) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        _load_raw(copy.deepcopy(raw))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_large_fleet_validates_in_near_linear_time():
+    # Ten times the nodes must cost well under the hundredfold a pairwise
+    # check would; comparing two sizes keeps this independent of the host.
+    small, large = _best_of(3, _fleet(500)), _best_of(3, _fleet(5000))
+    assert large / small < 30
+
+
+def test_bootstrap_needs_overrides_are_checked():
+    raw = config_from("private.toml", **{"bootstrap.needs": {"cert-manager": ["spegel"]}})
+    prerequisites = _load_raw(raw).bootstrap.prerequisites()
+    assert prerequisites["cert-manager"] == ["spegel"]
+    assert prerequisites["coredns"] == ["cilium"]
+    raw = config_from("private.toml", **{"bootstrap.needs": {"cert-manager": ["vault"]}})
+    with pytest.raises(ConfigError, match="unknown bootstrap release 'vault'"):
+        _load_raw(raw)
+    raw = config_from("private.toml", **{"bootstrap.needs": {"coredns": ["flux-instance"]}})
+    with pytest.raises(ConfigError, match="cycle: coredns -> flux-instance -> flux-operator -> coredns"):
+        _load_raw(raw)
+
+
+def test_upgrade_worker_batch_count_or_percentage():
+    assert _load_raw(config_from("private.toml", **{"upgrade.worker_batch": "25%"})).upgrade.worker_batch == "25%"
+    assert _load_raw(config_from("private.toml", **{"upgrade.worker_batch": 3})).upgrade.worker_batch == 3
+    for bad in (0, "0%", "150%", "ten"):
+        with pytest.raises(ConfigError, match="worker_batch"):
+            _load_raw(config_from("private.toml", **{"upgrade.worker_batch": bad}))
+
+
+def test_performance_features_follow_enabled():
+    performance = _load_raw(config_from("private.toml", **{"cilium.performance": {"enabled": True, "xdp": False}})).cilium.performance
+    assert (performance.bbr, performance.netkit, performance.xdp, performance.host_routing) == (True, True, False, True)
+    performance = _load_raw(config_from("private.toml", **{"cilium.performance": {"big_tcp": True}})).cilium.performance
+    assert (performance.big_tcp, performance.bandwidth_manager, performance.host_routing) == (True, False, False)
+    raw = config_from("private.toml", **{"cilium.performance": {"bbr": True}})
+    with pytest.raises(ConfigError, match="bbr requires bandwidth_manager"):
+        _load_raw(raw)
+
+
+def test_performance_features_need_the_talos_kernel(monkeypatch):
+    monkeypatch.setattr(validate, "talos_kernel", lambda: ("v1.8.0", (6, 6)))
+    raw = config_from("private.toml", **{"cilium.performance": {"enabled": True, "xdp": False}})
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == [
+        "cilium.performance.netkit needs Linux 6.8 or newer, but Talos v1.8.0 ships 6.6",
+    ]
+    monkeypatch.setattr(validate, "talos_kernel", lambda: None)
+    _load_raw(raw)
+
+
+def test_bond_members_and_link_settings():
+    raw = config_from("private.toml")
+    node = raw["nodes"][0]
+    macs = [node["mac_addr"], "02:00:00:00:00:01"]
+    raw["nodes"][0] = dict(node, mac_addr=macs, bond={"mode": "802.3ad", "hash_policy": "layer3+4"},
+                           links=[{"mac_addr": macs[1], "rx_ring": 4096, "mtu": 9216}])
+    members = _load_raw(raw).nodes[0].members
+    assert [(link.mac_addr, link.rx_ring) for link in members] == [(macs[0], None), (macs[1], 4096)]
+
+    raw["nodes"][0]["links"] = [{"mac_addr": macs[0], "mtu": 1500}, {"mac_addr": macs[1], "mtu": 1400}]
+    raw["nodes"][0]["mtu"] = 1500
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == [
+        "nodes[0].links[1].mtu 1400 is below the node mtu 1500",
+        "nodes[0] bond members have different mtu values",
+    ]
+    raw["nodes"][0]["links"] = [{"mac_addr": "02:00:00:00:00:09"}]
+    with pytest.raises(ConfigError, match="not one of the node's mac_addr"):
+        _load_raw(raw)
+    raw["nodes"][0].update(links=[], bond={"hash_policy": "layer2"})
+    with pytest.raises(ConfigError, match="hash_policy needs bond mode"):
+        _load_raw(raw)
+    raw["nodes"][0]["bond"] = {}
+    raw["nodes"][1]["mac_addr"] = ["02:00:00:00:00:01"]
+    with pytest.raises(ConfigError, match="duplicate node MAC address '02:00:00:00:00:01' on nodes\\[0\\] and nodes\\[1\\]"):
+        _load_raw(raw)
+
+
+def test_tuning_profiles_resolve_per_node():
+    raw = config_from("private.toml", **{"tuning.profile": "throughput", "tuning.hugepages": 64})
+    raw["nodes"][1]["tuning"] = {"profile": "low-latency", "reserved_cpus": "0-3"}
+    first, second = (node.tuning for node in _load_raw(raw).nodes)
+    assert (first.profile, first.rmem_max, first.hugepages, first.cpu_manager) == ("throughput", 67108864, 64, "none")
+    assert (second.profile, second.reserved_cpus, second.hugepages, second.cpu_manager) == ("low-latency", "0-3", 64, "static")
+    assert second.max_parallel_image_pulls == 3
+
+    raw["nodes"][1]["tuning"] = {"cpu_manager": "static", "reserved_cpus": "3-1"}
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == ["nodes[1].tuning: reserved_cpus range '3-1' is reversed"]
+    raw["nodes"][1]["tuning"] = {"profile": "low-latency", "cpu_manager": "none"}
+    with pytest.raises(ConfigError, match="nodes\\[1\\].tuning: topology_manager 'single-numa-node' needs cpu_manager 'static'"):
+        _load_raw(raw)
+
+
+def test_node_local_dns_listen_addr_checked():
+    raw = config_from("private.toml", **{"kubernetes.node_local_dns": {"enabled": True}})
+    assert str(_load_raw(raw).kubernetes.node_local_dns.listen_addr) == "169.254.20.10"
+    raw = config_from("private.toml", **{"kubernetes.node_local_dns": {"enabled": True, "listen_addr": "10.43.0.53"}})
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value) == "kubernetes.node_local_dns: listen_addr 10.43.0.53 is not a link-local address (169.254.0.0/16)"
+    raw = config_from("private.toml", **{
+        "network.node_cidr": "169.254.20.0/24",
+        "kubernetes.node_local_dns": {"enabled": True},
+    })
+    with pytest.raises(ConfigError, match="network.node_cidr 169.254.20.0/24 overlaps kubernetes.node_local_dns.listen_addr 169.254.20.10"):
+        _load_raw(raw)
+
+
+def test_coredns_sizing_follows_node_count():
+    raw = config_from("private.toml")
+    node = raw["nodes"][-1]
+    raw["nodes"] = [
+        dict(node, name=f"k8s-{i}", address=f"10.10.10.{100 + i}", mac_addr=f"02:00:00:00:00:{i:02x}", controller=i == 0)
+        for i in range(20)
+    ]
+    config = _load_raw(raw)
+    assert (config.controller_count, config.coredns_replicas, config.coredns_cache_size) == (1, 3, 20000)
+    raw["nodes"] = raw["nodes"][:1]
+    config = _load_raw(raw)
+    assert (config.coredns_replicas, config.coredns_cache_size) == (1, 9984)
+
+
+def _pool(**fields) -> dict:
+    macs = [f"02:00:00:00:01:{i:02x}" for i in range(fields.pop("size", 3))]
+    return {
+        "name": "worker-{index}", "address": "10.10.10.150", "disk": "/dev/sda", "mac_addr": macs,
+        "schematic_id": "376567988ad370138ad8b2698212367b8edcb69b5fd68c80be1f2ec7d603b4ba",
+    } | fields
+
+
+def test_node_pool_members_follow_nodes(tmp_path: Path):
+    config_file = tmp_path / "cluster.toml"
+    config_file.write_text(
+        (REPO_ROOT / ".github/template-tests/valid/private.toml").read_text()
+        + '\n[[node_pools]]\nname = "worker-{index:02}"\nfirst_index = 1\naddress = "10.10.10.150"\n'
+        'disk = "/dev/sda"\nzone = "rack-2"\nschematic_id = "' + "a" * 64 + '"\ntuning = { profile = "throughput" }\n'
+        'mac_addr = ["02:00:00:00:01:01", ["02:00:00:00:01:02", "02:00:00:00:01:03"]]\n'
+    )
+    data = load(str(config_file))
+    assert (data["node_count"], data["controller_count"]) == (4, 1)
+    members = data["nodes"][2:]
+    assert [(n["name"], n["address"], n["mac_addr"]) for n in members] == [
+        ("worker-01", "10.10.10.150", ["02:00:00:00:01:01"]),
+        ("worker-02", "10.10.10.151", ["02:00:00:00:01:02", "02:00:00:00:01:03"]),
+    ]
+    assert members[1]["zone"] == "rack-2"
+    assert members[1]["schematic_id"] == "a" * 64
+    assert members[1]["tuning"]["rmem_max"] == 67108864
+    assert [link["mac_addr"] for link in members[1]["members"]] == members[1]["mac_addr"]
+    assert data["node_pools"][0]["last_address"] == "10.10.10.151"
+
+
+def test_node_pool_range_checked():
+    raw = config_from("private.toml")
+    raw["node_pools"] = [_pool(count=2)]
+    with pytest.raises(ConfigError, match="count is 2 but mac_addr lists 3 members"):
+        _load_raw(raw)
+    raw["node_pools"] = [_pool(last_address="10.10.10.151")]
+    with pytest.raises(ConfigError, match="does not hold the 3 members"):
+        _load_raw(raw)
+    raw["node_pools"] = [_pool(address="10.10.10.254")]
+    with pytest.raises(ConfigError, match=r"node_pools\[0\] 10.10.10.254-10.10.11.0 is not inside node_cidr"):
+        _load_raw(raw)
+    raw["node_pools"] = [_pool(address="10.10.10.99")]
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == [
+        "address 10.10.10.100 is used by both node_pools[0] and nodes[0].address",
+        "address 10.10.10.101 is used by both node_pools[0] and nodes[1].address",
+    ]
+
+
+def test_node_pool_names_checked_as_ranges():
+    raw = config_from("private.toml")
+    raw["nodes"][1]["name"] = "worker-2"
+    raw["node_pools"] = [_pool()]
+    with pytest.raises(ConfigError, match=r"duplicate node name 'worker-2' on nodes\[1\] and node_pools\[0\]"):
+        _load_raw(raw)
+    raw["nodes"][1]["name"] = "worker-02"
+    _load_raw(raw)
+
+    # worker-{index:02} only renders like worker-{index} from index 10 on.
+    padded = _pool(name="worker-{index:02}", address="10.10.10.170", first_index=10, size=2)
+    padded["mac_addr"] = ["02:00:00:00:02:00", "02:00:00:00:02:01"]
+    raw["node_pools"] = [_pool(size=12), padded]
+    with pytest.raises(ConfigError, match=r"node_pools\[0\] and node_pools\[1\] generate the same node names"):
+        _load_raw(raw)
+    raw["node_pools"][0]["mac_addr"] = raw["node_pools"][0]["mac_addr"][:10]
+    _load_raw(raw)
+
+    # Template text can line up with another pool's digits.
+    shifted = _pool(name="worker-1{index}", address="10.10.10.170", size=2)
+    shifted["mac_addr"] = ["02:00:00:00:02:00", "02:00:00:00:02:01"]
+    raw["node_pools"] = [_pool(first_index=10), shifted]
+    with pytest.raises(ConfigError, match=r"node_pools\[0\] and node_pools\[1\] generate the same node names"):
+        _load_raw(raw)
+    raw["node_pools"][1]["name"] = "worker-2{index}"
+    _load_raw(raw)
+
+    raw["node_pools"] = [_pool(name="worker-{index}-" + "x" * 60)]
+    with pytest.raises(ConfigError, match="is not a valid node name"):
+        _load_raw(raw)
+
+
+def test_node_pool_mac_addresses_checked():
+    raw = config_from("private.toml")
+    raw["node_pools"] = [_pool(mac_addr=["02:00:00:00:01:00", raw["nodes"][0]["mac_addr"]])]
+    with pytest.raises(ConfigError, match=r"on nodes\[0\] and node_pools\[0\].mac_addr\[1\]"):
+        _load_raw(raw)
+
+
+def test_large_node_pool_validates_as_one_range():
+    raw = config_from("private.toml", **{"network.node_cidr": "10.0.0.0/16", "network.default_gateway": "10.0.0.1"})
+    raw["kubernetes"]["api"]["addr"] = "10.0.255.250"
+    raw["gateways"] |= {"internal": "10.0.255.251", "dns": "10.0.255.252", "external": "10.0.255.253"}
+    raw["nodes"] = [dict(raw["nodes"][0], address="10.0.0.2")]
+    raw["node_pools"] = [
+        _pool(address="10.0.1.0", mac_addr=[":".join(f"{b:02x}" for b in i.to_bytes(6)) for i in range(1, 5001)])
+    ]
+    start = time.perf_counter()
+    config = _load_raw(raw)
+    assert time.perf_counter() - start < 0.5
+    assert (config.node_count, config.coredns_replicas) == (5001, 626)
+
+
+def test_encryption_layers_per_volume():
+    raw = config_from("private.toml", **{"encryption.state": {"sector_size": 4096, "no_read_workqueue": True}})
+    raw["nodes"][0] |= {"encrypt_disk": True, "encryption": {
+        "state": {"no_write_workqueue": True},
+        "ephemeral": {"cipher": "xchacha20,aes-adiantum-plain64"},
+    }}
+    encryption = _load_raw(raw).model_dump(mode="json")["nodes"][0]["encryption"]
+    assert encryption["state"] == {
+        "cipher": None, "key_size": None, "sector_size": 4096, "no_read_workqueue": True,
+        "no_write_workqueue": True, "options": ["no_read_workqueue", "no_write_workqueue"],
+    }
+    # Adiantum gets the key size it needs rather than the Talos default.
+    assert (encryption["ephemeral"]["key_size"], encryption["ephemeral"]["sector_size"]) == (256, None)
+
+
+def test_encryption_conflicts_rejected():
+    raw = config_from("private.toml", **{"encryption.state": {"cipher": "xchacha12,aes-adiantum-plain64"}})
+    raw["nodes"][0] |= {"encrypt_disk": True, "encryption": {"state": {"key_size": 512}}}
+    raw["nodes"][1] |= {"encrypt_disk": False, "encryption": {"ephemeral": {"sector_size": 4096}}}
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == [
+        "nodes[0].encryption.state: cipher 'xchacha12,aes-adiantum-plain64' takes a 256-bit key, not key_size 512",
+        "nodes[1].encryption is set but encrypt_disk is false",
+    ]
+    raw["nodes"][1]["encryption"]["ephemeral"]["sector_size"] = 4000
+    with pytest.raises(ConfigError, match=r"nodes\.1\.encryption\.ephemeral\.sector_size"):
+        _load_raw(raw)
+
+
+def test_registry_cache_and_mirrors():
+    raw = config_from("private.toml", **{
+        "registries.cache": {"url": "http://10.10.10.5:5000/v2/{upstream}", "override_path": True},
+        "registries.mirrors": {"*": {"endpoints": ["https://mirror.example.com"], "skip_fallback": True}},
+        "registries.tls": {"mirror.example.com": {"ca": "-----BEGIN CERTIFICATE-----\nMIIB\n-----END CERTIFICATE-----\n"}},
+    })
+    registries = _load_raw(raw).model_dump(mode="json")["registries"]
+    mirrors = registries["effective_mirrors"]
+    assert list(mirrors) == [*validate.REGISTRY_CACHE_UPSTREAMS, "*"]
+    assert mirrors["ghcr.io"] == {
+        "endpoints": ["http://10.10.10.5:5000/v2/ghcr.io"], "override_path": True, "skip_fallback": False,
+    }
+    assert mirrors["*"]["skip_fallback"] is True
+    assert registries["tls"]["mirror.example.com"]["ca_base64"].startswith("LS0tLS1CRUdJTi")
+
+
+def test_registry_settings_checked():
+    raw = config_from("private.toml", **{
+        "registries.cache": {"url": "http://10.10.10.100:5000", "upstreams": ["docker.io"]},
+        "registries.mirrors": {"docker.io": {"endpoints": ["https://mirror.example.com"]}},
+        "registries.tls": {"other.example.com": {"insecure_skip_verify": True}},
+    })
+    with pytest.raises(ConfigError) as e:
+        _load_raw(raw)
+    assert str(e.value).splitlines() == [
+        "registries: docker.io is in both cache.upstreams and mirrors",
+        "registries: tls.'other.example.com' is not the host of any mirror endpoint",
+    ]
+    del raw["registries"]["mirrors"], raw["registries"]["tls"]
+    with pytest.raises(ConfigError, match=r"address 10.10.10.100 is used by both registries.cache.url and nodes\[0\]"):
+        _load_raw(raw)
+    raw["registries"]["cache"]["url"] = "http://cache.lan:5000"
+    with pytest.raises(ConfigError, match="must use an IPv4 address"):
+        _load_raw(raw)
+
+
+def test_envoy_defaults_follow_nodes_and_bgp():
+    envoy = _load_raw(config_from("private.toml")).gateways.envoy
+    assert (envoy.replicas, envoy.external_traffic_policy) == (2, "Cluster")
+    envoy = _load_raw(config_from("public.toml")).gateways.envoy  # BGP
+    assert envoy.external_traffic_policy == "Local"
+    raw = config_from("private.toml", **{"gateways.envoy": {"mode": "daemonset"}})
+    envoy = _load_raw(raw).gateways.envoy
+    assert (envoy.replicas, envoy.external_traffic_policy) == (None, "Local")
+    raw = config_from("private.toml", **{"gateways.envoy": {"autoscaling": {"min_replicas": 2, "max_replicas": 8}}})
+    assert _load_raw(raw).gateways.envoy.replicas is None
+
+
+@pytest.mark.parametrize("envoy, message", [
+    ({"external_traffic_policy": "Local"}, "needs mode 'daemonset' or cilium.bgp"),
+    ({"mode": "daemonset", "external_traffic_policy": "Cluster"}, "hides client addresses"),
+    ({"mode": "daemonset", "replicas": 3}, "do not apply to mode 'daemonset'"),
+    ({"replicas": 3, "autoscaling": {"min_replicas": 2, "max_replicas": 4}}, "either replicas or autoscaling"),
+    ({"autoscaling": {"min_replicas": 5, "max_replicas": 4}}, "min_replicas 5 is above max_replicas 4"),
+    ({"memory": "2Gi"}, "memory 2Gi is above memory_limit 1Gi"),
+])
+def test_envoy_conflicts_rejected(envoy: dict, message: str):
+    raw = config_from("private.toml", **{"gateways.envoy": envoy, "cilium.loadbalancer_mode": "snat"})
+    with pytest.raises(ConfigError, match=message):
+        _load_raw(raw)
+
+
+def test_tunnel_defaults_follow_nodes_and_protocol():
+    tunnel = _load_raw(config_from("private.toml")).ingress.tunnel
+    assert (tunnel.replicas, tunnel.post_quantum, tunnel.ha_connections) == (2, True, 4)
+    raw = config_from("private.toml", **{"ingress.tunnel": {"protocol": "http2"}})
+    raw["nodes"] = raw["nodes"][:1]
+    tunnel = _load_raw(raw).ingress.tunnel
+    assert (tunnel.replicas, tunnel.post_quantum) == (1, False)
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"ingress.tunnel": {"protocol": "http2", "post_quantum": True}}, "post_quantum needs protocol 'quic'"),
+    ({"ingress.tunnel": {"anti_affinity": "required"}}, "needs fewer replicas \\(2\\) than nodes \\(2\\)"),
+    ({"ingress.tunnel": {"replicas": 1}, "ingress.mode": "direct"}, "only used with ingress.mode 'cloudflare-tunnel', not 'direct'"),
+    ({"tuning.rmem_max": 4194304}, "nodes\\[0\\].tuning.rmem_max 4194304 is below the 7500000 bytes"),
+])
+def test_tunnel_conflicts_rejected(settings: dict, message: str):
+    with pytest.raises(ConfigError, match=message):
+        _load_raw(config_from("private.toml", **settings))
+
+
+def test_tunnel_http2_allows_small_buffers():
+    raw = config_from("private.toml", **{"tuning.rmem_max": 4194304, "ingress.tunnel": {"protocol": "http2"}})
+    assert _load_raw(raw).nodes[0].tuning.rmem_max == 4194304
@@ -0,0 +1,92 @@
+"""Unit tests for the warm validator server and its client.
+
+Run from the repo root:
+    uv run --locked pytest template/scripts/test_validate_daemon.py -q
+"""
+
+from pathlib import Path
+
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import validate  # noqa: E402
+from validate import load  # noqa: E402
+from validate_daemon import default_socket, request, runtime_dir, serve  # noqa: E402
+
+REPO_ROOT = Path(__file__).parents[2]
+VALID = REPO_ROOT / ".github/template-tests/valid/public.toml"
+INVALID = REPO_ROOT / ".github/template-tests/invalid/bad-vlan-tag.toml"
+
+
+def start(socket: Path) -> None:
+    threading.Thread(target=serve, args=(socket,), daemon=True).start()
+    for _ in range(100):
+        if socket.exists():
+            return
+        time.sleep(0.05)
+    raise TimeoutError(f"{socket} never appeared")
+
+
+def test_server_answers_like_load(tmp_path: Path):
+    socket = tmp_path / "v.sock"
+    start(socket)
+    assert request(socket, VALID) == {"ok": True, "data": load(str(VALID))}
+    # A second request for the unchanged file is served from memory.
+    assert request(socket, VALID)["data"] == load(str(VALID))
+    invalid = request(socket, INVALID)
+    assert invalid["ok"] is False and "vlan" in invalid["error"]
+    missing = request(socket, tmp_path / "cluster.toml")
+    assert missing == {"ok": False, "error": f"{tmp_path / 'cluster.toml'}: file not found"}
+
+
+def test_edited_config_is_revalidated(tmp_path: Path):
+    socket = tmp_path / "v.sock"
+    config = tmp_path / "cluster.toml"
+    config.write_text(VALID.read_text())
+    start(socket)
+    assert request(socket, config)["ok"] is True
+    config.write_text(INVALID.read_text())
+    assert request(socket, config)["ok"] is False
+
+
+def test_request_without_server_returns_none(tmp_path: Path):
+    assert request(tmp_path / "absent.sock", VALID) is None
+
+
+def test_talos_template_change_is_revalidated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    socket = tmp_path / "v.sock"
+    config = tmp_path / "cluster.toml"
+    config.write_text(VALID.read_text() + "\n[cilium.performance]\nnetkit = true\n")
+    topf = tmp_path / "topf.yaml.j2"
+    topf.write_text("talosVersion: v1.13.0\n")
+    monkeypatch.setattr(validate, "TOPF_TEMPLATE", topf)
+    start(socket)
+    assert request(socket, config)["ok"] is True
+    # Talos 1.8 ships Linux 6.6, too old for netkit.
+    topf.write_text("talosVersion: v1.8.0\n")
+    assert "netkit needs Linux 6.8" in request(socket, config)["error"]
+
+
+def test_untrusted_socket_is_ignored(tmp_path: Path):
+    # Not a socket the current user created.
+    (tmp_path / "v.sock").write_text("")
+    assert request(tmp_path / "v.sock", VALID) is None
+
+
+def test_socket_in_private_runtime_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("VALIDATE_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket().parent == tmp_path
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    monkeypatch.setattr("tempfile.tempdir", None)
+    private = runtime_dir()
+    assert private.parent == tmp_path and private.stat().st_mode & 0o777 == 0o700
+    private.chmod(0o755)
+    with pytest.raises(SystemExit, match="not a private directory"):
+        runtime_dir()
@@ -7,11 +7,15 @@ Exits non-zero with one human-readable error per line on stderr when the
 config is invalid.
 """
 
-from ipaddress import IPv4Address, IPv4Network
+from collections.abc import Iterator
+from ipaddress import IPv4Address, IPv4Network, summarize_address_range
 from pathlib import Path
-from typing import Annotated, Any, Literal, Self
+from typing import Annotated, Any, Literal, NamedTuple, Self
+from urllib.parse import urlsplit
 
+import base64
 import json
+import math
 import re
 import sys
 import tomllib
@@ -33,6 +37,101 @@ KNOWN_SSH_HOSTS = ["github.com", "gitlab.com", "codeberg.org"]
 
 REPO_URL_PATTERN = r"^(https?://|ssh://git@)[^/]+/.+$"
 FQDN_PATTERN = r"^([a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,}$"
+MAC_PATTERN = r"^([0-9a-f]{2}:){5}[0-9a-f]{2}$"
+NODE_NAME_PATTERN = r"^[a-z0-9][a-z0-9\-]{0,61}[a-z0-9]$|^[a-z0-9]$"
+# A node name with one {index} field, optionally zero-padded: "worker-{index:02}".
+POOL_NAME_PATTERN = r"^([a-z0-9\-]*)\{index(?::0([1-9]))?\}([a-z0-9\-]*)$"
+CPUSET_PATTERN = r"^[0-9]+(-[0-9]+)?(,[0-9]+(-[0-9]+)?)*$"
+REGISTRY_PATTERN = r"^[a-z0-9]([a-z0-9.\-]*[a-z0-9])?(:[0-9]{1,5})?$"
+ENDPOINT_PATTERN = r"^https?://[^/\s]+(/\S*)?$"
+CPU_PATTERN = r"^([1-9][0-9]*m|[0-9]+(\.[0-9]+)?)$"
+MEMORY_PATTERN = r"^[1-9][0-9]*(Mi|Gi)$"
+
+# Registries the template's images come from; the pull-through cache fronts
+# all of them unless registries.cache.upstreams says otherwise.
+REGISTRY_CACHE_UPSTREAMS = ["docker.io", "ghcr.io", "quay.io", "mirror.gcr.io", "registry.k8s.io", "gcr.io"]
+
+# Node tuning profiles. default keeps the values the template has always
+# shipped; throughput raises socket buffers and pull parallelism for bulk
+# transfer; low-latency gives guaranteed pods exclusive cores on one NUMA
+# node. [tuning] and nodes[].tuning override single settings.
+TUNING_DEFAULT: dict[str, Any] = {
+    "cpu_manager": "none",
+    "topology_manager": "none",
+    "reserved_cpus": None,
+    "hugepages": 0,
+    "max_parallel_image_pulls": 3,
+    "rmem_max": 7500000,
+    "wmem_max": 7500000,
+    "netdev_max_backlog": None,
+}
+TUNING_PROFILES: dict[str, dict[str, Any]] = {
+    "default": TUNING_DEFAULT,
+    "throughput": TUNING_DEFAULT | {
+        "max_parallel_image_pulls": 10,
+        "rmem_max": 67108864,
+        "wmem_max": 67108864,
+        "netdev_max_backlog": 16384,
+    },
+    "low-latency": TUNING_DEFAULT | {
+        "cpu_manager": "static",
+        "topology_manager": "single-numa-node",
+        "reserved_cpus": "0-1",
+    },
+}
+
+# Kernel series shipped by each Talos minor release; releases newer than the
+# last entry are assumed to ship at least its kernel.
+TALOS_KERNELS: dict[tuple[int, int], tuple[int, int]] = {
+    (1, 8): (6, 6),
+    (1, 9): (6, 12),
+    (1, 10): (6, 12),
+    (1, 11): (6, 12),
+    (1, 12): (6, 18),
+    (1, 13): (6, 18),
+}
+TOPF_TEMPLATE = Path(__file__).parents[1] / "config" / "talos" / "topf.yaml.j2"
+# Oldest kernel each cilium.performance feature works on.
+PERFORMANCE_KERNELS = {"bbr": (5, 18), "big_tcp": (6, 3), "netkit": (6, 8)}
+# XDP native mode needs a frame to fit one page, which caps the MTU on the
+# common drivers.
+XDP_MAX_MTU = 3498
+
+# UDP buffer size cloudflared's QUIC transport asks for; below it the
+# kernel caps the buffers and tunnel throughput with them.
+QUIC_BUFFER_BYTES = 7500000
+
+LINK_LOCAL = IPv4Network("169.254.0.0/16")
+# Where Talos serves host DNS to pods (machine.features.hostDNS).
+TALOS_HOST_DNS = IPv4Address("169.254.116.108")
+
+# Releases in bootstrap/helmfile/apps.yaml, each with its namespace and the
+# releases that must be running before it installs. Every pod needs the CNI
+# and most need cluster DNS; nothing else depends on anything.
+BOOTSTRAP_RELEASES: dict[str, tuple[str, list[str]]] = {
+    "cilium": ("kube-system", []),
+    "coredns": ("kube-system", ["cilium"]),
+    "spegel": ("kube-system", ["cilium"]),
+    "cert-manager": ("cert-manager", ["coredns"]),
+    "flux-operator": ("flux-system", ["coredns"]),
+    "flux-instance": ("flux-system", ["flux-operator"]),
+}
+
+
+# Talos version pinned in talos/topf.yaml and the kernel it ships, or None
+# when the template is not there (e.g. after `just template tidy`).
+def talos_kernel() -> tuple[str, tuple[int, int]] | None:
+    try:
+        match = re.search(r"^talosVersion:\s*(v(\d+)\.(\d+)\S*)", TOPF_TEMPLATE.read_text(), re.MULTILINE)
+    except FileNotFoundError:
+        return None
+    if match is None:
+        return None
+    version = (int(match[2]), int(match[3]))
+    known = [release for release in TALOS_KERNELS if release <= version]
+    if not known:
+        return None
+    return match[1], TALOS_KERNELS[max(known)]
 
 
 def _network(value: Any) -> Any:
@@ -61,9 +160,66 @@ def _asn(value: str) -> str:
     return value
 
 
+# A single MAC address is a one-member bond.
+def _members(value: Any) -> Any:
+    return [value] if isinstance(value, str) else value
+
+
 type Cidr = Annotated[IPv4Network, BeforeValidator(_network)]
 type Asn = Annotated[str, AfterValidator(_asn)]
 type Fqdn = Annotated[str, Field(pattern=FQDN_PATTERN)]
+type MacAddr = Annotated[str, Field(pattern=MAC_PATTERN)]
+
+
+class Interval(NamedTuple):
+    start: int
+    end: int
+    owner: str
+
+    def describe(self) -> str:
+        if self.start == self.end:
+            return str(IPv4Address(self.start))
+        return ", ".join(
+            str(net) for net in summarize_address_range(IPv4Address(self.start), IPv4Address(self.end))
+        )
+
+
+# Addresses and CIDRs as closed integer intervals. Overlaps fall out of one
+# sort-and-sweep, so checks stay O(n log n) in the number of nodes instead of
+# comparing every pair.
+class IntervalIndex:
+    def __init__(self) -> None:
+        self._intervals: list[Interval] = []
+        self._sorted = True
+
+    def add(self, owner: str, start: int, end: int) -> None:
+        self._intervals.append(Interval(start, end, owner))
+        self._sorted = False
+
+    def add_address(self, owner: str, addr: IPv4Address) -> None:
+        self.add(owner, int(addr), int(addr))
+
+    def add_network(self, owner: str, network: IPv4Network) -> None:
+        self.add(owner, int(network.network_address), int(network.broadcast_address))
+
+    def _sort(self) -> list[Interval]:
+        if not self._sorted:
+            # Stable, so owners that share a start keep insertion order.
+            self._intervals.sort(key=lambda interval: interval.start)
+            self._sorted = True
+        return self._intervals
+
+    # Each interval that overlaps an earlier one, paired with the earlier
+    # interval reaching furthest.
+    def overlaps(self) -> list[tuple[Interval, Interval]]:
+        found: list[tuple[Interval, Interval]] = []
+        reach: Interval | None = None
+        for interval in self._sort():
+            if reach is not None and interval.start <= reach.end:
+                found.append((reach, interval))
+            if reach is None or interval.end > reach.end:
+                reach = interval
+        return found
 
 
 class Model(BaseModel):
@@ -96,6 +252,22 @@ class Api(Model):
     tls_sans: list[Fqdn] | None = None
 
 
+class NodeLocalDns(Model):
+    # A DNS cache on every node in front of CoreDNS. Pods query it on
+    # listen_addr, which Cilium redirects to the cache on the same node,
+    # and fall back to kubernetes.coredns_addr.
+    enabled: bool = False
+    listen_addr: IPv4Address = IPv4Address("169.254.20.10")
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.listen_addr not in LINK_LOCAL:
+            raise ValueError(f"listen_addr {self.listen_addr} is not a link-local address ({LINK_LOCAL})")
+        if self.listen_addr == TALOS_HOST_DNS:
+            raise ValueError(f"listen_addr {self.listen_addr} is the Talos host DNS address")
+        return self
+
+
 class Kubernetes(Model):
     pod_cidr: Cidr = IPv4Network("10.42.0.0/16")
     svc_cidr: Cidr = IPv4Network("10.43.0.0/16")
@@ -104,6 +276,7 @@ class Kubernetes(Model):
         default_factory=lambda data: data["svc_cidr"].network_address + 10
     )
     api: Api
+    node_local_dns: NodeLocalDns = NodeLocalDns()
 
     @model_validator(mode="after")
     def check(self) -> Self:
@@ -114,11 +287,57 @@ class Kubernetes(Model):
         return self
 
 
+def _mebibytes(quantity: str) -> int:
+    return int(quantity[:-2]) * (1024 if quantity.endswith("Gi") else 1)
+
+
+class Autoscaling(Model):
+    min_replicas: int = Field(ge=1)
+    max_replicas: int = Field(ge=1)
+    # Average CPU use the HPA aims for, in percent of the CPU request.
+    target_cpu: int = Field(default=70, ge=10, le=100)
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.min_replicas > self.max_replicas:
+            raise ValueError(f"min_replicas {self.min_replicas} is above max_replicas {self.max_replicas}")
+        return self
+
+
+# The Envoy proxies behind every gateway.
+class Envoy(Model):
+    # daemonset runs one proxy per node.
+    mode: Literal["deployment", "daemonset"] = "deployment"
+    # Fixed proxy count; derived from the node count unless set or
+    # autoscaling is.
+    replicas: int | None = Field(default=None, ge=1)
+    autoscaling: Autoscaling | None = None
+    cpu: str = Field(default="100m", pattern=CPU_PATTERN)
+    memory: str | None = Field(default=None, pattern=MEMORY_PATTERN)
+    memory_limit: str = Field(default="1Gi", pattern=MEMORY_PATTERN)
+    # Spread the proxies over nodes, and over zones when nodes set one.
+    topology_spread: bool = True
+    # Local keeps the client address and skips the hop to another node, but
+    # only nodes running a proxy may receive traffic. Derived unless set.
+    external_traffic_policy: Literal["Cluster", "Local"] | None = None
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.mode == "daemonset" and (self.replicas is not None or self.autoscaling is not None):
+            raise ValueError("replicas and autoscaling do not apply to mode 'daemonset'")
+        if self.replicas is not None and self.autoscaling is not None:
+            raise ValueError("set either replicas or autoscaling, not both")
+        if self.memory is not None and _mebibytes(self.memory) > _mebibytes(self.memory_limit):
+            raise ValueError(f"memory {self.memory} is above memory_limit {self.memory_limit}")
+        return self
+
+
 class Gateways(Model):
     internal: IPv4Address
     dns: IPv4Address
     # Required when ingress.mode is not "none".
     external: IPv4Address | None = None
+    envoy: Envoy = Envoy()
 
 
 class Repository(Model):
@@ -156,8 +375,39 @@ class Dns(Model):
         return self
 
 
+# The cloudflared connectors for ingress.mode "cloudflare-tunnel".
+class Tunnel(Model):
+    # Connector pods; derived from the node count unless set.
+    replicas: int | None = Field(default=None, ge=1, le=10)
+    # Keep connectors on different nodes; "required" leaves pods pending
+    # rather than sharing a node.
+    anti_affinity: Literal["preferred", "required", "none"] = "preferred"
+    # "auto" tries quic and falls back to http2 where UDP is blocked.
+    protocol: Literal["quic", "http2", "auto"] = "quic"
+    # Post-quantum key agreement, which needs quic; follows protocol unless
+    # set.
+    post_quantum: bool | None = None
+    # Edge connections per connector.
+    ha_connections: int = Field(default=4, ge=1, le=4)
+    cpu: str = Field(default="10m", pattern=CPU_PATTERN)
+    memory: str | None = Field(default=None, pattern=MEMORY_PATTERN)
+    memory_limit: str = Field(default="256Mi", pattern=MEMORY_PATTERN)
+    pod_monitor: bool = True
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.post_quantum is None:
+            self.post_quantum = self.protocol == "quic"
+        elif self.post_quantum and self.protocol != "quic":
+            raise ValueError(f"post_quantum needs protocol 'quic', not {self.protocol!r}")
+        if self.memory is not None and _mebibytes(self.memory) > _mebibytes(self.memory_limit):
+            raise ValueError(f"memory {self.memory} is above memory_limit {self.memory_limit}")
+        return self
+
+
 class Ingress(Model):
     mode: Literal["cloudflare-tunnel", "direct", "none"] = "cloudflare-tunnel"
+    tunnel: Tunnel = Tunnel()
 
 
 class Bgp(Model):
@@ -176,9 +426,190 @@ class Bgp(Model):
         return self
 
 
+class ImageCache(Model):
+    # Serve images from a cache baked into the boot media (see the
+    # image-cache recipe in talos/mod.just) before pulling from registries.
+    enabled: bool = False
+    # Upper bound of the IMAGECACHE volume on the system disk.
+    size: str = Field(default="4GiB", pattern=r"^[1-9][0-9]*(MiB|GiB)$")
+
+
+class Mirror(Model):
+    # Tried in order before the upstream registry itself.
+    endpoints: list[Annotated[str, Field(pattern=ENDPOINT_PATTERN)]] = Field(min_length=1)
+    # Use the endpoint path as given instead of appending /v2/, for
+    # registries that serve each upstream under its own path (Harbor proxy
+    # projects and the like).
+    override_path: bool = False
+    # Never fall back to the upstream registry.
+    skip_fallback: bool = False
+
+
+# A pull-through cache on the node network in front of several upstreams.
+class RegistryCache(Model):
+    # {upstream} in the URL is replaced by each upstream registry, e.g.
+    # "http://10.0.0.5:5000/v2/{upstream}" with override_path.
+    url: str = Field(pattern=ENDPOINT_PATTERN)
+    upstreams: list[Annotated[str, Field(pattern=REGISTRY_PATTERN)]] = Field(
+        default=REGISTRY_CACHE_UPSTREAMS, min_length=1
+    )
+    override_path: bool = False
+    skip_fallback: bool = False
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        try:
+            IPv4Address(urlsplit(self.url).hostname or "")
+        except ValueError:
+            raise ValueError(f"url {self.url!r} must use an IPv4 address, which is checked against node_cidr") from None
+        return self
+
+    @computed_field
+    @property
+    def addr(self) -> IPv4Address:
+        return IPv4Address(urlsplit(self.url).hostname)
+
+
+class RegistryTls(Model):
+    # PEM CA certificate(s) the registry certificate chains to.
+    ca: str | None = Field(default=None, pattern=r"^\s*-----BEGIN CERTIFICATE-----")
+    insecure_skip_verify: bool = False
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.ca is not None and self.insecure_skip_verify:
+            raise ValueError("ca has no effect with insecure_skip_verify")
+        return self
+
+    # Talos takes the CA base64 encoded.
+    @computed_field
+    @property
+    def ca_base64(self) -> str | None:
+        return base64.b64encode(self.ca.strip().encode() + b"\n").decode() if self.ca else None
+
+
+# Image pulls on the nodes, ahead of Spegel: mirrors per upstream registry
+# ("*" for all of them) and a pull-through cache, plus TLS settings per
+# registry host.
+class Registries(Model):
+    cache: RegistryCache | None = None
+    mirrors: dict[Annotated[str, Field(pattern=rf"{REGISTRY_PATTERN}|^\*$")], Mirror] = {}
+    tls: dict[Annotated[str, Field(pattern=REGISTRY_PATTERN)], RegistryTls] = {}
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        errors = []
+        if self.cache is not None:
+            errors += (
+                f"{name} is in both cache.upstreams and mirrors" for name in self.cache.upstreams if name in self.mirrors
+            )
+        hosts = {urlsplit(endpoint).netloc for mirror in self.effective_mirrors.values() for endpoint in mirror.endpoints}
+        errors += (f"tls.{host!r} is not the host of any mirror endpoint" for host in self.tls if host not in hosts)
+        if errors:
+            raise ValueError("\n".join(errors))
+        return self
+
+    # Every mirror as it is configured on the nodes, cache upstreams first.
+    @computed_field
+    @property
+    def effective_mirrors(self) -> dict[str, Mirror]:
+        mirrors: dict[str, Mirror] = {}
+        if (cache := self.cache) is not None:
+            for upstream in cache.upstreams:
+                mirrors[upstream] = Mirror(
+                    endpoints=[cache.url.replace("{upstream}", upstream)],
+                    override_path=cache.override_path,
+                    skip_fallback=cache.skip_fallback,
+                )
+        return mirrors | self.mirrors
+
+
 class Talos(Model):
     # Default Image Factory schematic for nodes that don't set their own.
     schematic_id: str | None = Field(default=None, pattern=r"^[a-z0-9]{64}$")
+    image_cache: ImageCache = ImageCache()
+
+
+class Tuning(Model):
+    profile: Literal["default", "throughput", "low-latency"] | None = None
+    # kubelet CPU manager; static gives guaranteed pods exclusive cores.
+    cpu_manager: Literal["none", "static"] | None = None
+    topology_manager: Literal["none", "best-effort", "restricted", "single-numa-node"] | None = None
+    # CPUs (cpuset list) kept for the system and kubelet, e.g. "0-1".
+    reserved_cpus: str | None = Field(default=None, pattern=CPUSET_PATTERN)
+    # 2MiB huge pages reserved at boot.
+    hugepages: int | None = Field(default=None, ge=0)
+    max_parallel_image_pulls: int | None = Field(default=None, ge=1)
+    # net.core socket buffer ceilings and receive backlog.
+    rmem_max: int | None = Field(default=None, ge=212992)
+    wmem_max: int | None = Field(default=None, ge=212992)
+    netdev_max_backlog: int | None = Field(default=None, ge=1000)
+
+    # Settings that cannot work together, for a fully resolved tuning.
+    def conflicts(self) -> list[str]:
+        errors = []
+        if self.cpu_manager == "static" and self.reserved_cpus is None:
+            errors.append("cpu_manager 'static' needs reserved_cpus")
+        if self.topology_manager in ("restricted", "single-numa-node") and self.cpu_manager != "static":
+            errors.append(f"topology_manager {self.topology_manager!r} needs cpu_manager 'static'")
+        for part in (self.reserved_cpus or "").split(","):
+            first, _, last = part.partition("-")
+            if last and int(first) > int(last):
+                errors.append(f"reserved_cpus range {part!r} is reversed")
+        return errors
+
+
+# A tuning profile with the settings of each layer applied in order.
+def resolve_tuning(profile: str, *layers: Tuning) -> Tuning:
+    settings = {"profile": profile, **TUNING_PROFILES[profile]}
+    for layer in layers:
+        settings |= layer.model_dump(exclude_none=True, exclude={"profile"})
+    return Tuning(**settings)
+
+
+# LUKS2 settings for one system volume; unset ones keep the Talos defaults
+# (aes-xts-plain64, 512-bit key, 512-byte sectors, dm-crypt workqueues on).
+class VolumeEncryption(Model):
+    # Adiantum is for CPUs without AES instructions.
+    cipher: Literal["aes-xts-plain64", "xchacha12,aes-adiantum-plain64", "xchacha20,aes-adiantum-plain64"] | None = None
+    # Key bits; XTS splits the key, so 512 is AES-256.
+    key_size: Literal[256, 512] | None = None
+    # Encryption sector bytes; 4096 matches NVMe and 4Kn disks and cuts the
+    # per-sector crypto work eightfold.
+    sector_size: Literal[512, 1024, 2048, 4096] | None = None
+    # Encrypt and decrypt inline instead of queueing to the dm-crypt
+    # workqueues, which mostly adds latency on fast SSDs.
+    no_read_workqueue: bool | None = None
+    no_write_workqueue: bool | None = None
+
+    # Settings that cannot work together, after the layers were merged.
+    def conflicts(self) -> list[str]:
+        if self.cipher is not None and "adiantum" in self.cipher and self.key_size not in (None, 256):
+            return [f"cipher {self.cipher!r} takes a 256-bit key, not key_size {self.key_size}"]
+        return []
+
+    @computed_field
+    @property
+    def options(self) -> list[str]:
+        return [name for name in ("no_read_workqueue", "no_write_workqueue") if getattr(self, name)]
+
+
+class Encryption(Model):
+    state: VolumeEncryption = VolumeEncryption()
+    ephemeral: VolumeEncryption = VolumeEncryption()
+
+
+# Per-volume encryption settings with each layer applied in order.
+def resolve_encryption(*layers: Encryption) -> Encryption:
+    volumes: dict[str, dict[str, Any]] = {"state": {}, "ephemeral": {}}
+    for layer in layers:
+        for name, settings in volumes.items():
+            settings |= getattr(layer, name).model_dump(exclude_none=True, exclude={"options"})
+    for settings in volumes.values():
+        # Talos would pass its 512-bit default, which Adiantum rejects.
+        if "adiantum" in settings.get("cipher", ""):
+            settings.setdefault("key_size", 256)
+    return Encryption(**volumes)
 
 
 class Spegel(Model):
@@ -186,30 +617,278 @@ class Spegel(Model):
     enabled: bool | None = None
 
 
+class Upgrade(Model):
+    # Workers upgraded at once: a count, or a share of the workers such as
+    # "25%" (rounded down, at least one). Controllers always go one by one.
+    worker_batch: Annotated[int, Field(ge=1)] | Annotated[str, Field(pattern=r"^([1-9][0-9]?|100)%$")] = 1
+    # Fill each worker batch round-robin across zones, so a batch takes as
+    # few nodes as possible from any one zone.
+    spread_zones: bool = True
+    # How long `talosctl health` may take to pass after each batch.
+    health_timeout: str = Field(default="10m", pattern=r"^[0-9]+[smh]$")
+
+
+class Flux(Model):
+    # Workers per source and helm controller; kustomize-controller gets
+    # twice as many. Derived from the app and node count unless set.
+    concurrency: int | None = Field(default=None, ge=1, le=100)
+    # Memory limit of each controller; derived from concurrency unless set.
+    memory: str | None = Field(default=None, pattern=MEMORY_PATTERN)
+    # Extra controller shards that apps are spread over; derived from the
+    # app count unless set. 0 runs a single set of controllers.
+    shards: int | None = Field(default=None, ge=0, le=10)
+
+
+class Bootstrap(Model):
+    # helmfile --concurrency for the bootstrap releases; 0 installs every
+    # release of a wave at once.
+    concurrency: int = Field(default=0, ge=0)
+    # Per release, prerequisites replacing its BOOTSTRAP_RELEASES defaults.
+    needs: dict[str, list[str]] = {}
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        for name, needs in self.needs.items():
+            unknown = [n for n in [name, *needs] if n not in BOOTSTRAP_RELEASES]
+            if unknown:
+                raise ValueError(
+                    f"needs.{name}: unknown bootstrap release {unknown[0]!r} "
+                    f"(known: {', '.join(BOOTSTRAP_RELEASES)})"
+                )
+        needs = self.prerequisites()
+        # Depth-first walk; a release met again while still on the path
+        # closes a cycle.
+        state: dict[str, bool] = {}
+
+        def visit(name: str, path: list[str]) -> None:
+            if state.get(name):
+                return
+            if name in path:
+                cycle = path[path.index(name):] + [name]
+                raise ValueError(f"bootstrap needs form a cycle: {' -> '.join(cycle)}")
+            for need in needs[name]:
+                visit(need, [*path, name])
+            state[name] = True
+
+        for name in needs:
+            visit(name, [])
+        return self
+
+    def prerequisites(self) -> dict[str, list[str]]:
+        return {
+            name: self.needs.get(name, needs)
+            for name, (_, needs) in BOOTSTRAP_RELEASES.items()
+        }
+
+
+class Performance(Model):
+    # The high-throughput datapath in one switch; each feature below follows
+    # it unless set explicitly.
+    enabled: bool = False
+    # EDT-based pod egress rate limiting with fair queueing.
+    bandwidth_manager: bool | None = None
+    # BBR congestion control for pods; needs bandwidth_manager.
+    bbr: bool | None = None
+    # XDP load-balancer acceleration on the node NICs.
+    xdp: bool | None = None
+    # IPv4 BIG TCP: GSO/GRO packets beyond 64KiB.
+    big_tcp: bool | None = None
+    # netkit devices instead of veth pairs for pods.
+    netkit: bool | None = None
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        for name in ("bandwidth_manager", "bbr", "xdp", "big_tcp", "netkit"):
+            if getattr(self, name) is None:
+                setattr(self, name, self.enabled)
+        if self.bbr and not self.bandwidth_manager:
+            raise ValueError("bbr requires bandwidth_manager")
+        return self
+
+    # eBPF host routing instead of the legacy iptables path; BBR and netkit
+    # only work with it.
+    @computed_field
+    @property
+    def host_routing(self) -> bool:
+        return bool(self.enabled or self.bbr or self.netkit)
+
+
 class Cilium(Model):
     loadbalancer_mode: Literal["dsr", "snat"] = "dsr"
     bgp: Bgp = Bgp()
+    performance: Performance = Performance()
 
 
-class Node(Model):
-    name: str = Field(pattern=r"^[a-z0-9][a-z0-9\-]{0,61}[a-z0-9]$|^[a-z0-9]$")
-    address: IPv4Address
-    controller: bool
+class Bond(Model):
+    mode: Literal["active-backup", "802.3ad", "balance-xor"] = "active-backup"
+    # Transmit hash policy; only the load-balancing modes use one.
+    hash_policy: Literal["layer2", "layer2+3", "layer3+4", "encap2+3", "encap3+4"] | None = None
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        if self.hash_policy is not None and self.mode == "active-backup":
+            raise ValueError("hash_policy needs bond mode 802.3ad or balance-xor")
+        return self
+
+
+class Link(Model):
+    mac_addr: MacAddr
+    # NIC ring and combined channel counts (ethtool -G / -L); unset keeps
+    # the driver default.
+    rx_ring: int | None = Field(default=None, ge=1)
+    tx_ring: int | None = Field(default=None, ge=1)
+    channels: int | None = Field(default=None, ge=1)
+    # What the member's switch port is configured for, when known; checked
+    # against the node mtu, network.vlan_tag and the other members.
+    mtu: int | None = Field(default=None, ge=1280, le=9216)
+    vlans: list[Annotated[int, Field(ge=1, le=4094)]] = []
+
+
+# Settings a node pool shares between its members.
+class NodeSettings(Model):
     disk: str
-    mac_addr: str = Field(pattern=r"^([0-9a-f]{2}:){5}[0-9a-f]{2}$")
+    bond: Bond = Bond()
+    # Overrides [tuning] for this node; resolved to every setting.
+    tuning: Tuning = Tuning()
     # Falls back to talos.schematic_id when unset.
     schematic_id: str | None = Field(default=None, pattern=r"^[a-z0-9]{64}$")
     mtu: int = Field(default=1500, ge=1450, le=9000)
     secureboot: bool = False
     encrypt_disk: bool = False
+    # Overrides [encryption] for this node's volumes; needs encrypt_disk.
+    encryption: Encryption = Encryption()
     kernel_modules: list[str] = []
+    # Failure domain (zone, rack...); set as topology.kubernetes.io/zone.
+    zone: str | None = Field(default=None, pattern=r"^[a-z0-9]([a-z0-9.\-]{0,61}[a-z0-9])?$")
+
+
+class Node(NodeSettings):
+    name: str = Field(pattern=NODE_NAME_PATTERN)
+    address: IPv4Address
+    controller: bool
+    # One MAC address per bond member.
+    mac_addr: Annotated[list[MacAddr], BeforeValidator(_members), Field(min_length=1)]
+    # Per-member NIC settings, keyed by mac_addr.
+    links: list[Link] = []
 
     @model_validator(mode="after")
     def check(self) -> Self:
         if self.name in ("global", "controller", "worker"):
             raise ValueError(f"node name {self.name!r} is reserved")
+        if len(set(self.mac_addr)) != len(self.mac_addr):
+            raise ValueError(f"node {self.name!r} lists a bond member MAC address twice")
+        seen: set[str] = set()
+        for link in self.links:
+            if link.mac_addr not in self.mac_addr:
+                raise ValueError(f"links entry {link.mac_addr!r} is not one of the node's mac_addr")
+            if link.mac_addr in seen:
+                raise ValueError(f"links entry {link.mac_addr!r} is set twice")
+            seen.add(link.mac_addr)
+        return self
+
+    # Every bond member in mac_addr order, with its links settings if any.
+    @computed_field
+    @property
+    def members(self) -> list[Link]:
+        links = {link.mac_addr: link for link in self.links}
+        return [links.get(mac, Link(mac_addr=mac)) for mac in self.mac_addr]
+
+
+# Identical nodes as one table. Member i is named after name with {index}
+# set to first_index + i, takes address + i and the i-th mac_addr entry, so
+# the config is checked per pool as an address and index range and members
+# are only built by expand().
+class NodePool(NodeSettings):
+    name: str = Field(pattern=POOL_NAME_PATTERN)
+    first_index: int = Field(default=0, ge=0)
+    # First member address; the pool takes count consecutive addresses.
+    address: IPv4Address
+    # Either bounds the range or gives its size; both default to the size
+    # of the mac_addr table.
+    last_address: IPv4Address | None = None
+    count: int | None = Field(default=None, ge=1)
+    controller: bool = False
+    # One entry per member, each one MAC address or a list of bond members.
+    mac_addr: list[Annotated[list[MacAddr], BeforeValidator(_members), Field(min_length=1)]] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check(self) -> Self:
+        size = len(self.mac_addr)
+        if self.count is not None and self.count != size:
+            raise ValueError(f"count is {self.count} but mac_addr lists {size} members")
+        if self.last_address is not None and int(self.last_address) - int(self.address) + 1 != size:
+            raise ValueError(
+                f"{self.address}-{self.last_address} does not hold the {size} members mac_addr lists"
+            )
+        self.count = size
+        if self.end > int(IPv4Address("255.255.255.255")):
+            raise ValueError(f"{size} addresses from {self.address} run past 255.255.255.255")
+        self.last_address = IPv4Address(self.end)
+        for index in (self.first_index, self.first_index + size - 1):
+            if not re.fullmatch(NODE_NAME_PATTERN, name := self.member_name(index)):
+                raise ValueError(f"member name {name!r} is not a valid node name")
         return self
 
+    @property
+    def end(self) -> int:
+        return int(self.address) + len(self.mac_addr) - 1
+
+    def _template(self) -> tuple[str, int, str]:
+        prefix, width, suffix = re.fullmatch(POOL_NAME_PATTERN, self.name).groups()
+        return prefix, int(width or 1), suffix
+
+    def member_name(self, index: int) -> str:
+        prefix, width, suffix = self._template()
+        return f"{prefix}{index:0{width}d}{suffix}"
+
+    # The member index a node name stands for, if the pool can produce it.
+    def index_of(self, name: str) -> int | None:
+        prefix, width, suffix = self._template()
+        match = re.fullmatch(f"{re.escape(prefix)}([0-9]+){re.escape(suffix)}", name)
+        if match is None or match[1] != f"{int(match[1]):0{width}d}":
+            return None
+        index = int(match[1])
+        return index if self.first_index <= index < self.first_index + len(self.mac_addr) else None
+
+    # Whether the two pools generate a common name. The same prefix and
+    # suffix reduce to overlapping indexes, where the shorter padding no
+    # longer makes a difference. Otherwise digits on one side can stand in
+    # for template text on the other ("worker-{index}" at 10 and
+    # "worker-1{index}" at 0), so the shorter pool's names are looked up in
+    # the other pool, unless neither template can extend the other.
+    def shares_names(self, other: "NodePool") -> bool:
+        (prefix, width, suffix), (other_prefix, other_width, other_suffix) = self._template(), other._template()
+        if (prefix, suffix) == (other_prefix, other_suffix):
+            lo = max(self.first_index, other.first_index)
+            hi = min(self.first_index + len(self.mac_addr), other.first_index + len(other.mac_addr)) - 1
+            if width != other_width:
+                lo = max(lo, 10 ** (max(width, other_width) - 1))
+            return lo <= hi
+        if not (prefix.startswith(other_prefix) or other_prefix.startswith(prefix)):
+            return False
+        if not (suffix.endswith(other_suffix) or other_suffix.endswith(suffix)):
+            return False
+        shorter, longer = sorted((self, other), key=lambda pool: len(pool.mac_addr))
+        return any(
+            longer.index_of(shorter.member_name(index)) is not None
+            for index in range(shorter.first_index, shorter.first_index + len(shorter.mac_addr))
+        )
+
+    # Members as Node objects, built on demand and not validated again: the
+    # pool checks covered them, and the shared settings are the pool's own
+    # after Config.check resolved them.
+    def expand(self) -> Iterator[Node]:
+        shared = {name: getattr(self, name) for name in NodeSettings.model_fields}
+        for i, mac_addr in enumerate(self.mac_addr):
+            yield Node.model_construct(
+                name=self.member_name(self.first_index + i),
+                address=IPv4Address(int(self.address) + i),
+                controller=self.controller,
+                mac_addr=mac_addr,
+                links=[],
+                **shared,
+            )
+
 
 class Config(Model):
     network: Network
@@ -227,8 +906,16 @@ class Config(Model):
     )
     cilium: Cilium = Cilium()
     talos: Talos = Talos()
+    tuning: Tuning = Tuning()
+    # Disk encryption defaults for nodes with encrypt_disk set.
+    encryption: Encryption = Encryption()
+    registries: Registries = Registries()
     spegel: Spegel = Spegel()
-    nodes: list[Node]
+    bootstrap: Bootstrap = Bootstrap()
+    upgrade: Upgrade = Upgrade()
+    flux: Flux = Flux()
+    nodes: list[Node] = []
+    node_pools: list[NodePool] = []
 
     @computed_field
     @property
@@ -236,12 +923,37 @@ class Config(Model):
         bgp = self.cilium.bgp
         return bgp.router_addr != "" and bgp.router_asn != "" and bgp.node_asn != ""
 
+    # Nodes plus every pool member; load() is the only place members are
+    # built.
+    @computed_field
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes) + sum(len(pool.mac_addr) for pool in self.node_pools)
+
     # Replica counts for control-plane-only workloads key off this rather
-    # than len(nodes); a cluster can have many workers but one controller.
+    # than node_count; a cluster can have many workers but one controller.
     @computed_field
     @property
     def controller_count(self) -> int:
-        return sum(1 for node in self.nodes if node.controller)
+        return sum(1 for node in self.nodes if node.controller) + sum(
+            len(pool.mac_addr) for pool in self.node_pools if pool.controller
+        )
+
+    # CoreDNS serves every node's pods, so it scales with the node count:
+    # two replicas once there is a second node, then one per 8 nodes.
+    @computed_field
+    @property
+    def coredns_replicas(self) -> int:
+        if self.node_count == 1:
+            return 1
+        return max(2, math.ceil(self.node_count / 8))
+
+    # Cache entries per CoreDNS replica: about 1000 names per node, from the
+    # plugin default up to ten times that.
+    @computed_field
+    @property
+    def coredns_cache_size(self) -> int:
+        return min(max(1000 * self.node_count, 9984), 99840)
 
     @computed_field
     @property
@@ -260,88 +972,280 @@ class Config(Model):
     @model_validator(mode="after")
     def check(self) -> Self:
         if self.spegel.enabled is None:
-            self.spegel.enabled = len(self.nodes) > 1
-        for i, node in enumerate(self.nodes):
+            self.spegel.enabled = self.node_count > 1
+        tunnel = self.ingress.tunnel
+        if tunnel.replicas is None:
+            tunnel.replicas = 1 if self.node_count == 1 else 2
+        envoy = self.gateways.envoy
+        if envoy.mode == "deployment" and envoy.replicas is None and envoy.autoscaling is None:
+            # Like CoreDNS: two once there is a second node, then one per 8.
+            envoy.replicas = 1 if self.node_count == 1 else max(2, math.ceil(self.node_count / 8))
+        # Every problem is collected and reported together rather than one
+        # per run; format_errors prints one per line.
+        errors: list[str] = []
+        if self.node_count == 0:
+            errors.append("at least one node is required in [[nodes]] or [[node_pools]]")
+        errors += self._check_tunnel()
+        # Any node may run a connector, so every node needs QUIC-sized buffers.
+        quic = self.ingress.mode == "cloudflare-tunnel" and tunnel.protocol != "http2"
+        for owner, node in self._settings():
             if node.schematic_id is None:
                 node.schematic_id = self.talos.schematic_id
             if node.schematic_id is None:
-                raise ValueError(
-                    f"nodes[{i}].schematic_id is required: set it on the node "
+                errors.append(
+                    f"{owner}.schematic_id is required: set it on the node "
                     "or set a cluster-wide default in [talos]"
                 )
+            node.tuning = resolve_tuning(
+                node.tuning.profile or self.tuning.profile or "default", self.tuning, node.tuning
+            )
+            errors += (f"{owner}.tuning: {error}" for error in node.tuning.conflicts())
+            if quic:
+                errors += (
+                    f"{owner}.tuning.{name} {value} is below the {QUIC_BUFFER_BYTES} bytes "
+                    "the cloudflared QUIC transport needs"
+                    for name in ("rmem_max", "wmem_max")
+                    if (value := getattr(node.tuning, name)) < QUIC_BUFFER_BYTES
+                )
+            if node.encrypt_disk:
+                node.encryption = resolve_encryption(self.encryption, node.encryption)
+                for volume in ("state", "ephemeral"):
+                    errors += (
+                        f"{owner}.encryption.{volume}: {error}"
+                        for error in getattr(node.encryption, volume).conflicts()
+                    )
+            elif node.encryption.model_fields_set:
+                errors.append(f"{owner}.encryption is set but encrypt_disk is false")
         if self.ingress.mode != "none" and self.dns.provider != "cloudflare":
-            raise ValueError(
+            errors.append(
                 f"ingress.mode {self.ingress.mode!r} requires dns.provider 'cloudflare'"
             )
         if self.ingress.mode != "none" and self.gateways.external is None:
-            raise ValueError(
+            errors.append(
                 f"gateways.external is required when ingress.mode is {self.ingress.mode!r}"
             )
 
-        cidrs = {
-            "network.node_cidr": self.network.node_cidr,
-            "kubernetes.pod_cidr": self.kubernetes.pod_cidr,
-            "kubernetes.svc_cidr": self.kubernetes.svc_cidr,
-        }
-        names = list(cidrs)
-        for i, a in enumerate(names):
-            for b in names[i + 1:]:
-                if cidrs[a].overlaps(cidrs[b]):
-                    raise ValueError(f"{a} {cidrs[a]} overlaps {b} {cidrs[b]}")
-
-        addresses = {
-            "kubernetes.api.addr": self.kubernetes.api.addr,
-            "gateways.internal": self.gateways.internal,
-            "gateways.dns": self.gateways.dns,
-            "network.default_gateway": self.network.default_gateway,
-        } | {f"nodes[{i}].address": n.address for i, n in enumerate(self.nodes)}
-        if self.gateways.external is not None:
-            addresses["gateways.external"] = self.gateways.external
-        seen: dict[IPv4Address, str] = {}
-        for owner, addr in addresses.items():
-            if addr in seen:
-                raise ValueError(f"address {addr} is used by both {seen[addr]} and {owner}")
-            seen[addr] = owner
+        cidrs = IntervalIndex()
+        cidrs.add_network("network.node_cidr", self.network.node_cidr)
+        cidrs.add_network("kubernetes.pod_cidr", self.kubernetes.pod_cidr)
+        cidrs.add_network("kubernetes.svc_cidr", self.kubernetes.svc_cidr)
+        if self.kubernetes.node_local_dns.enabled:
+            cidrs.add_address("kubernetes.node_local_dns.listen_addr", self.kubernetes.node_local_dns.listen_addr)
+        for a, b in cidrs.overlaps():
+            errors.append(f"{a.owner} {a.describe()} overlaps {b.owner} {b.describe()}")
+
+        vips = [
+            (f"gateways.{name}", addr)
+            for name in ("internal", "dns", "external")
+            if (addr := getattr(self.gateways, name)) is not None
+        ]
+        cache = self.registries.cache
+        # Addresses held by hosts rather than handed out by LB-IPAM.
+        hosts = IntervalIndex()
+        addresses = IntervalIndex()
+        for owner, addr in [
+            ("kubernetes.api.addr", self.kubernetes.api.addr),
+            *vips,
+            ("network.default_gateway", self.network.default_gateway),
+            *((("registries.cache.url", cache.addr),) if cache is not None else ()),
+            *((f"nodes[{i}].address", n.address) for i, n in enumerate(self.nodes)),
+        ]:
+            addresses.add_address(owner, addr)
+            if not owner.startswith("gateways."):
+                hosts.add_address(owner, addr)
+        # A pool is one interval, however many members it has.
+        for i, pool in enumerate(self.node_pools):
+            addresses.add(f"node_pools[{i}]", int(pool.address), pool.end)
+            hosts.add(f"node_pools[{i}]", int(pool.address), pool.end)
+        for a, b in addresses.overlaps():
+            shared = Interval(max(a.start, b.start), min(a.end, b.end), a.owner)
+            errors.append(f"address {shared.describe()} is used by both {a.owner} and {b.owner}")
 
         node_cidr = self.network.node_cidr
+        first, last = int(node_cidr.network_address), int(node_cidr.broadcast_address)
         for i, node in enumerate(self.nodes):
-            if node.address not in node_cidr:
-                raise ValueError(
+            if not first <= int(node.address) <= last:
+                errors.append(
                     f"nodes[{i}].address {node.address} is not inside node_cidr {node_cidr}"
                 )
-        if self.kubernetes.api.addr not in node_cidr:
-            raise ValueError(
+        for i, pool in enumerate(self.node_pools):
+            if not (first <= int(pool.address) and pool.end <= last):
+                errors.append(
+                    f"node_pools[{i}] {pool.address}-{pool.last_address} is not inside node_cidr {node_cidr}"
+                )
+        if cache is not None and not first <= int(cache.addr) <= last:
+            errors.append(f"registries.cache.url {cache.url} is not inside node_cidr {node_cidr}")
+        if not first <= int(self.kubernetes.api.addr) <= last:
+            errors.append(
                 f"kubernetes.api.addr {self.kubernetes.api.addr} is not inside node_cidr {node_cidr}"
             )
         # Without BGP the gateway VIPs are announced over L2 and must live in
         # the node network.
         if not self.cilium_bgp_enabled:
-            for name in ("internal", "dns", "external"):
-                addr = getattr(self.gateways, name)
-                if addr is not None and addr not in node_cidr:
-                    raise ValueError(
-                        f"gateways.{name} {addr} is not inside node_cidr {node_cidr} "
+            for owner, addr in vips:
+                if not first <= int(addr) <= last:
+                    errors.append(
+                        f"{owner} {addr} is not inside node_cidr {node_cidr} "
                         "(required unless BGP is enabled)"
                     )
+        errors += self._check_lb_pool(vips)
+        errors += self._check_envoy()
+        errors += self._check_performance()
+        errors += self._check_bonds()
+        errors += self._check_names()
+
+        # MAC addresses are arbitrary, so unlike names and addresses they
+        # are checked one by one, pool members included.
+        macs: dict[str, str] = {}
+        for owner, member_macs in [
+            *((f"nodes[{i}]", node.mac_addr) for i, node in enumerate(self.nodes)),
+            *(
+                (f"node_pools[{i}].mac_addr[{j}]", member)
+                for i, pool in enumerate(self.node_pools) for j, member in enumerate(pool.mac_addr)
+            ),
+        ]:
+            # mac_addr holds every bond member.
+            for mac in member_macs:
+                if mac in macs:
+                    errors.append(f"duplicate node MAC address {mac!r} on {macs[mac]} and {owner}")
+                else:
+                    macs[mac] = owner
+        if errors:
+            raise ValueError("\n".join(errors))
+        return self
 
-        for field, label in (("name", "name"), ("mac_addr", "MAC address")):
-            values: dict[str, int] = {}
-            for i, node in enumerate(self.nodes):
-                value = getattr(node, field)
-                if value in values:
-                    raise ValueError(
-                        f"duplicate node {label} {value!r} on nodes[{values[value]}] and nodes[{i}]"
+    def _check_tunnel(self) -> list[str]:
+        tunnel = self.ingress.tunnel
+        if self.ingress.mode != "cloudflare-tunnel":
+            if "tunnel" in self.ingress.model_fields_set:
+                return [f"ingress.tunnel is only used with ingress.mode 'cloudflare-tunnel', not {self.ingress.mode!r}"]
+            return []
+        # A rolling update surges one pod more than there are replicas.
+        if tunnel.anti_affinity == "required" and tunnel.replicas >= self.node_count:
+            return [
+                f"ingress.tunnel.anti_affinity 'required' needs fewer replicas ({tunnel.replicas}) "
+                f"than nodes ({self.node_count}), or rolling updates cannot schedule the new pod"
+            ]
+        return []
+
+    # Cilium L2 announcements may pick any node to answer for a gateway VIP,
+    # so with externalTrafficPolicy Local every node needs a proxy; BGP only
+    # advertises the VIP from nodes that run one. In SNAT mode, Cluster
+    # hands Envoy the address of the forwarding node instead of the client;
+    # DSR keeps it.
+    def _check_envoy(self) -> list[str]:
+        envoy = self.gateways.envoy
+        local_safe = envoy.mode == "daemonset" or self.cilium_bgp_enabled
+        if envoy.external_traffic_policy is None:
+            envoy.external_traffic_policy = "Local" if local_safe else "Cluster"
+            return []
+        if envoy.external_traffic_policy == "Local" and not local_safe:
+            return [
+                "gateways.envoy.external_traffic_policy 'Local' needs mode 'daemonset' or cilium.bgp: "
+                "L2 announcements may answer for the gateway on a node without a proxy"
+            ]
+        if envoy.external_traffic_policy == "Cluster" and self.cilium.loadbalancer_mode == "snat":
+            return [
+                "gateways.envoy.external_traffic_policy 'Cluster' with cilium.loadbalancer_mode 'snat' "
+                "hides client addresses from Envoy; use 'Local' or loadbalancer_mode 'dsr'"
+            ]
+        return []
+
+    # Node settings and where they come from, a node or a whole pool.
+    def _settings(self) -> Iterator[tuple[str, NodeSettings]]:
+        yield from ((f"nodes[{i}]", node) for i, node in enumerate(self.nodes))
+        yield from ((f"node_pools[{i}]", pool) for i, pool in enumerate(self.node_pools))
+
+    # Names are checked against each pool's name pattern and index range
+    # instead of being generated, so the cost grows with the pool count.
+    def _check_names(self) -> list[str]:
+        errors = []
+        names: dict[str, int] = {}
+        for i, node in enumerate(self.nodes):
+            if node.name in names:
+                errors.append(f"duplicate node name {node.name!r} on nodes[{names[node.name]}] and nodes[{i}]")
+            else:
+                names[node.name] = i
+        for j, pool in enumerate(self.node_pools):
+            for name, i in names.items():
+                if pool.index_of(name) is not None:
+                    errors.append(f"duplicate node name {name!r} on nodes[{i}] and node_pools[{j}]")
+            for k, other in enumerate(self.node_pools[:j]):
+                if pool.shares_names(other):
+                    errors.append(f"node_pools[{k}] and node_pools[{j}] generate the same node names")
+        return errors
+
+    # The CiliumLoadBalancerIPPool is network.node_cidr without its first and
+    # last address (allowFirstLastIPs: "No"). Every LoadBalancer service the
+    # template renders pins a gateway VIP, and the address index already
+    # keeps those off the nodes, router and API VIP, so the pool only has to
+    # exist and hold each of them.
+    def _check_lb_pool(self, vips: list[tuple[str, IPv4Address]]) -> list[str]:
+        node_cidr = self.network.node_cidr
+        if node_cidr.prefixlen >= 31:
+            return [f"network.node_cidr {node_cidr} leaves no usable addresses for the LoadBalancer IP pool"]
+        errors = []
+        reserved = {
+            int(node_cidr.network_address): "network address",
+            int(node_cidr.broadcast_address): "broadcast address",
+        }
+        for owner, addr in vips:
+            if (kind := reserved.get(int(addr))) is not None:
+                errors.append(
+                    f"{owner} {addr} is the {kind} of node_cidr {node_cidr}, "
+                    "which the LoadBalancer IP pool never hands out"
+                )
+        return errors
+
+    # Bond members whose switch ports cannot carry the bond, or disagree
+    # with each other: an LACP partner suspends or silently drops on a
+    # mismatched member.
+    def _check_bonds(self) -> list[str]:
+        vlan = int(self.network.vlan_tag) if self.network.vlan_tag else None
+        errors = []
+        for i, node in enumerate(self.nodes):
+            for j, link in enumerate(node.links):
+                if link.mtu is not None and link.mtu < node.mtu:
+                    errors.append(f"nodes[{i}].links[{j}].mtu {link.mtu} is below the node mtu {node.mtu}")
+                if vlan is not None and link.vlans and vlan not in link.vlans:
+                    errors.append(f"nodes[{i}].links[{j}].vlans does not carry network.vlan_tag {vlan}")
+            if len({link.mtu for link in node.links if link.mtu is not None}) > 1:
+                errors.append(f"nodes[{i}] bond members have different mtu values")
+            if len({tuple(sorted(link.vlans)) for link in node.links if link.vlans}) > 1:
+                errors.append(f"nodes[{i}] bond members carry different vlans")
+        return errors
+
+    def _check_performance(self) -> list[str]:
+        performance = self.cilium.performance
+        errors = []
+        if performance.xdp:
+            for owner, node in self._settings():
+                if node.mtu > XDP_MAX_MTU:
+                    errors.append(
+                        f"cilium.performance.xdp does not work with {owner}.mtu {node.mtu}: "
+                        f"XDP native mode supports an MTU of at most {XDP_MAX_MTU}"
                     )
-                values[value] = i
-        return self
+        if (talos := talos_kernel()) is not None:
+            version, kernel = talos
+            for name, needed in PERFORMANCE_KERNELS.items():
+                if getattr(performance, name) and kernel < needed:
+                    errors.append(
+                        f"cilium.performance.{name} needs Linux {needed[0]}.{needed[1]} or newer, "
+                        f"but Talos {version} ships {kernel[0]}.{kernel[1]}"
+                    )
+        return errors
 
 
 def format_errors(error: ValidationError) -> str:
     lines = []
     for err in error.errors():
+        # Follow-on noise: a default computed from fields that already failed.
+        if err["type"] == "default_factory_not_called":
+            continue
         loc = ".".join(str(part) for part in err["loc"])
         msg = err["msg"].removeprefix("Value error, ")
-        lines.append(f"{loc}: {msg}" if loc else msg)
+        # A model check may report several problems, one per line.
+        lines += (f"{loc}: {line}" if loc else line for line in msg.splitlines())
     return "\n".join(lines)
 
 
@@ -368,7 +1272,10 @@ def load(config_file: str = "cluster.toml") -> dict[str, Any]:
     # Unset optionals stay in the dump as None rather than being dropped:
     # makejinja renders with StrictUndefined, so a template testing
     # network.vlan_tag needs the key to exist.
-    return config.model_dump(mode="json")
+    data = config.model_dump(mode="json")
+    # Templates see pool members as ordinary nodes, after the explicit ones.
+    data["nodes"] += (node.model_dump(mode="json") for pool in config.node_pools for node in pool.expand())
+    return data
 
 
 def main() -> int:
@@ -0,0 +1,181 @@
+"""Long-lived cluster.toml validator and its thin client.
+
+Usage: uv run --locked --no-dev template/scripts/validate_daemon.py serve
+       python3 template/scripts/validate_daemon.py check [CONFIG]
+
+The server imports validate once and answers requests on a Unix socket,
+so editor integrations and pre-commit hooks skip uv resolution, the
+pydantic import and schema construction on every save. The client only
+uses the standard library; `check` prints the same JSON or errors and
+exits with the same status as validate.py. When no server is listening
+(or the server's validate.py is out of date) the client falls back to
+validating in-process inside the project venv, or to `uv run validate.py`
+from any other interpreter.
+
+The protocol is one JSON line each way, so editors can also talk to the
+socket directly:
+
+  -> {"config": "/abs/path/cluster.toml"}
+  <- {"ok": true, "data": {...}} | {"ok": false, "error": "..."}
+"""
+
+from pathlib import Path
+from typing import Any
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+SCRIPTS_DIR = Path(__file__).parent
+
+
+# Unix socket paths are limited to ~100 bytes, so the default lives in the
+# user's runtime dir (or a private 0700 dir in the shared temp dir), keyed by
+# checkout rather than under the repository.
+def default_socket() -> Path:
+    if path := os.environ.get("VALIDATE_SOCKET"):
+        return Path(path)
+    checkout = hashlib.sha256(str(SCRIPTS_DIR.resolve()).encode()).hexdigest()[:12]
+    return runtime_dir() / f"cluster-template-{checkout}.sock"
+
+
+def runtime_dir() -> Path:
+    if path := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(path)
+    path = Path(tempfile.gettempdir()) / f"cluster-template-{os.getuid()}"
+    path.mkdir(mode=0o700, exist_ok=True)
+    # Someone else may have created it first; never share it.
+    info = path.lstat()
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise SystemExit(f"{path}: not a private directory owned by you; set XDG_RUNTIME_DIR or VALIDATE_SOCKET")
+    return path
+
+
+# Only a socket the current user created is trusted to answer.
+def owned_socket(path: Path) -> bool:
+    try:
+        info = path.lstat()
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        info = path.stat()
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def serve(path: Path) -> int:
+    import socketserver
+
+    import validate
+
+    source = Path(validate.__file__)
+    source_mtime = source.stat().st_mtime_ns
+    # Results keyed by the (mtime, size) of the config and of topf.yaml.j2,
+    # which talos_kernel reads: unchanged files are answered without
+    # re-parsing.
+    results: dict[str, tuple[tuple[tuple[int, int] | None, ...], dict[str, Any]]] = {}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline())
+                response = self.validate(Path(request["config"]))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                response = {"ok": False, "error": "malformed request"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        def validate(self, config: Path) -> dict[str, Any]:
+            if source.stat().st_mtime_ns != source_mtime:
+                self.server.stale = True
+                return {"ok": None, "error": "validator is out of date"}
+            if (config_stamp := _stamp(config)) is None:
+                return {"ok": False, "error": f"{config}: file not found"}
+            stamp = (config_stamp, _stamp(validate.TOPF_TEMPLATE))
+            cached = results.get(str(config))
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            try:
+                response = {"ok": True, "data": validate.load(str(config))}
+            except validate.ConfigError as e:
+                response = {"ok": False, "error": str(e)}
+            results[str(config)] = (stamp, response)
+            return response
+
+    class Server(socketserver.UnixStreamServer):
+        stale = False
+
+    path.unlink(missing_ok=True)
+    with Server(str(path), Handler) as server:
+        print(f"validator listening on {path}", file=sys.stderr)
+        try:
+            # Exit once a request noticed validate.py changed; clients fall
+            # back to in-process validation until the server is restarted.
+            while not server.stale:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
+    return 0
+
+
+def request(path: Path, config: Path) -> dict[str, Any] | None:
+    if not owned_socket(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(10)
+            sock.connect(str(path))
+            sock.sendall(json.dumps({"config": str(config.resolve())}).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                response = json.loads(reply.readline())
+    except (OSError, json.JSONDecodeError):
+        return None
+    return response if response.get("ok") is not None else None
+
+
+def check(path: Path, config: Path) -> int:
+    response = request(path, config)
+    if response is None and sys.prefix == sys.base_prefix:
+        validate_script = str(SCRIPTS_DIR / "validate.py")
+        os.execvp("uv", ["uv", "run", "--quiet", "--locked", "--no-dev", validate_script, str(config)])
+    if response is None:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        import validate
+
+        try:
+            response = {"ok": True, "data": validate.load(str(config))}
+        except validate.ConfigError as e:
+            response = {"ok": False, "error": str(e)}
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 1
+    json.dump(response["data"], sys.stdout, indent=2)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, default=default_socket())
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("serve")
+    commands.add_parser("check").add_argument("config", nargs="?", type=Path, default=Path("cluster.toml"))
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve(args.socket)
+    return check(args.socket, args.config)
+
+
+if __name__ == "__main__":
+    sys.exit(main())